@@ -0,0 +1,57 @@
+"""Benchmark of FFPoly multiplication, division with remainder and gcd against sympy Poly(..., modulus=prime),
+on random dense polynomials of the given degrees, for an NTT-friendly prime and for 2 ^ 31 - 1 (multi-prime CRT path).
+sympy is skipped above --sympy-max-degree (default 10 ^ 3, its quadratic algorithms take hours at 10 ^ 4 and beyond).
+
+Usage: python benchmarks/benchmark_FFPoly.py [degrees ...] [--sympy-max-degree N]
+"""
+
+import random
+import sys
+import time
+
+import sympy
+
+from pyadic.polynomials import FFPoly
+
+t = sympy.Symbol('t')
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def random_coeffs(degree, prime):
+    return [random.randrange(prime) for i in range(degree)] + [1]
+
+
+def benchmark(degree, prime, with_sympy):
+    random.seed(degree)
+    a, b = FFPoly(random_coeffs(2 * degree, prime), prime), FFPoly(random_coeffs(degree, prime), prime)
+    g = FFPoly(random_coeffs(degree // 2, prime), prime)
+    x, y = FFPoly(random_coeffs(degree // 2, prime), prime) * g, FFPoly(random_coeffs(degree // 2, prime), prime) * g
+    timings = {"mul": timed(lambda: b * b)[1], "divmod": timed(divmod, a, b)[1], "gcd": timed(x.gcd, y)[1]}
+    if with_sympy:
+        def to_sympy(poly):
+            return sympy.Poly(list(map(int, poly.coeffs[::-1])), t, modulus=prime)
+        sa, sb, sx, sy = map(to_sympy, (a, b, x, y))
+        timings.update({"sympy mul": timed(lambda: sb * sb)[1], "sympy divmod": timed(sympy.div, sa, sb)[1], "sympy gcd": timed(sympy.gcd, sx, sy)[1]})
+    return timings
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    sympy_max_degree = 10 ** 3
+    if "--sympy-max-degree" in args:
+        index = args.index("--sympy-max-degree")
+        sympy_max_degree = int(args[index + 1])
+        del args[index:index + 2]
+    degrees = [int(arg) for arg in args] or [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5]
+    columns = ["mul", "divmod", "gcd", "sympy mul", "sympy divmod", "sympy gcd"]
+    for prime in [998244353, 2 ** 31 - 1]:
+        print(f"prime = {prime}")
+        print(f"{'degree':>7} " + " ".join(f"{column:>12}" for column in columns))
+        for degree in degrees:
+            timings = benchmark(degree, prime, degree <= sympy_max_degree)
+            print(f"{degree:>7} " + " ".join(f"{timings[column]:>11.3f}s" if column in timings else f"{'-':>12}" for column in columns))
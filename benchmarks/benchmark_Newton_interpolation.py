@@ -0,0 +1,68 @@
+"""Benchmark of Newton_polynomial_interpolation (divided-difference engine) against the previous closure-chain implementation.
+
+Usage: python benchmarks/benchmark_Newton_interpolation.py [degrees ...]
+"""
+
+import functools
+import random
+import sys
+import time
+
+import sympy
+
+from pyadic import ModP
+from pyadic.interpolation import Newton_polynomial_interpolation, FFSequenceGenerator
+
+prime = 2 ** 31 - 1
+
+
+def legacy_Newton_polynomial_interpolation(f, prime, seed=0):
+    """Previous implementation: chain of functools.partial closures and assembly in sympy.GF(prime).frac_field."""
+    t_sequence_generator = FFSequenceGenerator(prime, seed)
+    t = sympy.symbols('t')
+    avals, tvals, subtracted = [], [], [f]
+
+    def fsubtracted(i, t):
+        return (subtracted[i - 1](t) - avals[i - 1]) / (t - tvals[i - 1])
+
+    while avals[-2:] != [0, 0]:
+        tvals += [next(t_sequence_generator)]
+        avals += [subtracted[-1](tvals[-1])]
+        subtracted += [functools.partial(fsubtracted, len(avals))]
+    FFGF = sympy.GF(prime).frac_field(t)
+    tpoly = FFGF(0)
+    for aval, tval in zip(avals[:-2][::-1], tvals[:-2][::-1]):
+        tpoly = int(aval) + (FFGF(t) - int(tval)) * tpoly
+    return tpoly.as_expr()
+
+
+def random_black_box(degree):
+    coeffs = [random.randrange(prime) for i in range(degree + 1)]
+
+    def f(t):
+        t, res = int(t), 0
+        for coeff in coeffs[::-1]:
+            res = (res * t + coeff) % prime
+        return ModP(res, prime)
+
+    return f
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        func(*args, **kwargs)
+    except RecursionError:
+        return "RecursionError"
+    return f"{time.perf_counter() - start:.3f}s"
+
+
+if __name__ == "__main__":
+    degrees = [int(arg) for arg in sys.argv[1:]] or [20, 200, 2000]
+    print(f"{'degree':>8} {'legacy':>16} {'native':>12} {'native + sympy':>16}")
+    for degree in degrees:
+        f = random_black_box(degree)
+        legacy = timed(legacy_Newton_polynomial_interpolation, f, prime)
+        native = timed(Newton_polynomial_interpolation, f, prime, as_native=True)
+        native_expr = timed(Newton_polynomial_interpolation, f, prime)
+        print(f"{degree:>8} {legacy:>16} {native:>12} {native_expr:>16}")
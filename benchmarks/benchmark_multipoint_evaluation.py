@@ -0,0 +1,40 @@
+"""Benchmark of subproduct-tree multipoint_evaluation and interpolate_at_points against vectorized Horner evaluation,
+for a random polynomial of degree n - 1 evaluated at n random points. Horner is skipped above --horner-max (default 2 * 10 ^ 4).
+
+Usage: python benchmarks/benchmark_multipoint_evaluation.py [n ...] [--horner-max N]
+"""
+
+import random
+import sys
+import time
+
+import pyadic.polynomials
+from pyadic.polynomials import FFPoly, multipoint_evaluation, interpolate_at_points
+
+prime = 2 ** 31 - 1
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    horner_max = 2 * 10 ** 4
+    if "--horner-max" in args:
+        index = args.index("--horner-max")
+        horner_max = int(args[index + 1])
+        del args[index:index + 2]
+    sizes = [int(arg) for arg in args] or [10 ** 3, 10 ** 4, 2 * 10 ** 4, 10 ** 5]
+    pyadic.polynomials.multipoint_evaluation_threshold = float("inf")  # FFPoly.evaluate is plain Horner
+    print(f"{'n':>7} {'tree eval':>10} {'tree interp':>12} {'Horner eval':>12}")
+    for n in sizes:
+        random.seed(n)
+        poly, points = FFPoly([random.randrange(prime) for i in range(n)], prime), random.sample(range(prime), n)
+        values, evaluation_time = timed(multipoint_evaluation, poly, points)
+        interpolated, interpolation_time = timed(interpolate_at_points, points, values, prime)
+        assert interpolated == poly
+        horner = f"{timed(poly.evaluate, points)[1]:>11.3f}s" if n <= horner_max else f"{'-':>12}"
+        print(f"{n:>7} {evaluation_time:>9.3f}s {interpolation_time:>11.3f}s {horner}")
@@ -0,0 +1,46 @@
+"""Benchmark of the overhead per probe of multivariate_Newton_polynomial_interpolation, for a cheap black box (sum(ts) ^ degree + 1
+in nvars variables): total time minus the time to replay the same probes, divided by the number of probes (best of --repeat runs, default 3).
+
+Usage: python benchmarks/benchmark_multivariate_Newton.py [nvars:degree ...] [--repeat N]
+"""
+
+import inspect
+import sys
+import time
+
+from pyadic.interpolation import multivariate_Newton_polynomial_interpolation
+
+prime = 2 ** 31 - 1
+
+
+def black_box(nvars, degree, probes):
+    def f(*ts):
+        probes.append(ts)
+        return sum(ts) ** degree + 1
+    f.__signature__ = inspect.Signature([inspect.Parameter(f"t{i}", inspect.Parameter.POSITIONAL_OR_KEYWORD) for i in range(1, nvars + 1)])
+    return f
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    repeat = 3
+    if "--repeat" in args:
+        index = args.index("--repeat")
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+    cases = [tuple(map(int, arg.split(":"))) for arg in args] or [(2, 5), (2, 20), (3, 5), (3, 10), (4, 4)]
+    print(f"{'nvars':>5} {'degree':>6} {'probes':>7} {'total':>9} {'black box':>10} {'overhead / probe':>17}")
+    for nvars, degree in cases:
+        timings = []
+        for i in range(repeat):
+            probes = []
+            f = black_box(nvars, degree, probes)
+            start = time.perf_counter()
+            multivariate_Newton_polynomial_interpolation(f, prime, as_native=True)
+            total = time.perf_counter() - start
+            replay, start = list(probes), time.perf_counter()
+            for ts in replay:
+                f(*ts)
+            timings.append((total - (time.perf_counter() - start), total, time.perf_counter() - start))
+        overhead, total, black_box_time = min(timings)
+        print(f"{nvars:>5} {degree:>6} {len(replay):>7} {total:>8.3f}s {black_box_time:>9.3f}s {1e6 * overhead / len(replay):>15.1f}us")
@@ -0,0 +1,43 @@
+"""Read / write throughput of the on-disk ProbeStore.
+
+Writes n probes (3-variable points, ModP values) through ProbeStore.put, then reopens the store and reads them back
+(one bulk load per (prime, seed), followed by dict lookups), as a resumed interpolation would.
+
+Usage: python benchmarks/benchmark_probe_store.py [n]  (default 10 ** 6)
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pyadic import ModP
+from pyadic.probe_store import ProbeStore
+
+prime, seed = 2 ** 31 - 1, 0
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6
+    rng = random.Random(0)
+    points = [(rng.randrange(prime), rng.randrange(prime), rng.randrange(prime)) for i in range(n)]
+    values = [ModP(rng.randrange(prime), prime) for i in range(n)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "probes.sqlite")
+
+        start = time.perf_counter()
+        with ProbeStore(path) as store:
+            for point, value in zip(points, values):
+                store.put(prime, seed, point, value)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProbeStore(path) as store:
+            assert all(store.get(prime, seed, point) == value for point, value in zip(points, values))
+        read_time = time.perf_counter() - start
+
+        size = os.path.getsize(path)
+    print(f"{n} probes, {size / 2 ** 20:.1f} MiB on disk")
+    print(f"write: {write_time:.2f}s ({n / write_time:,.0f} probes/s)")
+    print(f"read:  {read_time:.2f}s ({n / read_time:,.0f} probes/s)")
@@ -0,0 +1,44 @@
+"""Benchmark of Thiele_rational_interpolation against the Newton + rational reconstruction mode (Pade_rational_interpolation),
+on random rational functions with numerator and denominator of the given degree.
+
+Usage: python benchmarks/benchmark_rational_interpolation.py [degrees ...]
+"""
+
+import random
+import sys
+import time
+
+from pyadic.interpolation import Thiele_rational_interpolation, Pade_rational_interpolation
+from pyadic.polynomials import FFPoly
+
+prime = 2 ** 31 - 1
+
+
+def random_black_box(degree):
+    numerator = FFPoly([random.randrange(prime) for i in range(degree + 1)], prime)
+    denominator = FFPoly([random.randrange(prime) for i in range(degree + 1)], prime)
+
+    def f(tval):
+        f.probes += 1
+        return numerator(tval) / denominator(tval)
+
+    f.probes = 0
+    return f
+
+
+def timed(interpolator, degree):
+    random.seed(degree)
+    black_box = random_black_box(degree)
+    start = time.perf_counter()
+    result = interpolator(black_box, prime, as_native=True)
+    return result, black_box.probes, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    degrees = [int(arg) for arg in sys.argv[1:]] or [10, 25, 50, 100, 200, 400]
+    print(f"{'degree':>7} {'Thiele probes':>14} {'Thiele time':>12} {'Pade probes':>12} {'Pade time':>10}")
+    for degree in degrees:
+        thiele, thiele_probes, thiele_time = timed(Thiele_rational_interpolation, degree)
+        pade, pade_probes, pade_time = timed(Pade_rational_interpolation, degree)
+        assert thiele == pade
+        print(f"{degree:>7} {thiele_probes:>14} {thiele_time:>11.3f}s {pade_probes:>12} {pade_time:>9.3f}s")
@@ -0,0 +1,57 @@
+"""Benchmark of sparse_multivariate_polynomial_interpolation (Zippel) against the recursive multivariate_Newton_polynomial_interpolation,
+on sparse polynomials generalising Ptest2 from tests/test_interpolation.py to n variables: (t1 + 2 * t2) + 3 * (t1 * t2) + t3 ** 5 + ...
+The recursive interpolator needs a number of probes exponential in n, and is skipped above --max-recursive-vars (default 10).
+
+Usage: python benchmarks/benchmark_sparse_interpolation.py [--max-recursive-vars N] [nvars ...]
+"""
+
+import sys
+import time
+
+from pyadic.interpolation import sparse_multivariate_polynomial_interpolation, multivariate_Newton_polynomial_interpolation
+
+prime = 2 ** 31 - 1
+
+
+def sparse_black_box(nvars):
+    """Ptest2 plus a product of consecutive variables and a quintic term for each further variable, with probe counter."""
+
+    def f(*ts):
+        f.probes += 1
+        res = (ts[0] + 2 * ts[1]) + 3 * (ts[0] * ts[1]) + ts[2] ** 5
+        for i in range(3, nvars):
+            res += (i + 1) * ts[i - 1] * ts[i] + ts[i] ** 5
+        return res
+
+    f.probes = 0
+    arguments = ", ".join(f"t{i}" for i in range(1, nvars + 1))
+    namespace = {"f": f}
+    exec(f"def black_box({arguments}):\n    return f({arguments})", namespace)  # fixed signature, as inspected by the interpolators
+    return f, namespace["black_box"]
+
+
+def timed(interpolator, nvars):
+    counter, black_box = sparse_black_box(nvars)
+    start = time.perf_counter()
+    result = interpolator(black_box, prime, as_native=True)
+    return result, counter.probes, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    max_recursive_vars = 10
+    if "--max-recursive-vars" in arguments:
+        index = arguments.index("--max-recursive-vars")
+        max_recursive_vars = int(arguments[index + 1])
+        arguments = arguments[:index] + arguments[index + 2:]
+    nvars_list = [int(arg) for arg in arguments] or [3, 4, 5, 6, 8, 10]
+    print(f"{'nvars':>6} {'terms':>6} {'sparse probes':>14} {'sparse time':>12} {'recursive probes':>17} {'recursive time':>15}")
+    for nvars in nvars_list:
+        sparse, sparse_probes, sparse_time = timed(sparse_multivariate_polynomial_interpolation, nvars)
+        if nvars <= max_recursive_vars:
+            recursive, recursive_probes, recursive_time = timed(multivariate_Newton_polynomial_interpolation, nvars)
+            assert recursive == sparse
+            recursive_columns = f"{recursive_probes:>17} {recursive_time:>14.3f}s"
+        else:
+            recursive_columns = f"{'skipped':>17} {'':>15}"
+        print(f"{nvars:>6} {len(sparse.terms):>6} {sparse_probes:>14} {sparse_time:>11.3f}s {recursive_columns}")
@@ -1,5 +1,6 @@
 from .version import __version__                  # noqa
 from .padic import PAdic                          # noqa
+from .lazy_padic import LazyPAdic                 # noqa
 from .finite_field import ModP, rationalise       # noqa
 from .gaussian_rationals import GaussianRational  # noqa
 from .field_extension import FieldExtension       # noqa
@@ -3,6 +3,7 @@ import fractions
 import functools
 import math
 import numbers
+import random
 import re
 
 import numpy
@@ -329,6 +330,10 @@ def rationalise(a, n=None, algorithm=(LGRR, MQRR, EEARR)[0]):
             return rationalise(int(a), a.p, algorithm)
         elif isinstance(a, padic.PAdic):
             return rationalise(a.num, a.p ** a.k, algorithm) * fractions.Fraction(a.p) ** a.n
+        else:
+            from .lazy_padic import LazyPAdic
+            if isinstance(a, LazyPAdic):
+                return a.rationalise(algorithm)
     return algorithm(a, n)
 
 
@@ -410,6 +415,115 @@ def finite_field_roots(x, n):
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 
 
+def univariate_integer_coefficients(poly):
+    """Integer coefficients, from the constant term up, of a univariate polynomial with rational coefficients.
+    The polynomial can be a sympy expression (or string), or a sequence of coefficients from the highest degree down (as in numpy.polyval).
+    Denominators are cleared, which leaves the roots unchanged."""
+    if isinstance(poly, (str, sympy.Expr)):
+        poly = sympy.Poly(sympy.sympify(poly))
+        if len(poly.gens) > 1:
+            raise ValueError(f"Expected a univariate polynomial, got generators {poly.gens}.")
+        poly = poly.all_coeffs()
+    coefficients = [fractions.Fraction(str(coefficient)) for coefficient in poly][::-1]
+    denominator = math.lcm(*[coefficient.denominator for coefficient in coefficients]) if len(coefficients) > 0 else 1
+    coefficients = [int(coefficient * denominator) for coefficient in coefficients]
+    while len(coefficients) > 0 and coefficients[-1] == 0:
+        coefficients.pop()
+    return coefficients
+
+
+def _ff_poly_trim(a):
+    while len(a) > 0 and a[-1] == 0:
+        a = a[:-1]
+    return a
+
+
+def _ff_poly_sub(a, b, p):
+    a, b = a + [0] * (len(b) - len(a)), b + [0] * (len(a) - len(b))
+    return _ff_poly_trim([(ai - bi) % p for ai, bi in zip(a, b)])
+
+
+def _ff_poly_mul(a, b, p):
+    if len(a) == 0 or len(b) == 0:
+        return []
+    res = [0] * (len(a) + len(b) - 1)
+    for i, ai in enumerate(a):
+        if ai != 0:
+            for j, bj in enumerate(b):
+                res[i + j] += ai * bj
+    return _ff_poly_trim([entry % p for entry in res])
+
+
+def _ff_poly_divmod(a, b, p):
+    """Quotient and remainder of a / b over F_p, coefficients from the constant term up."""
+    a, b = _ff_poly_trim([entry % p for entry in a]), _ff_poly_trim([entry % p for entry in b])
+    if len(b) == 0:
+        raise ZeroDivisionError("Polynomial division by zero.")
+    inverse_leading = pow(b[-1], -1, p)
+    quotient = [0] * max(len(a) - len(b) + 1, 0)
+    remainder = list(a)
+    for i in range(len(a) - len(b), -1, -1):
+        coefficient = remainder[i + len(b) - 1] * inverse_leading % p
+        quotient[i] = coefficient
+        if coefficient != 0:
+            for j, bj in enumerate(b):
+                remainder[i + j] = (remainder[i + j] - coefficient * bj) % p
+    return _ff_poly_trim(quotient), _ff_poly_trim(remainder[:len(b) - 1])
+
+
+def _ff_poly_gcd(a, b, p):
+    """Monic greatest common divisor over F_p."""
+    a, b = _ff_poly_trim([entry % p for entry in a]), _ff_poly_trim([entry % p for entry in b])
+    while len(b) > 0:
+        a, b = b, _ff_poly_divmod(a, b, p)[1]
+    if len(a) == 0:
+        return a
+    inverse_leading = pow(a[-1], -1, p)
+    return [entry * inverse_leading % p for entry in a]
+
+
+def _ff_poly_powmod(a, n, modulus, p):
+    """a ^ n mod (modulus, p) by repeated squaring."""
+    res, a = [1], _ff_poly_divmod(a, modulus, p)[1]
+    while n > 0:
+        if n % 2 == 1:
+            res = _ff_poly_divmod(_ff_poly_mul(res, a, p), modulus, p)[1]
+        a = _ff_poly_divmod(_ff_poly_mul(a, a, p), modulus, p)[1]
+        n //= 2
+    return res
+
+
+def _ff_poly_linear_factors_roots(g, p, rng):
+    """Roots of g, assumed to be monic and a product of distinct linear factors over F_p (Cantor–Zassenhaus equal-degree splitting)."""
+    if len(g) <= 1:
+        return []
+    if len(g) == 2:
+        return [(-g[0]) % p]
+    while True:
+        shift = rng.randrange(p)
+        h = _ff_poly_powmod([shift, 1], (p - 1) // 2, g, p)
+        h = _ff_poly_gcd(_ff_poly_sub(h, [1], p), g, p)
+        if 1 < len(h) < len(g):
+            return _ff_poly_linear_factors_roots(h, p, rng) + _ff_poly_linear_factors_roots(_ff_poly_divmod(g, h, p)[0], p, rng)
+
+
+def finite_field_polynomial_roots(poly, p):
+    """Returns the sorted distinct roots in F_p of a univariate polynomial (see univariate_integer_coefficients for the accepted inputs).
+    Native implementation: gcd with x^p - x isolates the linear factors, which are then split by Cantor–Zassenhaus."""
+    coefficients = _ff_poly_trim([coefficient % p for coefficient in univariate_integer_coefficients(poly)])
+    if len(coefficients) == 0:
+        raise ValueError("The zero polynomial vanishes everywhere.")
+    if p <= 3:
+        return [ModP(x, p) for x in range(p) if sum(c * x ** i for i, c in enumerate(coefficients)) % p == 0]
+    x_to_the_p = _ff_poly_powmod([0, 1], p, coefficients, p)
+    g = _ff_poly_gcd(coefficients, _ff_poly_sub(x_to_the_p, [0, 1], p), p)
+    rng = random.Random(p)  # deterministic and decoupled from the global random state
+    return [ModP(root, p) for root in sorted(_ff_poly_linear_factors_roots(g, p, rng))]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
 def univariate_finite_field_solver(equation, root_dict, prime):
     # !!! DO NOT MODIFY HERE !!! This function is from lips.algebraic_geometry.tools
     """Returns all possible solutions of 'equation' over a finite field of cardinality 'prime'.
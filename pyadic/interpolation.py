@@ -1,42 +1,106 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextvars
 import functools
+import hashlib
 import numpy
+import os
 import random
 import sympy
 import inspect
+import math
+import threading
+import time
 
 from collections.abc import Iterator
 
-from pyadic import ModP
+from pyadic import ModP, PAdic
+from pyadic.finite_field import vec_chained_FF_rationalize, LGRR
+from pyadic.primes import primes
+from pyadic.polynomials import FFPoly, FFSparsePoly, FFRational, ff_dtype, cumprod_mod, inverse_mod, to_residue, rational_reconstruction, \
+    solve_transposed_Vandermonde
 
+max_multivariate_samples = 1000  # iteration limit per variable of the multivariate Newton interpolations, for black boxes that are not polynomials
 
-def Newton_polynomial_interpolation(f, prime, seed=0, verbose=False, as_nested_sum=False, as_expr=True,
-                                    catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, ):
-    """Univariate polynomial interpolation of f(t), samples taken modulo prime. See arXiv:1608.01902 section 3.2"""
-    t_sequence_generator = FFSequenceGenerator(prime, seed)
-    t = sympy.symbols('t')
-    avals, tvals, subtracted = [], [], [f]
+
+def Newton_polynomial_interpolation(f, prime, seed=0, verbose=False, as_nested_sum=False, as_expr=True, as_native=False,
+                                    catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, executor=None, batch_size=None, probe_store=None,
+                                    degree_bound=None, padic_digits=None, ):
+    """Univariate polynomial interpolation of f(t), samples taken modulo prime. See arXiv:1608.01902 section 3.2
+    The Newton coefficients are computed incrementally by NewtonDividedDifferences. If as_native is True returns a FFPoly.
+    With a concurrent.futures executor, batches of samples are evaluated speculatively in parallel (see black_box_samples).
+    With a degree_bound (e.g. from probe_degrees) interpolation stops after degree_bound + 1 samples, without termination check.
+    With padic_digits, f is sampled at PAdic points with that many digits and the coefficients (constant term first) are returned
+    as a list of PAdic, to be passed to rationalise; precision is tracked through PAdicDividedDifferences."""
+    if probe_store is not None:
+        if padic_digits is not None:
+            raise ValueError("A probe_store caches samples mod prime, it cannot be combined with padic_digits.")
+        f = probe_store.cached(f, prime, seed)
+    add, avals, tvals = _Newton_sample_consumer(prime, degree_bound, padic_digits)
     skips = 0
+    samples = black_box_samples(f, _sample_points(prime, seed, padic_digits), catch_errors, executor, batch_size)
+    run = _telemetry_start("Newton_polynomial_interpolation")
+    try:
+        for tval, fval, error in samples:
+            if verbose:
+                print(f"\r@ {len(avals)} samples", end="")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, "Newton_polynomial_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        samples.close()
+        _telemetry_finish(run)
+    if padic_digits is not None:
+        return _assembled(run, lambda: _padic_from_Newton(avals[:-2], tvals[:-2]))
+    return _assembled(run, lambda: _Newton_result(avals, tvals, prime, verbose, as_nested_sum, as_expr, as_native))
 
-    def fsubtracted(i, t):
-        return (subtracted[i - 1](t) - avals[i - 1]) / (t - tvals[i - 1])
 
-    while avals[-2:] != [0, 0]:
-        if verbose:
-            print(f"\r@ {len(avals)}, {avals}", end="")
-        tvals += [next(t_sequence_generator)]
-        try:
-            avals += [subtracted[-1](tvals[-1])]
-        except catch_errors as error:
+async def async_Newton_polynomial_interpolation(f, prime, seed=0, verbose=False, as_nested_sum=False, as_expr=True, as_native=False,
+                                                catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, max_in_flight=1, ):
+    """Coroutine version of Newton_polynomial_interpolation for a coroutine function f, with up to max_in_flight evaluations awaited concurrently."""
+    add, avals, tvals = _Newton_sample_consumer(prime)
+    skips = 0
+    samples = async_black_box_samples(f, FFSequenceGenerator(prime, seed), catch_errors, max_in_flight)
+    run = _telemetry_start("async_Newton_polynomial_interpolation")
+    try:
+        async for tval, fval, error in samples:
             if verbose:
-                print(f"\n[Newton_polynomial_interpolation] Caught {type(error).__name__} - skipping sample.", end=" ")
-            tvals = tvals[:-1]
-            skips += 1
-            if skips >= max_skips:
-                raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips; check t-sequence / interpolation.")
-            continue
-        else:
-            fsubtracted_partial = functools.partial(fsubtracted, len(avals))
-            subtracted += [fsubtracted_partial]
+                print(f"\r@ {len(avals)} samples", end="")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, "Newton_polynomial_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        await samples.aclose()
+        _telemetry_finish(run)
+    return _assembled(run, lambda: _Newton_result(avals, tvals, prime, verbose, as_nested_sum, as_expr, as_native))
+
+
+def _Newton_sample_consumer(prime, degree_bound=None, padic_digits=None):
+    """Returns add(tval, fval), updating the returned lists of Newton coefficients and sample points.
+    Raises InterpolationFinished once the last two coefficients vanish, or once there are degree_bound + 1 of them
+    (then followed by two zeros, as after a termination check). With padic_digits the coefficients are PAdic."""
+    if padic_digits is None:
+        divided_differences, zero = NewtonDividedDifferences(prime), ModP(0, prime)
+    else:
+        divided_differences, zero = PAdicDividedDifferences(prime, padic_digits), PAdic(0, prime, padic_digits)
+    avals, tvals = [], []
+
+    def add(tval, fval):
+        avals.append(divided_differences.add(tval, fval))
+        tvals.append(tval)
+        if avals[-2:] == [0, 0]:
+            raise InterpolationFinished
+        if degree_bound is not None and len(avals) == degree_bound + 1:
+            avals.extend([zero] * 2)
+            tvals.extend([tval] * 2)
+            raise InterpolationFinished
+
+    return add, avals, tvals
+
+
+def _Newton_result(avals, tvals, prime, verbose, as_nested_sum, as_expr, as_native):
+    t = sympy.symbols('t')
     if verbose:
         print(f"\r[Newton_polynomial_interpolation] Finished after {len(avals)} samples: {avals}.", end=" ")
     if as_nested_sum:
@@ -46,57 +110,132 @@ def Newton_polynomial_interpolation(f, prime, seed=0, verbose=False, as_nested_s
         if verbose:
             print(f"\nNested sum representation: {tpoly}")
         return eval(tpoly)
-    FFGF = sympy.GF(prime).frac_field(t)
-    tpoly = FFGF(0)
-    for aval, tval in zip(avals[:-2][::-1], tvals[:-2][::-1]):
-        tpoly = int(aval) + (FFGF(t) - int(tval)) * tpoly
+    tpoly = FFPoly.from_Newton(avals[:-2], tvals[:-2], prime)
+    if as_native:
+        return tpoly
     if as_expr:
         return tpoly.as_expr()
-    return tpoly
+    return sympy.GF(prime).frac_field(t)(tpoly.as_expr())
 
 
-def Thiele_rational_interpolation(f, prime, as_continued_fraction=False, seed=0, verbose=False, as_expr=True,
-                                  catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, ):
-    """Univariate rational interpolation of f(t), samples taken modulo prime. See arXiv:1608.01902 section 3.3"""
-    class InterpolationFinished(Exception):
-        pass
+def Thiele_rational_interpolation(f, prime, as_continued_fraction=False, seed=0, verbose=False, as_expr=True, as_native=False,
+                                  catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, executor=None, batch_size=None, probe_store=None,
+                                  method="Thiele", degree_bounds=None, padic_digits=None, ):
+    """Univariate rational interpolation of f(t), samples taken modulo prime. See arXiv:1608.01902 section 3.3
+    If as_native is True returns a FFRational.
+    With a concurrent.futures executor, batches of samples are evaluated speculatively in parallel (see black_box_samples).
+    With method="Pade" the reconstruction is delegated to Pade_rational_interpolation (no continued fraction representation).
+    With degree_bounds (n, m) of numerator and denominator (e.g. from probe_degrees) interpolation stops after max(2 n, 2 m + 1)
+    samples, the length of a continued fraction of that type, without termination check (method="Thiele" only).
+    With padic_digits, f is sampled at PAdic points with that many digits and (numerator, denominator) lists of PAdic coefficients
+    (constant term first, monic denominator) are returned, to be passed to rationalise; see PAdicThieleInverseDifferences."""
+    if padic_digits is not None and (method != "Thiele" or as_continued_fraction or probe_store is not None):
+        raise ValueError("padic_digits requires method='Thiele', without continued fraction representation or probe_store.")
+    if method == "Pade":
+        if as_continued_fraction:
+            raise ValueError("The continued fraction representation is only available with method='Thiele'.")
+        if degree_bounds is not None:
+            raise ValueError("degree_bounds are only supported with method='Thiele'.")
+        return Pade_rational_interpolation(f, prime, seed=seed, verbose=verbose, as_expr=as_expr, as_native=as_native, catch_errors=catch_errors,
+                                           max_skips=max_skips, executor=executor, batch_size=batch_size, probe_store=probe_store)
+    elif method != "Thiele":
+        raise ValueError(f"Unknown rational interpolation method {method}, expected 'Thiele' or 'Pade'.")
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    inverse_differences = ThieleInverseDifferences(prime) if padic_digits is None else PAdicThieleInverseDifferences(prime, padic_digits)
+    avals = inverse_differences.avals
+    length = None if degree_bounds is None else max(2 * degree_bounds[0], 2 * degree_bounds[1] + 1)
 
-    def is_zero(value):
-        return (numpy.isscalar(value) and value == 0) or numpy.all(value == 0)
+    def add(tval, fval):
+        inverse_differences.add(tval, fval)
+        if len(avals) == length:
+            raise InterpolationFinished
 
-    t_sequence_generator = FFSequenceGenerator(prime, seed)
-    t = sympy.symbols('t')
-    avals, tvals, subtracted = [], [], [f]
     skips = 0
+    samples = black_box_samples(f, _sample_points(prime, seed, padic_digits), catch_errors, executor, batch_size)
+    run = _telemetry_start("Thiele_rational_interpolation")
+    try:
+        for tval, fval, error in samples:
+            if verbose:
+                print(f"\r@ {len(avals)} samples", end="")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, "Thiele_rational_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        samples.close()
+        _telemetry_finish(run)
+    if padic_digits is not None:
+        return _assembled(run, lambda: _padic_rational_from_Thiele(avals, inverse_differences.tvals, prime, padic_digits))
+    return _assembled(run, lambda: _Thiele_result(inverse_differences, verbose, as_continued_fraction, as_expr, as_native))
 
-    def fsubtracted(i, t):
-        denom = subtracted[i - 1](t) - avals[i - 1]
-        if is_zero(denom):
-            raise InterpolationFinished
-        return (t - tvals[i - 1]) / denom
 
-    while True:
-        if verbose:
-            print(f"\r@ {len(avals)}, {avals}", end="")
+def Pade_rational_interpolation(f, prime, seed=0, verbose=False, as_expr=True, as_native=False,
+                                catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, executor=None, batch_size=None, probe_store=None, ):
+    """Univariate rational interpolation of f(t), samples taken modulo prime, as Newton interpolation followed by rational
+    reconstruction of the interpolating polynomial modulo prod_i (t - t_i) (see rational_reconstruction).
+    Samples cost a single inversion each; reconstruction is attempted after every sample up to 32 samples, then after
+    every n / 16 new samples, and terminates as soon as the reconstruction reproduces at least one extra sample.
+    Same sampling, error handling and output options as Thiele_rational_interpolation."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    divided_differences = NewtonDividedDifferences(prime)
+    interpolant, modulus = FFPoly([], prime), FFPoly([1], prime)
+    reconstructed, last_attempt = [], 0
 
-        tval = next(t_sequence_generator)
+    def add(tval, fval):
+        nonlocal interpolant, modulus, last_attempt
+        aval = divided_differences.add(tval, fval)
+        interpolant, modulus = interpolant + modulus * int(aval), modulus * FFPoly([-int(tval), 1], prime)
+        if modulus.degree - last_attempt >= max(1, modulus.degree // 16 if modulus.degree > 32 else 1):
+            last_attempt = modulus.degree
+            candidate = rational_reconstruction(interpolant, modulus)
+            if candidate is not None:
+                reconstructed.append(candidate)
+                raise InterpolationFinished
 
-        try:
-            aval = subtracted[-1](tval)
-        except InterpolationFinished:
-            break
-        except catch_errors as error:
-            skips += 1
+    skips = 0
+    samples = black_box_samples(f, FFSequenceGenerator(prime, seed), catch_errors, executor, batch_size)
+    run = _telemetry_start("Pade_rational_interpolation")
+    try:
+        for tval, fval, error in samples:
             if verbose:
-                print(f"\n[Thiele_rational_interpolation] Caught {type(error).__name__} - skipping sample.", end=" ")
-            if skips >= max_skips:
-                raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips; check t-sequence / interpolation.") from error
-            continue
+                print(f"\r@ {modulus.degree} samples", end="")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, "Pade_rational_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        samples.close()
+        _telemetry_finish(run)
+    if verbose:
+        print(f"\r[Pade_rational_interpolation] Finished after {modulus.degree} samples.", end=" ")
+    result = reconstructed[0]
+    return _assembled(run, lambda: result if as_native else result.as_expr() if as_expr else result.as_frac_field())
 
-        tvals.append(tval)
-        avals.append(aval)
-        subtracted.append(functools.partial(fsubtracted, len(avals)))
 
+async def async_Thiele_rational_interpolation(f, prime, as_continued_fraction=False, seed=0, verbose=False, as_expr=True, as_native=False,
+                                              catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, max_in_flight=1, ):
+    """Coroutine version of Thiele_rational_interpolation for a coroutine function f, with up to max_in_flight evaluations awaited concurrently."""
+    inverse_differences = ThieleInverseDifferences(prime)
+    avals = inverse_differences.avals
+    skips = 0
+    samples = async_black_box_samples(f, FFSequenceGenerator(prime, seed), catch_errors, max_in_flight)
+    run = _telemetry_start("async_Thiele_rational_interpolation")
+    try:
+        async for tval, fval, error in samples:
+            if verbose:
+                print(f"\r@ {len(avals)} samples", end="")
+            skips = _consume_sample(inverse_differences.add, tval, fval, error, catch_errors, skips, max_skips, verbose, "Thiele_rational_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        await samples.aclose()
+        _telemetry_finish(run)
+    return _assembled(run, lambda: _Thiele_result(inverse_differences, verbose, as_continued_fraction, as_expr, as_native))
+
+
+def _Thiele_result(inverse_differences, verbose, as_continued_fraction, as_expr, as_native):
+    t = sympy.symbols('t')  # noqa, used in eval
+    avals, tvals, prime = inverse_differences.avals, inverse_differences.tvals, inverse_differences.prime
     if verbose:
         print(f"\r[Thiele_rational_interpolation] Finished after {len(avals)} samples: {avals}.", end=" ")
 
@@ -110,90 +249,1100 @@ def Thiele_rational_interpolation(f, prime, as_continued_fraction=False, seed=0,
     if len(avals) == 0:
         return sympy.oo
 
-    FFGF = sympy.GF(prime).frac_field(t)
-    tpoly = FFGF(int(avals[-1]))
-
-    for aval, tval in zip(avals[-2::-1], tvals[-2::-1]):
-        tpoly = int(aval) + (FFGF(t) - int(tval)) / tpoly
+    tpoly = Thiele_continued_fraction_to_FFRational(avals, tvals, prime)
 
+    if as_native:
+        return tpoly
     if as_expr:
         return tpoly.as_expr()
-    return tpoly
+    return tpoly.as_frac_field()
 
 
-def multivariate_Newton_polynomial_interpolation(f, prime, seed=0, depth=0, verbose=False):
-    """Recursive multivariate polynomial interpolation of f(ts), samples taken modulo prime."""
+def _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, caller):
+    """Feeds the sample to add, returning the updated number of skips. Errors in catch_errors, raised either by the black box
+    or by add, skip the sample; after max_skips skips a RuntimeError is raised. Reported to the current InterpolationTelemetry run, if any."""
+    run = _current_run.get()
+    if run is not None:
+        start = time.perf_counter()
+    try:
+        if error is None:
+            try:
+                add(tval, fval)
+                return skips
+            except catch_errors as caught_error:
+                error = caught_error
+        if verbose:
+            print(f"\n[{caller}] Caught {type(error).__name__} - skipping sample.", end=" ")
+        skips += 1
+        if skips >= max_skips:
+            raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips; check t-sequence / interpolation.") from error
+        return skips
+    finally:
+        if run is not None:
+            run[0].sample(run[1], time.perf_counter() - start, error)
+
+
+def vec_Newton_polynomial_interpolation(f, prime, seed=0, verbose=False, as_expr=True, as_native=False,
+                                        catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, executor=None, batch_size=None, probe_store=None,
+                                        degree_bound=None, ):
+    """Polynomial interpolation of each component of an array-valued f(t), from one shared sequence of samples.
+    Each component terminates independently and then drops out of the divided-difference arithmetic, which is vectorized
+    over the remaining components. Returns an object array with the shape of f(t), of FFPoly if as_native else sympy expressions.
+    With a degree_bound on all components, the components left after degree_bound + 1 samples are assembled without termination check."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    state = _VectorSamples(prime)
+
+    def add(tval, fval):
+        fvals = state.residues(fval)
+        tval = int(tval) % prime
+        if len(state.tvals) == 0:
+            avals = fvals
+        else:
+            prefix = cumprod_mod(tval - state.tvals, prime)
+            if prefix[-1] == 0:
+                raise ZeroDivisionError(f"Repeated sample point {tval} in Newton interpolation mod {prime}.")
+            newton_form = (state.avals[0] + numpy.sum(state.avals[1:] * prefix[:-1, None] % prime, axis=0)) % prime
+            avals = (fvals - newton_form) * pow(int(prefix[-1]), -1, prime) % prime
+        state.append(tval, avals)
+        if len(state.tvals) >= 2:
+            state.finish(numpy.all(state.avals[-2:] == 0, axis=0), lambda avals, tvals: FFPoly.from_Newton(avals[:-2], tvals[:-2], prime))
+        if degree_bound is not None and len(state.tvals) == degree_bound + 1:
+            state.finish(numpy.ones(len(state.active), dtype=bool), lambda avals, tvals: FFPoly.from_Newton(avals, tvals, prime))
+
+    run = _vec_interpolation_loop(f, prime, seed, add, state, verbose, catch_errors, max_skips, executor, batch_size, "vec_Newton_polynomial_interpolation")
+    return _assembled(run, lambda: state.results(
+        lambda poly: poly if as_native else poly.as_expr() if as_expr else sympy.GF(prime).frac_field(sympy.symbols('t'))(poly.as_expr())))
+
+
+def vec_Thiele_rational_interpolation(f, prime, seed=0, verbose=False, as_expr=True, as_native=False,
+                                      catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, executor=None, batch_size=None, probe_store=None, ):
+    """Rational interpolation of each component of an array-valued f(t), from one shared sequence of samples.
+    Each component terminates independently and then drops out of the inverse-difference arithmetic, which is vectorized
+    over the remaining components (one modular inversion per level). Returns an object array with the shape of f(t),
+    of FFRational if as_native else sympy expressions (frac field elements if as_expr is False)."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    state = _VectorSamples(prime)
+
+    def add(tval, fval):
+        rho = state.residues(fval)
+        tval = int(tval) % prime
+        alive = numpy.ones(len(rho), dtype=bool)
+        for t_i, a_i in zip(state.tvals, state.avals):
+            denom = (rho - a_i) % prime
+            alive &= denom != 0
+            denom[~alive] = 1
+            rho = (tval - int(t_i)) * inverse_mod(denom, prime) % prime
+        state.finish(~alive, lambda avals, tvals: Thiele_continued_fraction_to_FFRational(avals, tvals, prime))
+        state.append(tval, rho[alive])
+
+    run = _vec_interpolation_loop(f, prime, seed, add, state, verbose, catch_errors, max_skips, executor, batch_size, "vec_Thiele_rational_interpolation")
+    return _assembled(run, lambda: state.results(lambda rational: rational if as_native else rational.as_expr() if as_expr else rational.as_frac_field()))
 
-    # End of recursion condition: univariate function
-    function_signature = inspect.signature(f)
-    num_args = len(function_signature.parameters)
-    if num_args == 1:
-        tpoly = Newton_polynomial_interpolation(f, prime, seed=seed + depth, verbose=verbose)
-        tpoly = tpoly.subs({'t': 't1', })
-        return tpoly
 
-    t_sequence_generator = FFSequenceGenerator(prime, seed=seed + depth)  # do not use same sequence for all variables!!!
-    avals, tvals, subtracted = [], [], [f]
+class _VectorSamples(object):
+    """Shared sample points and per-component coefficients (rows: samples, columns: components still being interpolated)."""
 
-    dynamic_fsubtracted_string = f"""def fsubtracted(i, {''.join([f't{i}, ' for i in range(1, num_args + 1)])}):
-    return (subtracted[i - 1]({''.join([f't{i}, ' for i in range(1, num_args + 1)])}) - \
-    ModP(int(avals[i - 1]({''.join([f'int(t{i}), ' for i in range(2, num_args + 1)])})), {prime})) / (t1 - tvals[i - 1])
-    """
-    local_dict = {'ModP': ModP, 'subtracted': subtracted, 'avals': avals, 'tvals': tvals}  # Include any necessary objects in the local dictionary
-    exec(dynamic_fsubtracted_string, local_dict)
-    fsubtracted = local_dict['fsubtracted']
+    def __init__(self, prime):
+        self.prime = prime
+        self.tvals = numpy.zeros(0, dtype=ff_dtype(prime))
+        self.avals, self.active, self.shape, self.finished = None, None, None, {}
+
+    def residues(self, fval):
+        """Residues of the components still being interpolated, as a native integer array."""
+        fval = numpy.asarray(fval, dtype=object)
+        if self.shape is None:
+            self.shape, self.active = fval.shape, numpy.arange(fval.size)
+            self.avals = numpy.zeros((0, fval.size), dtype=ff_dtype(self.prime))
+        elif fval.shape != self.shape:
+            raise ValueError(f"Inconsistent shape of black-box output: {fval.shape} vs {self.shape}.")
+        return numpy.array([to_residue(entry, self.prime) for entry in fval.ravel()[self.active]], dtype=ff_dtype(self.prime))
+
+    def append(self, tval, avals):
+        self.tvals = numpy.append(self.tvals, numpy.array([tval], dtype=self.tvals.dtype))
+        self.avals = numpy.vstack([self.avals, avals[None, :]])
+
+    def finish(self, mask, assemble):
+        """Assembles the components selected by mask from their coefficients and stops interpolating them."""
+        for column in numpy.nonzero(mask)[0]:
+            self.finished[int(self.active[column])] = assemble(list(self.avals[:, column]), list(self.tvals))
+        self.active, self.avals = self.active[~mask], self.avals[:, ~mask]
+        if len(self.active) == 0:
+            raise InterpolationFinished
+
+    def results(self, convert):
+        results = numpy.empty(len(self.finished), dtype=object)
+        for index, result in self.finished.items():
+            results[index] = convert(result)
+        return results.reshape(self.shape)
+
+
+def _vec_interpolation_loop(f, prime, seed, add, state, verbose, catch_errors, max_skips, executor, batch_size, caller):
+    """Feeds the samples to add until InterpolationFinished; returns the telemetry run (see _telemetry_start)."""
+    skips = 0
+    samples = black_box_samples(f, FFSequenceGenerator(prime, seed), catch_errors, executor, batch_size)
+    run = _telemetry_start(caller)
+    try:
+        for tval, fval, error in samples:
+            if verbose:
+                print(f"\r@ {len(state.tvals)} samples, {0 if state.active is None else len(state.active)} components left", end="")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, caller)
+    except InterpolationFinished:
+        pass
+    finally:
+        samples.close()
+        _telemetry_finish(run)
+    if verbose:
+        print(f"\r[{caller}] Finished after {len(state.tvals)} samples.", end=" ")
+    return run
+
+
+def Thiele_continued_fraction_to_FFRational(avals, tvals, prime, variable='t'):
+    """Numerator and denominator of a0 + (t - t0) / (a1 + (t - t1) / (a2 + ...)), assembled from the back with native polynomials."""
+    numerator, denominator = FFPoly([avals[-1]], prime, variable), FFPoly([1], prime, variable)
+    for aval, tval in zip(avals[-2::-1], tvals[-2::-1]):
+        numerator, denominator = numerator * int(aval) + denominator * FFPoly([-int(tval), 1], prime, variable), numerator
+    return FFRational(numerator, denominator)
+
+
+def _padic_from_Newton(avals, tvals):
+    """Monomial coefficients (constant term first) of the Newton form a0 + (t - t0) * (a1 + (t - t1) * (a2 + ...)), with generic arithmetic."""
+    coeffs = []
+    for aval, tval in zip(avals[::-1], tvals[::-1]):
+        coeffs = [aval - tval * coeffs[0] if coeffs else aval] + [coeffs[i - 1] - tval * coeffs[i] for i in range(1, len(coeffs))] + coeffs[-1:]
+    return coeffs
 
-    MAX_SAMPLES = 1000  # sets iteration limit
-    for counter in range(MAX_SAMPLES):
+
+def _padic_rational_from_Thiele(avals, tvals, prime, digits):
+    """Numerator and denominator coefficients (constant term first) of a0 + (t - t0) / (a1 + (t - t1) / (a2 + ...)), with generic
+    arithmetic. Coefficients vanishing at their precision are dropped from the top and the denominator is normalised to be monic."""
+    if len(avals) == 0:
+        raise ZeroDivisionError("Thiele interpolation finished without samples.")
+    numerator, denominator = [avals[-1]], [PAdic(1, prime, digits)]
+    for aval, tval in zip(avals[-2::-1], tvals[-2::-1]):
+        shifted = [-tval * coeff for coeff in denominator] + [PAdic(0, prime, digits)]
+        for i, coeff in enumerate(denominator):
+            shifted[i + 1] = shifted[i + 1] + coeff
+        for i, coeff in enumerate(numerator):
+            shifted[i] = shifted[i] + aval * coeff
+        numerator, denominator = shifted, numerator
+    numerator, denominator = [_padic_trimmed(coeffs) for coeffs in (numerator, denominator)]
+    normalisation = denominator[-1]
+    return [coeff / normalisation for coeff in numerator], [coeff / normalisation for coeff in denominator]
+
+
+def _padic_trimmed(coeffs):
+    while len(coeffs) > 1 and _padic_vanishes(coeffs[-1]):
+        coeffs = coeffs[:-1]
+    return coeffs
+
+
+def multivariate_Newton_polynomial_interpolation(f, prime, seed=0, depth=0, verbose=False, as_native=False, probe_store=None):
+    """Recursive multivariate polynomial interpolation of f(ts), samples taken modulo prime.
+    The Newton coefficients in t1 are the interpolations in the other variables of the divided differences of f at the samples of t1,
+    which are affine in f. The recursion thus follows a flat evaluation plan: a tuple of fixed coordinates, a scale and a native
+    correction polynomial in the remaining variables, so that every probe costs a call f(*fixed, t) and a univariate Horner evaluation.
+    Intermediate results are native FFSparsePoly; if as_native is True the result is returned as such."""
+    if probe_store is not None and depth == 0:
+        f = probe_store.cached(f, prime, seed)
+    variables = [f't{i}' for i in range(1, len(inspect.signature(f).parameters) + 1)]
+    tpoly = _multivariate_Newton(f, (), 1, FFSparsePoly({}, prime, variables), prime, seed, depth, verbose)
+    return tpoly if as_native else tpoly.as_expr()
+
+
+def _multivariate_Newton(f, fixed, scale, correction, prime, seed, depth, verbose):
+    """Interpolation of scale * f(*fixed, *ts) - correction(*ts) in the variables of correction. The Newton coefficient a_j of the first
+    of them is that of the slice at its sample t_j of the divided difference (((g - a_0) / (t_j - t_0) - a_1) / (t_j - t_1) ...),
+    with g the current function; it is obtained recursively with one more fixed coordinate, an updated scale and correction."""
+    variables = correction.variables
+    if len(variables) == 1:  # End of recursion condition: univariate function
+        correction = correction.to_FFPoly()
+        tpoly = Newton_polynomial_interpolation(lambda tval: scale * f(*fixed, tval) - correction(tval), prime, seed=seed + depth, verbose=verbose,
+                                                as_native=True)
+        return FFSparsePoly.from_FFPoly(tpoly, variables)
+
+    avals, tvals = [], []
+
+    def interpolated_slice(tval):
+        # weights[i] = prod_{k >= i} 1 / (t_j - t_k): the divided difference is weights[0] * g(t_j) - sum_i weights[i] * a_i
+        weights = list(map(int, cumprod_mod(inverse_mod([int(tval) - int(t_i) for t_i in tvals], prime)[::-1], prime)[::-1])) or [1]
+        terms = {}
+        for poly, weight in zip([correction.evaluate_first(tval)] + avals, weights[:1] + weights):
+            for exponents, coeff in poly.terms.items():
+                terms[exponents] = (terms.get(exponents, 0) + coeff * weight) % prime
+        slice_correction = FFSparsePoly(terms, prime, variables[1:])
+        return _multivariate_Newton(f, fixed + (tval, ), scale * weights[0] % prime, slice_correction, prime, seed, depth + 1, verbose)
+
+    def add(tval, fval):
+        avals.append(fval)
+        tvals.append(tval)
         if avals[-2:] == [0, 0]:
+            raise InterpolationFinished
+        if len(avals) >= max_multivariate_samples:
+            raise RuntimeError(f"Multivariate Newton interpolation did not terminate after {len(avals)} samples at depth {depth}; is f a polynomial?")
+
+    samples = black_box_samples(interpolated_slice, FFSequenceGenerator(prime, seed=seed + depth))  # do not use same sequence for all variables!!!
+    run = _telemetry_start("multivariate_Newton_polynomial_interpolation")
+    try:
+        for tval, fval, error in samples:
+            if verbose:
+                print(f"[multivariate Newton poly interpolation] @ depth: {depth} - samples: {len(avals)}", end="\n")
+            _consume_sample(add, tval, fval, error, (), 0, 1, verbose, "multivariate_Newton_polynomial_interpolation")
+    except InterpolationFinished:
+        pass
+    finally:
+        samples.close()
+        _telemetry_finish(run)
+
+    if verbose:
+        print(f"\n[multivariate Newton poly interpolation] Finished after {len(avals)} samples: {avals}.", end="\n")
+
+    def assemble():
+        t1 = FFSparsePoly({(1, ) + (0, ) * (len(variables) - 1): 1}, prime, variables)
+        tpoly = FFSparsePoly({}, prime, variables)
+        for aval, tval in zip(avals[:-2][::-1], tvals[:-2][::-1]):
+            tpoly = aval.prepend_variable(variables[0]) + (t1 - tval) * tpoly
+        return tpoly
+
+    return _assembled(run, assemble)
+
+
+def sparse_multivariate_polynomial_interpolation(f, prime, seed=0, verbose=False, as_native=False, executor=None,
+                                                 catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, nvars=None, probe_store=None,
+                                                 degree_bounds=None, ):
+    """Sparse multivariate polynomial interpolation of f(t1, ..., tn), samples taken modulo prime, following Zippel's algorithm.
+    Variables are added one at a time, the later ones being fixed at random anchor values. With T monomials found so far,
+    their coefficients are univariate polynomials in the new variable, reconstructed by vec_Newton_polynomial_interpolation
+    (each component terminating on its own degree); each of its samples costs T probes at geometric points, solving a Vandermonde system.
+    The number of probes is O(n * d * T) instead of O(d ^ n). The algorithm is probabilistic: an unlucky anchor may cancel
+    a term, with probability O(n * d * T / prime). Probes for one sample are evaluated as a batch, on executor if given.
+    The number of variables is inferred from the signature of f, unless nvars is given. Optional degree_bounds, one per variable
+    (e.g. from probe_degrees), replace the termination checks of the univariate interpolations."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    num_args = len(inspect.signature(f).parameters) if nvars is None else nvars
+    degree_bounds = [None] * num_args if degree_bounds is None else degree_bounds
+    variables = [f't{i}' for i in range(1, num_args + 1)]
+    t_sequence_generator = FFSequenceGenerator(prime, seed=(seed, "anchors"))  # independent of the t-sequences of the univariate interpolations
+    anchors = [next(t_sequence_generator) for i in range(num_args)]
+
+    univariate = Newton_polynomial_interpolation(lambda t1: f(t1, *anchors[1:]), prime, seed=seed, verbose=verbose, as_native=True,
+                                                 catch_errors=catch_errors, max_skips=max_skips, degree_bound=degree_bounds[0])
+    terms = {(exponent, ): int(coeff) for exponent, coeff in enumerate(univariate.coeffs) if coeff != 0}
+
+    for k in range(1, num_args):
+        if len(terms) == 0:
             break
+        support = list(terms.keys())
+        monomial_values, points = _geometric_probe_points(support, prime, t_sequence_generator)
         if verbose:
-            if depth != 0:
-                print()
-            print(f"[multivariate Newton poly interpolation] @ depth: {depth} - samples: {len(avals)}, {(avals, tvals)}", end="\n")
-        tvals += [next(t_sequence_generator)]
-        local_dict = {'ModP': ModP, 'subtracted': subtracted}  # Include any necessary objects in the local dictionary
-        function_string = f"""def rest_function({''.join([f't{i}, ' for i in range(2, num_args + 1)])}):
-        return subtracted[-1](ModP('{tvals[-1]}'), {''.join([f't{i}, ' for i in range(2, num_args + 1)])})"""
-        exec(function_string, local_dict)
-        rest_function = local_dict['rest_function']
-        avals += [multivariate_Newton_polynomial_interpolation(rest_function, prime, seed=seed, depth=depth + 1, verbose=verbose)]
-        avals[-1] = avals[-1].subs({f't{i}': f't{i + 1}' for i in range(1, num_args)}, simultaneous=True)
-        avals[-1] = sympy.poly(avals[-1], sympy.symbols([f't{i + 1}' for i in range(1, num_args)]), modulus=prime)
-        fsubtracted_partial = functools.partial(fsubtracted, len(avals))
-        subtracted += [fsubtracted_partial]
+            print(f"\r[sparse multivariate interpolation] adding t{k + 1}: {len(support)} terms in {variables[:k]}", end="")
+
+        def coefficients(tk):
+            probes = [point + (tk, ) + tuple(anchors[k + 1:]) for point in points]
+            return _solve_geometric_probes(monomial_values, evaluate_black_box(f, probes, executor), prime)
 
+        polys = vec_Newton_polynomial_interpolation(coefficients, prime, seed=seed + k, as_native=True, catch_errors=catch_errors, max_skips=max_skips,
+                                                    degree_bound=degree_bounds[k])
+        terms = {monomial + (exponent, ): int(coeff) for monomial, poly in zip(support, polys)
+                 for exponent, coeff in enumerate(poly.coeffs) if coeff != 0}
+
+    tpoly = FFSparsePoly(terms, prime, variables)
+    return tpoly if as_native else tpoly.as_expr()
+
+
+def known_support_polynomial_interpolation(f, support, prime, seed=0, as_native=False, executor=None,
+                                           catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, variables=None, ):
+    """Coefficients mod prime of the polynomial f(t1, ..., tn) with known monomial support (exponent tuples, e.g. from another prime
+    or an ansatz). The T probes are the powers y ^ j, 1 <= j <= T, of a random point y with distinct monomial values m_i = monomial_i(y),
+    so that the c_i m_i solve the transposed Vandermonde system sum_i c_i m_i ^ j = f(y ^ j) (solve_transposed_Vandermonde, O(T ^ 2)).
+    If a probe raises one of catch_errors, a new y is drawn, hence all new probes, at most max_skips times. Probes are evaluated as a batch, on executor if given."""
+    support = list(support)
+    if variables is None:
+        if len(support) == 0:
+            raise ValueError("The variables must be given for an empty support.")
+        variables = [f't{i}' for i in range(1, len(support[0]) + 1)]
+    if len(support) == 0:
+        tpoly = FFSparsePoly({}, prime, variables)
+        return tpoly if as_native else tpoly.as_expr()
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed)
+    for skips in range(max_skips + 1):
+        monomial_values, points = _geometric_probe_points(support, prime, t_sequence_generator)
+        try:
+            values = evaluate_black_box(f, points, executor)
+            break
+        except catch_errors as error:
+            if skips == max_skips:
+                raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips; check the support / black box.") from error
+    coefficients = _solve_geometric_probes(monomial_values, values, prime)
+    tpoly = FFSparsePoly(dict(zip(support, map(int, coefficients))), prime, variables)
+    return tpoly if as_native else tpoly.as_expr()
+
+
+def multivariate_rational_interpolation(f, prime, seed=0, verbose=False, as_native=False, with_calls=False,
+                                        catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, probe_store=None, degree_bounds=None, ):
+    """Multivariate rational interpolation of f(t1, ..., tn), samples taken modulo prime. See arXiv:1608.01902 section 3.4
+    With a random shift s, g(x) = f(x + s) is studied along the rays x = t * (1, z2, ..., zn): by homogeneity
+    g(t z) = sum_r n_r(z) t ^ r / (1 + sum_r d_r(z) t ^ r), with n_r, d_r homogeneous of degree r; the shift ensures the
+    denominator has a non-vanishing constant term. Each ray is reconstructed with Thiele_rational_interpolation, and each
+    coefficient n_r(1, z2, ..., zn), d_r(1, z2, ..., zn) with sparse_multivariate_polynomial_interpolation. Rays are cached,
+    so probes are shared by all coefficients; the coefficients of degree r are interpolated with degree bound r in each variable,
+    and the rays with the total degree_bounds (numerator, denominator) if given (e.g. from probe_degrees).
+    Returns a FFRational if as_native, else a sympy expression; if with_calls the total number of black-box calls is also returned."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    num_args = len(inspect.signature(f).parameters)
+    variables = [f't{i}' for i in range(1, num_args + 1)]
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed)
+    shifts = [next(t_sequence_generator) for i in range(num_args)]
+    calls, degrees = [0], []
+
+    def shifted_black_box(*xs):
+        calls[0] += 1
+        return f(*[x + shift for x, shift in zip(xs, shifts)])
+
+    @functools.lru_cache(maxsize=None)
+    def ray_coefficients(*zs):
+        ray = Thiele_rational_interpolation(lambda t: shifted_black_box(t, *[t * z for z in zs]), prime, seed=seed, as_native=True,
+                                            catch_errors=catch_errors, max_skips=max_skips, degree_bounds=degree_bounds).reduced()
+        numerator, denominator = list(ray.numerator.coeffs), list(ray.denominator.coeffs)
+        if denominator[0] == 0:
+            raise ZeroDivisionError("Denominator with vanishing constant term along the ray, the shift is unlucky.")
+        if degrees == []:
+            degrees.extend([len(numerator) - 1, len(denominator) - 1])
+        if len(numerator) - 1 > degrees[0] or len(denominator) - 1 > degrees[1]:
+            raise ValueError("Inconsistent degrees along rays, the first ray is unlucky.")
+        normalisation = pow(int(denominator[0]), -1, prime)
+        numerator = [int(coeff) * normalisation % prime for coeff in numerator] + [0] * (degrees[0] + 1 - len(numerator))
+        denominator = [int(coeff) * normalisation % prime for coeff in denominator] + [0] * (degrees[1] + 1 - len(denominator))
+        return tuple(numerator + denominator)
+
+    if num_args == 1:
+        coefficients = [FFSparsePoly({(): coeff}, prime, ()) for coeff in ray_coefficients()]
+    else:
+        ray_coefficients(*[next(t_sequence_generator) for i in range(num_args - 1)])  # fixes the degrees
+        coefficients = [sparse_multivariate_polynomial_interpolation(lambda *zs, index=index: ray_coefficients(*zs)[index], prime, seed=seed + 1,
+                                                                     verbose=verbose, as_native=True, catch_errors=catch_errors, max_skips=max_skips,
+                                                                     nvars=num_args - 1, degree_bounds=[_homogeneous_degree(index, degrees)] * (num_args - 1))
+                        for index in range(degrees[0] + degrees[1] + 2)]
+    numerator, denominator = FFSparsePoly({}, prime, variables), FFSparsePoly({}, prime, variables)
+    for index, coefficient in enumerate(coefficients):
+        degree = _homogeneous_degree(index, degrees)
+        homogeneous = FFSparsePoly({(degree - sum(exponents), ) + exponents: coeff for exponents, coeff in coefficient.terms.items()}, prime, variables)
+        if index <= degrees[0]:
+            numerator = numerator + homogeneous
+        else:
+            denominator = denominator + homogeneous
+    result = FFRational(numerator.translated([-shift for shift in shifts]), denominator.translated([-shift for shift in shifts])).reduced()
     if verbose:
-        print(f"\n[multivariate Newton poly interpolation] Finished after {len(avals)} samples: {avals}.", end="\n")
+        print(f"\n[multivariate rational interpolation] Finished after {calls[0]} black-box calls, {ray_coefficients.cache_info().currsize} rays.")
+    result = result if as_native else result.as_expr()
+    return (result, calls[0]) if with_calls else result
+
+
+DegreeBounds = collections.namedtuple("DegreeBounds", ["numerator", "denominator", "total", "probes"])
+DegreeBounds.__doc__ = """Per-variable degrees of numerator and denominator (tuples), total degrees (numerator, denominator) and black-box probes used."""
+
+
+def probe_degrees(f, nvars, prime, seed=0, verbose=False, executor=None, catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3,
+                  probe_store=None, ):
+    """Degrees of numerator and denominator of f(t1, ..., tn) over F_prime, per variable and in total, without interpolating f.
+    Univariate slices t -> f(a1, ..., t, ..., an), one per variable, and the line t -> f(a + t d) (total degrees) through a random point a
+    are reconstructed by Thiele interpolation on one shared sequence of t values: the probes of each t are evaluated as a batch
+    (on executor if given) and each line stops being probed as soon as it terminates. The degrees are exact with probability
+    1 - O(deg / prime) and bound those of f otherwise. Returns DegreeBounds, whose fields feed the degree_bounds options of
+    sparse_multivariate_polynomial_interpolation (numerator) and multivariate_rational_interpolation (total)."""
+    if probe_store is not None:
+        f = probe_store.cached(f, prime, seed)
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed)
+    anchors, direction = [next(t_sequence_generator) for i in range(nvars)], [next(t_sequence_generator) for i in range(nvars)]
+
+    def point(line, tval):
+        if line < nvars:
+            return tuple(anchors[:line]) + (tval, ) + tuple(anchors[line + 1:])
+        return tuple(anchor + tval * step for anchor, step in zip(anchors, direction))
+
+    inverse_differences = [ThieleInverseDifferences(prime) for line in range(nvars + 1)]
+    active, skips, probes = list(range(nvars + 1)), [0] * (nvars + 1), 0
+    run = _telemetry_start("probe_degrees")
+    try:
+        for tval in FFSequenceGenerator(prime, seed=seed + 1):
+            if len(active) == 0:
+                break
+            outcomes = _evaluate_catching(f, [point(line, tval) for line in active], catch_errors, executor)
+            probes += len(active)
+            for line, (fval, error) in zip(list(active), outcomes):
+                try:
+                    skips[line] = _consume_sample(inverse_differences[line].add, tval, fval, error, catch_errors, skips[line], max_skips, verbose, "probe_degrees")
+                except InterpolationFinished:
+                    active.remove(line)
+    finally:
+        _telemetry_finish(run)
+    degrees = []
+    for differences in inverse_differences:
+        rational = Thiele_continued_fraction_to_FFRational(differences.avals, differences.tvals, prime).reduced()
+        degrees += [(max(rational.numerator.degree, 0), rational.denominator.degree)]
+    bounds = DegreeBounds(tuple(degree[0] for degree in degrees[:-1]), tuple(degree[1] for degree in degrees[:-1]), degrees[-1], probes)
+    if verbose:
+        print(f"[probe_degrees] {bounds}")
+    return bounds
+
+
+def is_identically_zero(f, nvars, prime, degree_bound, confidence=1 - 2 ** -40, seed=0, padic_digits=None, executor=None, with_error_bound=False,
+                        catch_errors=(ZeroDivisionError, ), max_skips=3, verbose=False, ):
+    """Probabilistic test (Schwartz-Zippel) of whether f(t1, ..., tn) vanishes identically, e.g. f = g - h to test g == h.
+    A non-zero f whose numerator has total degree at most degree_bound vanishes at a random point of (F_prime^*)^n with
+    probability at most degree_bound / (prime - 1), hence f is evaluated at the fewest random points (from FFSequenceGenerator)
+    for the error probability to drop below 1 - confidence, returning False at the first non-zero value. With padic_digits,
+    the points are PAdic with that many digits and values are compared to zero at their precision (the bound holds for numerators
+    not divisible by prime ^ padic_digits). With a concurrent.futures executor all points are evaluated concurrently, pending ones
+    being cancelled on the first non-zero value. Points raising one of catch_errors (e.g. poles) are replaced, at most max_skips times.
+    If with_error_bound, also returns the bound on the probability that the answer is wrong (0 if False is returned)."""
+    if not 0 <= confidence < 1:
+        raise ValueError(f"Confidence {confidence} is not in [0, 1).")
+    error_per_point = degree_bound / (prime - 1)
+    if error_per_point >= 1:
+        raise ValueError(f"Degree bound {degree_bound} too large for a Schwartz-Zippel test mod {prime}.")
+    npoints = 1 if degree_bound == 0 else max(math.ceil(math.log(1 - confidence) / math.log(error_per_point)), 1)
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed)
 
-    FFGF = sympy.GF(prime).frac_field(*sympy.symbols([f't{i}' for i in range(1, num_args + 1)]))
-    tpoly = FFGF(0)
-    for i, (aval, tval) in enumerate(zip(avals[:-2][::-1], tvals[:-2][::-1])):
+    def random_point():
+        point = [next(t_sequence_generator) for i in range(nvars)]
+        return tuple(point) if padic_digits is None else tuple(PAdic(int(x), prime, padic_digits) for x in point)
+
+    def result(is_zero, zeros):
+        error_bound = error_per_point ** zeros if is_zero else 0
         if verbose:
-            print(f"\n[multivariate Newton poly interpolation] Assembling results at {i + 1}/{len(avals) - 2}", end="")
-        tpoly = FFGF(aval.as_expr()) + (FFGF(sympy.symbols('t1')) - int(tval)) * tpoly
-    return tpoly.as_expr()
+            print(f"[is_identically_zero] {'zero' if is_zero else 'non-zero'} after {zeros + (not is_zero)} points, error bound {error_bound:.3g}.")
+        return (is_zero, error_bound) if with_error_bound else is_zero
+
+    zeros, skips = 0, 0
+    if executor is None:
+        while zeros < npoints:
+            try:
+                value = f(*random_point())
+            except catch_errors as error:
+                skips += 1
+                if skips > max_skips:
+                    raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips in is_identically_zero.") from error
+                continue
+            if value != 0:
+                return result(False, zeros)
+            zeros += 1
+        return result(True, zeros)
+
+    pending = {executor.submit(f, *random_point()) for i in range(npoints)}
+    try:
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    value = future.result()
+                except catch_errors as error:
+                    skips += 1
+                    if skips > max_skips:
+                        raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips in is_identically_zero.") from error
+                    pending.add(executor.submit(f, *random_point()))
+                    continue
+                if value != 0:
+                    return result(False, zeros)
+                zeros += 1
+        return result(True, zeros)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _evaluate_catching(f, points, catch_errors, executor=None):
+    """Like evaluate_black_box, but returns pairs (value, error), errors in catch_errors being caught point by point."""
+    def evaluate(point):
+        try:
+            return f(*point), None
+        except catch_errors as error:
+            return None, error
+    return list(map(evaluate, points)) if executor is None else list(executor.map(evaluate, points))
+
+
+def _homogeneous_degree(index, degrees):
+    """Degree of the index-th ray coefficient, numerator coefficients (degrees[0] + 1 of them) followed by denominator ones."""
+    return index if index <= degrees[0] else index - degrees[0] - 1
+
+
+def multi_prime_interpolation(f, interpolator=multivariate_rational_interpolation, primes=primes, seed=0, verbose=False, with_calls=False,
+                              algorithm=LGRR, catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, probe_store=None, ):
+    """Interpolation of f over Q from its values modulo successive primes. f must accept ModP arguments of any prime.
+    The first prime is reconstructed with interpolator (any of the univariate or multivariate interpolators); the monomial
+    support found there is reused for further primes, which only solve a linear system for the coefficients (as many probes
+    as unknown coefficients). After each prime the coefficients are combined by Chinese remaindering and rationalised with
+    vec_chained_FF_rationalize; the result is returned, as a sympy expression, once it agrees with f at a random point
+    modulo the next (fresh) prime. If with_calls the total number of black-box calls is also returned (probes answered by probe_store excluded).
+    Validation and coefficient probes raising one of catch_errors are replaced by new random ones, a RuntimeError is raised after max_skips skips."""
+    calls = [0]
+
+    @functools.wraps(f)  # keeps the signature, inspected by the interpolators
+    def counted_black_box(*xs):
+        calls[0] += 1
+        return f(*xs)
+
+    result = interpolator(counted_black_box, primes[0], seed=seed, as_native=True, probe_store=probe_store)
+    numerator, denominator = _as_sparse_fraction(result)
+    numerator_support, denominator_support = list(numerator.terms), list(denominator.terms)
+    variables, nvars = numerator.variables, len(numerator.variables)
+    normalisation = max(denominator_support) if denominator_support != [(0, ) * nvars] else None
+    coefficients = [[numerator.terms.get(monomial, 0) for monomial in numerator_support] + [denominator.terms.get(monomial, 0) for monomial in denominator_support]]
+
+    for i, prime in enumerate(primes[1:], 1):
+        black_box = probe_store.cached(counted_black_box, prime, seed) if probe_store is not None else counted_black_box
+        tensors = [numpy.array(coeffs, dtype=object) for coeffs in coefficients]
+        rational_coefficients = vec_chained_FF_rationalize(tensors, primes[:i], algorithm=algorithm)
+        Q_numerator = sympy.Add(*[sympy.Rational(coeff.numerator, coeff.denominator) * _monomial_expr(monomial, variables)
+                                  for coeff, monomial in zip(rational_coefficients, numerator_support)])
+        Q_denominator = sympy.Add(*[sympy.Rational(coeff.numerator, coeff.denominator) * _monomial_expr(monomial, variables)
+                                    for coeff, monomial in zip(rational_coefficients[len(numerator_support):], denominator_support)])
+        if _validates(black_box, Q_numerator, Q_denominator, variables, prime, seed, catch_errors, max_skips):
+            if verbose:
+                print(f"[multi_prime_interpolation] Validated after {i} primes and {calls[0]} black-box calls.")
+            result = Q_numerator / Q_denominator
+            return (result, calls[0]) if with_calls else result
+        if verbose:
+            print(f"[multi_prime_interpolation] Result from {i} primes does not validate mod {prime}, solving for its coefficients.")
+        coefficients += [_solve_for_coefficients(black_box, numerator_support, denominator_support, normalisation, nvars, prime, seed, catch_errors, max_skips)]
+    raise RuntimeError(f"Multi-prime interpolation did not converge with {len(primes)} primes.")
+
+
+def _as_sparse_fraction(result):
+    """Numerator and denominator FFSparsePoly of an interpolation result, denominator monic (lex order)."""
+    if isinstance(result, FFRational):
+        result = result.reduced()
+        numerator, denominator = result.numerator, result.denominator
+    else:
+        numerator, denominator = result, result.constant(1)
+    if isinstance(numerator, FFPoly):
+        numerator, denominator = FFSparsePoly.from_FFPoly(numerator), FFSparsePoly.from_FFPoly(denominator)
+    return numerator, denominator
+
+
+def _monomial_expr(monomial, variables):
+    return sympy.Mul(*[sympy.Symbol(variable) ** exponent for variable, exponent in zip(variables, monomial)])
+
+
+def _monomial_value(monomial, point, prime):
+    return functools.reduce(lambda x, y: x * y % prime, [pow(int(x), exponent, prime) for x, exponent in zip(point, monomial)], 1)
+
+
+def _validates(f, numerator, denominator, variables, prime, seed, catch_errors, max_skips=3):
+    """Whether numerator / denominator over Q agrees with f at a random point modulo prime. Points raising one of catch_errors
+    are replaced; after max_skips skips a RuntimeError is raised."""
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed)
+    symbols = [sympy.Symbol(variable) for variable in variables]
+    skips = 0
+    while True:
+        point = [next(t_sequence_generator) for variable in variables]
+        substitution = dict(zip(symbols, [int(x) for x in point]))
+        try:
+            expected = f(*point)
+            return ModP(numerator.subs(substitution), prime) == expected * ModP(denominator.subs(substitution), prime)
+        except catch_errors as error:
+            skips += 1
+            if skips >= max_skips:
+                raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips in the validation mod {prime}.") from error
+
+
+def _solve_for_coefficients(f, numerator_support, denominator_support, normalisation, nvars, prime, seed, catch_errors, max_skips=3):
+    """Coefficients mod prime of the numerator and denominator with known supports, the normalisation monomial of the denominator
+    having coefficient one (the denominator is one for polynomials), from N(x) - f(x) D(x) = 0 at random points.
+    Points raising one of catch_errors are replaced; after max_skips skips a RuntimeError is raised."""
+    if normalisation is None:
+        numerator = known_support_polynomial_interpolation(f, numerator_support, prime, seed=seed + 1, as_native=True, catch_errors=catch_errors,
+                                                           max_skips=max_skips, variables=[f't{i}' for i in range(1, nvars + 1)])
+        return [numerator.terms.get(monomial, 0) for monomial in numerator_support] + [1]
+    unknowns = [monomial for monomial in denominator_support if monomial != normalisation]
+    t_sequence_generator = FFSequenceGenerator(prime, seed=seed + 1)
+    matrix, vector, skips = [], [], 0
+    while len(matrix) < len(numerator_support) + len(unknowns):
+        point = [next(t_sequence_generator) for i in range(nvars)]
+        try:
+            value = to_residue(f(*point), prime)
+        except catch_errors as error:
+            skips += 1
+            if skips >= max_skips:
+                raise RuntimeError(f"Too many ({max_skips}) {type(error).__name__} skips solving for the coefficients mod {prime}.") from error
+            continue
+        matrix += [[_monomial_value(monomial, point, prime) for monomial in numerator_support] +
+                   [- value * _monomial_value(monomial, point, prime) % prime for monomial in unknowns]]
+        vector += [value * (_monomial_value(normalisation, point, prime) if normalisation is not None else 1) % prime]
+    solution = [int(entry) for entry in _solve_linear_system(matrix, vector, prime)]
+    numerator_coefficients, denominator_coefficients = solution[:len(numerator_support)], dict(zip(unknowns, solution[len(numerator_support):]))
+    return numerator_coefficients + [denominator_coefficients.get(monomial, 1) for monomial in denominator_support]
+
+
+def evaluate_black_box(f, points, executor=None):
+    """Evaluates f at each point (a tuple of arguments), as a batch of concurrent calls if a concurrent.futures executor is given."""
+    if executor is None:
+        return [f(*point) for point in points]
+    return list(executor.map(f, *zip(*points)))
+
+
+def _geometric_probe_points(support, prime, t_sequence_generator):
+    """Values m_i of the monomials in support at a random point y, chosen such that they are distinct, and the T points y ^ j for 1 <= j <= T.
+    The exponents start at one so that no probe is the fixed point (1, ..., 1), where the black box may be singular."""
+    while True:
+        base = [next(t_sequence_generator) for i in range(len(support[0]))]
+        monomial_values = [functools.reduce(lambda x, y: x * y % prime, [pow(int(yi), e, prime) for yi, e in zip(base, monomial)], 1) for monomial in support]
+        if len(set(monomial_values)) == len(monomial_values):
+            break
+    points = [tuple(ModP(pow(int(yi), j, prime), prime) for yi in base) for j in range(1, len(support) + 1)]
+    return monomial_values, points
+
+
+def _solve_geometric_probes(monomial_values, values, prime):
+    """Coefficients c_i from the values sum_i c_i m_i ^ j at the probes of _geometric_probe_points: the transposed Vandermonde
+    system is solved for c_i m_i, then divided by the (non-zero) m_i."""
+    return solve_transposed_Vandermonde(monomial_values, [to_residue(value, prime) for value in values], prime) * inverse_mod(monomial_values, prime) % prime
+
+
+def _solve_linear_system(matrix, vector, prime):
+    """Solves matrix @ x = vector mod prime, for a square non-singular matrix, by Gaussian elimination on native integer arrays."""
+    size = len(vector)
+    augmented = numpy.array([[int(entry) % prime for entry in row] + [int(value) % prime] for row, value in zip(matrix, vector)],
+                            dtype=ff_dtype(prime)).reshape(size, size + 1)
+    for column in range(size):
+        pivots = numpy.nonzero(augmented[column:, column])[0]
+        if len(pivots) == 0:
+            raise ZeroDivisionError(f"Singular linear system mod {prime}.")
+        pivot = column + pivots[0]
+        augmented[[column, pivot]] = augmented[[pivot, column]]
+        augmented[column] = augmented[column] * pow(int(augmented[column, column]), -1, prime) % prime
+        factors = augmented[:, column].copy()
+        factors[column] = 0
+        augmented = (augmented - factors[:, None] * augmented[column][None, :] % prime) % prime
+    return augmented[:, -1]
+
+
+async def async_multivariate_Newton_polynomial_interpolation(f, prime, seed=0, depth=0, verbose=False, as_native=False,
+                                                             catch_errors=(ZeroDivisionError, AssertionError, RuntimeError), max_skips=3, max_in_flight=1, ):
+    """Coroutine version of multivariate_Newton_polynomial_interpolation for a coroutine function f.
+    Each sample in t1 is the interpolation of the slice f(t1, ...) in the remaining variables, and the Newton coefficients
+    are divided differences of these slices. Up to max_in_flight black-box evaluations are awaited concurrently in the
+    innermost variable, while slices are interpolated one after the other, so that no speculative slice is ever wasted."""
+    num_args = len(inspect.signature(f).parameters)
+    if num_args == 1:
+        tpoly = await async_Newton_polynomial_interpolation(f, prime, seed=seed + depth, verbose=verbose, as_native=True,
+                                                            catch_errors=catch_errors, max_skips=max_skips, max_in_flight=max_in_flight)
+        tpoly = FFSparsePoly.from_FFPoly(tpoly, ('t1', ))
+        return tpoly if as_native else tpoly.as_expr()
+
+    rest_variables = [f't{i}' for i in range(2, num_args + 1)]
+
+    async def interpolated_slice(tval):
+        rest = await async_multivariate_Newton_polynomial_interpolation(functools.partial(f, tval), prime, seed=seed, depth=depth + 1, verbose=verbose,
+                                                                        as_native=True, catch_errors=catch_errors, max_skips=max_skips,
+                                                                        max_in_flight=max_in_flight)
+        return rest.rename(rest_variables)
+
+    avals, tvals = [], []
+
+    def add(tval, fval):
+        aval = fval
+        for a_i, t_i in zip(avals, tvals):
+            aval = (aval - a_i) * (1 / (tval - t_i))
+        avals.append(aval)
+        tvals.append(tval)
+        if avals[-2:] == [0, 0]:
+            raise InterpolationFinished
+
+    skips = 0
+    samples = async_black_box_samples(interpolated_slice, FFSequenceGenerator(prime, seed=seed + depth), catch_errors, max_in_flight=1)
+    run = _telemetry_start("async_multivariate_Newton_polynomial_interpolation")
+    try:
+        async for tval, fval, error in samples:
+            if verbose:
+                print(f"[multivariate Newton poly interpolation] @ depth: {depth} - samples: {len(avals)}", end="\n")
+            skips = _consume_sample(add, tval, fval, error, catch_errors, skips, max_skips, verbose, "multivariate_Newton_polynomial_interpolation")
+            if len(avals) >= max_multivariate_samples:  # outside of add, whose RuntimeErrors are caught by default
+                raise RuntimeError(f"Multivariate Newton interpolation did not terminate after {len(avals)} samples at depth {depth}; is f a polynomial?")
+    except InterpolationFinished:
+        pass
+    finally:
+        await samples.aclose()
+        _telemetry_finish(run)
+
+    def assemble():
+        variables = [f't{i}' for i in range(1, num_args + 1)]
+        t1 = FFSparsePoly({(1, ) + (0, ) * (num_args - 1): 1}, prime, variables)
+        tpoly = FFSparsePoly({}, prime, variables)
+        for aval, tval in zip(avals[:-2][::-1], tvals[:-2][::-1]):
+            tpoly = aval.prepend_variable('t1') + (t1 - tval) * tpoly
+        return tpoly if as_native else tpoly.as_expr()
+
+    return _assembled(run, assemble)
+
+
+interpolation_telemetry = None  # active InterpolationTelemetry context, if any
+_current_run = contextvars.ContextVar("interpolation_run", default=None)  # innermost open (telemetry, run) of this thread or task
+
+
+class InterpolationTelemetry(object):
+
+    """Opt-in structured instrumentation of interpolation runs, used as a context manager:
+
+        with InterpolationTelemetry() as telemetry:
+            ...
+        print(telemetry.summary())
+
+    Each run of an interpolator reports events, dicts with keys "event", "caller" and "depth" (number of enclosing runs,
+    e.g. the recursion depth in multivariate_Newton_polynomial_interpolation), and moreover
+        "sample": "index", "wall_time" (seconds waited for the black box), "reconstruction_time" (updating the interpolant),
+                  "error" (type name of the error of a skipped sample, else None);
+        "finished": "samples", "skips", "black_box_time", "reconstruction_time" and "seconds" (totals of the sampling loop);
+        "stage": "stage" (e.g. "assembly" of the result) and "seconds".
+    Events are appended to events and passed to callback as they happen. Nested contexts also report to the enclosing ones.
+    Samples are credited to the innermost run open in the current thread or asyncio task (a context variable), so that
+    concurrent runs, e.g. async interpolators under asyncio.gather, are told apart.
+    When no run is open the cost is a single context variable lookup per sample, and nothing is formatted."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.parent = None
+        self.reset()
+
+    def reset(self):
+        self.events = []
+        self.runs = []
+
+    def __enter__(self):
+        global interpolation_telemetry
+        self.parent, interpolation_telemetry = interpolation_telemetry, self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global interpolation_telemetry
+        interpolation_telemetry, self.parent = self.parent, None
+
+    def record(self, event):
+        self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+        if self.parent is not None:
+            self.parent.record(event)
+
+    def start(self, caller, depth=0):
+        run = {"caller": caller, "depth": depth, "samples": 0, "skips": 0, "black_box_time": 0., "reconstruction_time": 0.,
+               "wall_time": None, "start": time.perf_counter()}
+        self.runs.append(run)
+        return run
+
+    def evaluated(self, run, wall_time):
+        run["wall_time"] = wall_time
+
+    def sample(self, run, reconstruction_time, error):
+        wall_time, run["wall_time"] = run["wall_time"], None
+        run["samples"] += 1
+        run["skips"] += error is not None
+        run["black_box_time"] += wall_time or 0.
+        run["reconstruction_time"] += reconstruction_time
+        self.record({"event": "sample", "caller": run["caller"], "depth": run["depth"], "index": run["samples"] - 1, "wall_time": wall_time,
+                     "reconstruction_time": reconstruction_time, "error": None if error is None else type(error).__name__})
+
+    def finish(self, run):
+        self.runs.remove(run)
+        self.record({"event": "finished", "caller": run["caller"], "depth": run["depth"], "samples": run["samples"], "skips": run["skips"],
+                     "black_box_time": run["black_box_time"], "reconstruction_time": run["reconstruction_time"],
+                     "seconds": time.perf_counter() - run["start"]})
+
+    def stage(self, run, stage, seconds):
+        self.record({"event": "stage", "caller": run["caller"], "depth": run["depth"], "stage": stage, "seconds": seconds})
+
+    def totals(self):
+        """Per interpolator: number of runs, maximum depth, samples, skips and times of the finished runs, and seconds per stage."""
+        totals = {}
+        for event in self.events:
+            if event["event"] == "sample":
+                continue
+            entry = totals.setdefault(event["caller"], {"runs": 0, "max_depth": 0, "samples": 0, "skips": 0, "black_box_time": 0., "reconstruction_time": 0.,
+                                                        "seconds": 0., "stages": {}})
+            entry["max_depth"] = max(entry["max_depth"], event["depth"])
+            if event["event"] == "finished":
+                entry["runs"] += 1
+                for key in ("samples", "skips", "black_box_time", "reconstruction_time", "seconds"):
+                    entry[key] += event[key]
+            else:
+                entry["stages"][event["stage"]] = entry["stages"].get(event["stage"], 0.) + event["seconds"]
+        return totals
+
+    def summary(self):
+        """Table of the totals, one line per interpolator."""
+        lines = [f"{'interpolator':<52} {'runs':>6} {'depth':>5} {'samples':>8} {'skips':>6} {'black box':>10} {'reconstr.':>10} {'assembly':>10}"]
+        for caller, entry in self.totals().items():
+            lines += [f"{caller:<52} {entry['runs']:>6} {entry['max_depth']:>5} {entry['samples']:>8} {entry['skips']:>6} {entry['black_box_time']:>9.3f}s "
+                      f"{entry['reconstruction_time']:>9.3f}s {entry['stages'].get('assembly', 0.):>9.3f}s"]
+        return "\n".join(lines)
+
+
+def _telemetry_start(caller):
+    """Opens a run of caller on the active InterpolationTelemetry, nested in the current run of this thread or task if any, and makes
+    it the current run; returns (telemetry, run, token), or None if no context is active. Must be closed by _telemetry_finish."""
+    telemetry = interpolation_telemetry
+    if telemetry is None:
+        return None
+    parent = _current_run.get()
+    run = telemetry.start(caller, parent[1]["depth"] + 1 if parent is not None and parent[0] is telemetry else 0)
+    token = _current_run.set((telemetry, run))
+    return telemetry, run, token
+
+
+def _telemetry_finish(run):
+    if run is not None:
+        _current_run.reset(run[2])
+        run[0].finish(run[1])
+
+
+def _assembled(run, assemble):
+    """Result of assemble(), timed as the assembly stage of run."""
+    if run is None:
+        return assemble()
+    start = time.perf_counter()
+    result = assemble()
+    run[0].stage(run[1], "assembly", time.perf_counter() - start)
+    return result
+
+
+class InterpolationFinished(Exception):
+    """Raised when a new sample is already reproduced by the current interpolant."""
+    pass
+
+
+def black_box_samples(f, t_sequence_generator, catch_errors=(), executor=None, batch_size=None):
+    """Yields (tval, f(tval), None), or (tval, None, error) for errors in catch_errors, following the t-sequence.
+    With a concurrent.futures executor (thread or process pool), the next batch_size points (default: number of workers)
+    are drawn upfront and evaluated concurrently; results are still yielded in sequence order, so a consumer stopping
+    at the same criterion sees exactly the serial samples. Pending surplus evaluations are cancelled when the generator is closed."""
+    if executor is None:
+        for tval in t_sequence_generator:
+            run = _current_run.get()
+            if run is not None:
+                start = time.perf_counter()
+            try:
+                fval, error = f(tval), None
+            except catch_errors as caught_error:
+                fval, error = None, caught_error
+            if run is not None:
+                run[0].evaluated(run[1], time.perf_counter() - start)
+            yield tval, fval, error
+    else:
+        batch_size = batch_size if batch_size is not None else getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+        while True:
+            tvals = [next(t_sequence_generator) for i in range(batch_size)]
+            futures = [executor.submit(f, tval) for tval in tvals]
+            try:
+                for tval, future in zip(tvals, futures):
+                    run = _current_run.get()
+                    if run is not None:
+                        start = time.perf_counter()
+                    try:
+                        fval, error = future.result(), None
+                    except catch_errors as caught_error:
+                        fval, error = None, caught_error
+                    if run is not None:
+                        run[0].evaluated(run[1], time.perf_counter() - start)
+                    yield tval, fval, error
+            finally:
+                for future in futures:
+                    future.cancel()
+
+
+async def async_black_box_samples(f, t_sequence_generator, catch_errors=(), max_in_flight=1):
+    """Asynchronous version of black_box_samples for a coroutine function f: a sliding window of max_in_flight evaluations
+    is kept scheduled on the running event loop, and results are yielded in sequence order. Pending evaluations are cancelled on aclose."""
+    pending = collections.deque()
+    try:
+        while True:
+            while len(pending) < max(max_in_flight, 1):
+                tval = next(t_sequence_generator)
+                pending.append((tval, asyncio.ensure_future(f(tval))))
+            tval, task = pending.popleft()
+            run = _current_run.get()
+            if run is not None:
+                start = time.perf_counter()
+            try:
+                fval, error = await task, None
+            except catch_errors as caught_error:
+                fval, error = None, caught_error
+            if run is not None:
+                run[0].evaluated(run[1], time.perf_counter() - start)
+            yield tval, fval, error
+    finally:
+        for tval, task in pending:
+            task.cancel()
+
+
+class NewtonDividedDifferences(object):
+    """Incremental divided-difference engine for Newton interpolation over F_p, on native integer arrays.
+    Adding the n-th sample costs O(n) vectorized integer operations and a single inversion, since
+    a_n = (f(t_n) - N(t_n)) / prod_i (t_n - t_i), where N is the Newton form through the previous samples."""
+
+    def __init__(self, prime):
+        self.prime = prime
+        self.tvals = numpy.zeros(0, dtype=ff_dtype(prime))
+        self.avals = numpy.zeros(0, dtype=ff_dtype(prime))
+
+    def add(self, tval, fval):
+        """Adds the sample (tval, fval) and returns the new Newton coefficient as ModP."""
+        p = self.prime
+        tval, fval = int(tval) % p, int(fval if isinstance(fval, ModP) else ModP(fval, p))
+        if len(self.tvals) == 0:
+            aval = fval
+        else:
+            prefix = cumprod_mod(tval - self.tvals, p)
+            if prefix[-1] == 0:
+                raise ZeroDivisionError(f"Repeated sample point {tval} in Newton interpolation mod {p}.")
+            newton_form = (int(self.avals[0]) + int(numpy.sum(self.avals[1:] * prefix[:-1] % p))) % p
+            aval = (fval - newton_form) * pow(int(prefix[-1]), -1, p) % p
+        self.tvals = numpy.append(self.tvals, numpy.array([tval], dtype=self.tvals.dtype))
+        self.avals = numpy.append(self.avals, numpy.array([aval], dtype=self.avals.dtype))
+        return ModP(aval, p)
+
+
+class ThieleInverseDifferences(object):
+    """Incremental inverse differences for Thiele interpolation: rho_i = (t - t_{i-1}) / (rho_{i-1} - a_{i-1}), with rho_0 = f(t).
+    Arithmetic is generic, so that array-valued samples are supported (terminating only when all entries agree)."""
+
+    def __init__(self, prime):
+        self.prime = prime
+        self.tvals, self.avals = [], []
+
+    @staticmethod
+    def is_zero(value):
+        return (numpy.isscalar(value) and value == 0) or numpy.all(value == 0)
+
+    def add(self, tval, fval):
+        """Adds the sample (tval, fval) and returns the new continued fraction coefficient.
+        Raises InterpolationFinished if the sample is reproduced by the current continued fraction."""
+        rho = fval
+        for t_i, a_i in zip(self.tvals, self.avals):
+            denom = rho - a_i
+            if self.is_zero(denom):
+                raise InterpolationFinished
+            rho = (tval - t_i) / denom
+        self.tvals.append(tval)
+        self.avals.append(rho)
+        return rho
+
+
+def _padic_vanishes(value):
+    """Whether value is zero at its precision, as is_zero for PAdic samples. Raises ValueError if not even one digit is left to tell."""
+    if not isinstance(value, PAdic):
+        return value == 0
+    if value.k > 0:
+        return False
+    if value.n < 1:
+        raise ValueError(f"Lost all {value.p}-adic precision ({value}): increase padic_digits.")
+    return True
+
+
+class PAdicDividedDifferences(object):
+    """Incremental divided differences for Newton interpolation over Q_p, on PAdic samples with the given number of digits:
+    a_n = (...((f(t_n) - a_0) / (t_n - t_0) - a_1) / (t_n - t_1) ... - a_{n-1}) / (t_n - t_{n-1}). For sample points distinct
+    mod p the divisors are units, so the absolute precision of the coefficients is that of the samples."""
+
+    def __init__(self, prime, digits):
+        self.prime, self.digits = prime, digits
+        self.tvals, self.avals = [], []
+
+    def add(self, tval, fval):
+        """Adds the sample (tval, fval) and returns the new Newton coefficient as PAdic."""
+        aval = fval if isinstance(fval, PAdic) else PAdic(fval, self.prime, self.digits)
+        for t_i, a_i in zip(self.tvals, self.avals):
+            if _padic_vanishes(tval - t_i):
+                raise ZeroDivisionError(f"Repeated sample point {tval} in p-adic Newton interpolation.")
+            aval = (aval - a_i) / (tval - t_i)
+        _padic_vanishes(aval)
+        self.tvals.append(tval)
+        self.avals.append(aval)
+        return aval
+
+
+class PAdicThieleInverseDifferences(ThieleInverseDifferences):
+    """Inverse differences for Thiele interpolation over Q_p, on PAdic samples with the given number of digits. Divisions by
+    differences of positive valuation lose as many digits; termination is checked at the remaining precision, and a ValueError
+    is raised once a difference has no digit left (raise padic_digits)."""
+
+    def __init__(self, prime, digits):
+        super().__init__(prime)
+        self.digits = digits
+
+    is_zero = staticmethod(_padic_vanishes)
+
+    def add(self, tval, fval):
+        return super().add(tval, fval if isinstance(fval, PAdic) else PAdic(fval, self.prime, self.digits))
+
+
+def _sample_points(prime, seed, padic_digits=None):
+    """FFSequenceGenerator(prime, seed), or the same points as PAdic with padic_digits digits."""
+    if padic_digits is None:
+        return FFSequenceGenerator(prime, seed)
+    return (PAdic(int(tval), prime, padic_digits) for tval in FFSequenceGenerator(prime, seed))
+
+
+def splitmix64(counters):
+    """SplitMix64 finaliser, a bijective avalanche hash on arrays of uint64 (arithmetic modulo 2 ^ 64)."""
+    z = numpy.asarray(counters, dtype=numpy.uint64) + numpy.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+    return z ^ (z >> numpy.uint64(31))
 
 
 class FFSequenceGenerator(Iterator):
-    """Random number generator decoupled from global state."""
+    """Counter-based pseudo-random sequence of non-zero elements of F_p, decoupled from any global state.
+    The i-th value is a hash of (seed, prime, i), hence batches are computed as native arrays, any slice can be produced
+    independently (e.g. disjoint slices by distributed workers, via values or indexing), and concurrent draws are thread-safe.
+    Iteration advances an internal counter, buffering values computed in batches."""
 
-    def __init__(self, prime, seed=None):
+    buffer_size = 64
+
+    def __init__(self, prime, seed=None, start=0):
         self.prime = prime
-        self.seed = seed
-        random.seed(seed)
-        self.local_state = random.getstate()
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2 ** 64)
+        self.key = int.from_bytes(hashlib.blake2b(f"{self.seed!r},{prime}".encode(), digest_size=8).digest(), "little")
+        self.nwords = (prime.bit_length() + 32 + 63) // 64  # at least 32 surplus random bits to make the modulo bias negligible
+        self.index = start
+        self._lock = threading.Lock()
+        self._buffer, self._buffer_start = numpy.zeros(0, dtype=ff_dtype(prime)), start
+
+    def values(self, start, stop):
+        """Native integer array of the values with indices start, ..., stop - 1, each in [1, prime - 1]."""
+        indices = numpy.arange(start, stop, dtype=numpy.uint64)
+        words = splitmix64(splitmix64(indices[:, None] * numpy.uint64(self.nwords) + numpy.arange(self.nwords, dtype=numpy.uint64)) ^ numpy.uint64(self.key))
+        if self.nwords == 1 and ff_dtype(self.prime) is numpy.int64:
+            return (words[:, 0] % numpy.uint64(self.prime - 1)).astype(numpy.int64) + 1
+        integers = [sum(int(word) << (64 * j) for j, word in enumerate(row)) for row in words]
+        return numpy.array([integer % (self.prime - 1) + 1 for integer in integers], dtype=object)
+
+    def batch(self, size):
+        """Native integer array of the next size values, advancing the sequence."""
+        with self._lock:
+            start, self.index = self.index, self.index + size
+        return self.values(start, start + size)
+
+    def __getitem__(self, index):
+        """Random access: the value with the given index as ModP, or a list of ModP for a slice (with explicit stop)."""
+        if isinstance(index, slice):
+            if index.stop is None:
+                raise ValueError("FFSequenceGenerator slices need an explicit stop.")
+            start, step = index.start or 0, index.step or 1
+            return [ModP(int(value), self.prime) for value in self.values(start, index.stop)[::step]]
+        return ModP(int(self.values(index, index + 1)[0]), self.prime)
 
     def __next__(self):
-        global_state = random.getstate()
-        random.setstate(self.local_state)
-        next_value = ModP(random.randint(1, self.prime - 1), self.prime)
-        self.local_state = random.getstate()
-        random.setstate(global_state)
-        return next_value
+        with self._lock:
+            position = self.index - self._buffer_start
+            if not 0 <= position < len(self._buffer):
+                self._buffer, self._buffer_start, position = self.values(self.index, self.index + self.buffer_size), self.index, 0
+            self.index += 1
+            return ModP(int(self._buffer[position]), self.prime)
 
 
 def interpolation_t_sequence(length, prime, seed=0):
     """Returns the pseudo-random sequence of t-values (mod prime) used in Newton polynomial intrpolation and in Thiele rational interpolation."""
-    FF_generator = FFSequenceGenerator(prime, seed)
-    return [next(FF_generator) for i in range(length)]
+    return [ModP(int(value), prime) for value in FFSequenceGenerator(prime, seed).values(0, length)]
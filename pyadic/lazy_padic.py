@@ -0,0 +1,210 @@
+import functools
+import numbers
+import operator
+
+from fractions import Fraction as Q
+
+from .padic import PAdic
+from .finite_field import ModP, isinteger, rationalise, LGRR
+
+default_precision = 5  # significant digits shown by __str__ and used by comparisons
+max_precision = 200    # working precision beyond which a value is considered to be zero to all computed digits
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def lazify(func):
+    @functools.wraps(func)
+    def wrapper_lazify(self, other):
+        if isinstance(other, LazyPAdic):
+            if self.p != other.p:
+                raise ValueError(f"Can't cast a lazy {other.p}-adic to a lazy {self.p}-adic.")
+            return func(self, other)
+        elif isinteger(other) or isinstance(other, (Q, ModP, PAdic)):
+            return func(self, LazyPAdic(other, self.p))
+        else:
+            return NotImplemented
+    return wrapper_lazify
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class LazyPAdic(object):
+
+    """Lazy p-adic numbers, i.e. PAdic numbers with on-demand precision.
+
+    The value is represented by a recomputable expression graph, whose leaves are exact rationals,
+    fixed precision PAdic numbers, digit generators or callables k -> PAdic (e.g. a black-box evaluation at working precision k).
+    Digits are only computed when a consumer (comparison, rationalise, __str__, to_precision) asks for them,
+    and the working precision is raised automatically if cancellations eat significant digits. Computed values are cached."""
+
+    def __init__(self, value, p=None, operation=None, operands=()):
+        """value: int, Fraction, str, ModP, PAdic or callable k -> PAdic; p: prime (defaults to the prime of value)."""
+        if p is None and isinstance(value, (PAdic, ModP)):
+            p = value.p
+        if p is None:
+            raise ValueError("A prime is required to instantiate a LazyPAdic.")
+        self.p = p
+        self.operation, self.operands = operation, operands
+        if operation is not None:
+            self.leaf = None
+        elif isinstance(value, PAdic):
+            if value.p != p:
+                raise ValueError(f"Can't cast a {value.p}-adic to a lazy {p}-adic.")
+            self.leaf = lambda k: value  # fixed precision, can not be refined
+        elif isinstance(value, ModP):
+            self.leaf = functools.partial(PAdic, int(value), p)
+        elif isinteger(value) or isinstance(value, (Q, str)):
+            self.leaf = functools.partial(PAdic, Q(value) if isinstance(value, str) else value, p)
+        elif callable(value):
+            self.leaf = value
+        else:
+            raise TypeError(f"Invalid lazy p-adic initialisation: {value}, {p}.")
+        self._cache = (-1, None)
+
+    @classmethod
+    def from_digits(cls, digits, p, n=0):
+        """Lazy p-adic from an iterator over its digits (starting from p ^ n). Digits are pulled only as needed and cached."""
+        digits, computed = iter(digits), []
+
+        def leaf(k):
+            while len(computed) < k:
+                computed.append(next(digits))
+            return PAdic(sum(digit * p ** i for i, digit in enumerate(computed[:k])), p, k, n, from_addition=True)
+
+        return cls(leaf, p)
+
+    # EVALUATION
+
+    def at(self, k):
+        """PAdic obtained by evaluating the leaves at working precision k (cached, a previous more precise value may be returned)."""
+        if self._cache[0] >= k:
+            return self._cache[1]
+        if self.operation is None:
+            value = self.leaf(k)
+        else:
+            value = self.operation(*[operand.at(k) for operand in self.operands])
+        self._cache = (k, value)
+        return value
+
+    def to_precision(self, k):
+        """PAdic with at least k significant digits, raising the working precision until cancellations are compensated.
+        If max_precision is reached, the last value is returned (the number may be zero)."""
+        working_precision = k
+        while True:
+            value = self.at(working_precision)
+            digits = value.k if isinstance(value, PAdic) else working_precision
+            if digits >= k or working_precision >= max_precision:
+                return value
+            working_precision = min(working_precision + max(k - digits, k), max_precision)
+
+    @property
+    def valuation(self):
+        value = self.to_precision(1)
+        return value.n if isinstance(value, PAdic) else 0
+
+    def rationalise(self, algorithm=LGRR):
+        """Rational reconstruction, doubling the precision until two successive reconstructions agree."""
+        k, previous = default_precision, None
+        while True:
+            value = self._as_padic(self.to_precision(k), k)
+            current = rationalise(value, algorithm=algorithm) if value.k > 0 else Q(0)
+            if current == previous or k >= max_precision:
+                return current
+            k, previous = min(2 * k, max_precision), current
+
+    def _as_padic(self, value, k):
+        return value if isinstance(value, PAdic) else PAdic(value, self.p, k)
+
+    # REPRESENTATION
+
+    def __str__(self):
+        return str(self.to_precision(default_precision))
+
+    def __repr__(self):
+        return str(self)
+
+    # COMPARISON
+
+    def _leading_digits(self, k):
+        value = self._as_padic(self.to_precision(k), k)
+        return value.n, value.num % self.p ** min(k, value.k), min(k, value.k)
+
+    @lazify
+    def __eq__(self, other):
+        """Equality to default_precision significant digits."""
+        (n1, num1, k1), (n2, num2, k2) = self._leading_digits(default_precision), other._leading_digits(default_precision)
+        if k1 == 0 or k2 == 0:  # at least one is zero to max_precision, compare absolute precision
+            return k1 == k2 and n1 == n2
+        k = min(k1, k2)
+        return n1 == n2 and num1 % self.p ** k == num2 % self.p ** k
+
+    def __hash__(self):
+        """Hash of the valuation and leading digit, consistent with __eq__ (equal values share them, whatever their precision)."""
+        n, num, k = self._leading_digits(default_precision)
+        return hash((self.p, n, num % self.p))
+
+    @lazify
+    def __le__(self, other):
+        return self.valuation >= other.valuation
+
+    @lazify
+    def __lt__(self, other):
+        return self.valuation > other.valuation
+
+    @lazify
+    def __ge__(self, other):
+        return self.valuation <= other.valuation
+
+    @lazify
+    def __gt__(self, other):
+        return self.valuation < other.valuation
+
+    # ALGEBRA
+
+    @lazify
+    def __add__(self, other):
+        return LazyPAdic(None, self.p, operator.add, (self, other))
+
+    @lazify
+    def __radd__(self, other):
+        return other + self
+
+    @lazify
+    def __sub__(self, other):
+        return LazyPAdic(None, self.p, operator.sub, (self, other))
+
+    @lazify
+    def __rsub__(self, other):
+        return other - self
+
+    @lazify
+    def __mul__(self, other):
+        return LazyPAdic(None, self.p, operator.mul, (self, other))
+
+    @lazify
+    def __rmul__(self, other):
+        return other * self
+
+    @lazify
+    def __truediv__(self, other):
+        return LazyPAdic(None, self.p, operator.truediv, (self, other))
+
+    @lazify
+    def __rtruediv__(self, other):
+        return other / self
+
+    def __neg__(self):
+        return LazyPAdic(None, self.p, operator.neg, (self, ))
+
+    def __pos__(self):
+        return self
+
+    def __pow__(self, n):
+        assert (isinstance(n, int) or n.is_integer())
+        return LazyPAdic(None, self.p, lambda x: x ** int(n), (self, ))
+
+
+numbers.Number.register(LazyPAdic)
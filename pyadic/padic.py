@@ -5,14 +5,79 @@ import numpy
 import random
 import re
 import sympy
+import sys
 
 from fractions import Fraction as Q
 
-from .finite_field import ModP, finite_field_sqrt, isinteger
+from .finite_field import ModP, finite_field_sqrt, finite_field_polynomial_roots, univariate_integer_coefficients, isinteger
 from .field_extension import FieldExtension
 
 fixed_relative_precision = False
 all_precision_loss_warning = False
+precision_telemetry = None  # set by the PrecisionTelemetry context manager
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class PrecisionTelemetry(object):
+
+    """Opt-in instrumentation of PAdic arithmetic, used as a context manager:
+
+        with PrecisionTelemetry() as telemetry:
+            ...
+        telemetry.as_dict()
+
+    Counts operations, significant digits lost per operation type (cancellations in __add__ / __sub__,
+    shifts of the absolute precision by the valuation of the divisor in __truediv__) and the minimum precision reached.
+    If by_call_site is True, statistics are also aggregated per calling line outside this module (slower).
+    Nested contexts also report to the enclosing ones. When no context is active the cost is a single global lookup per operation."""
+
+    def __init__(self, by_call_site=False):
+        self.by_call_site = by_call_site
+        self.parent = None
+        self.reset()
+
+    def reset(self):
+        self.operations = {}
+        self.call_sites = {}
+        self.min_precision = None
+
+    def __enter__(self):
+        global precision_telemetry
+        self.parent, precision_telemetry = precision_telemetry, self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global precision_telemetry
+        precision_telemetry, self.parent = self.parent, None
+
+    @staticmethod
+    def _update(stats, operation, digits_lost, precision):
+        entry = stats.setdefault(operation, {"count": 0, "digits_lost": 0, "max_digits_lost": 0, "min_precision": precision})
+        entry["count"] += 1
+        entry["digits_lost"] += digits_lost
+        entry["max_digits_lost"] = max(entry["max_digits_lost"], digits_lost)
+        entry["min_precision"] = min(entry["min_precision"], precision)
+
+    def record(self, operation, digits_lost, precision, call_site=None):
+        self._update(self.operations, operation, digits_lost, precision)
+        if self.min_precision is None or precision < self.min_precision:
+            self.min_precision = precision
+        if self.by_call_site:
+            if call_site is None:
+                frame = sys._getframe(1)
+                while frame is not None and frame.f_code.co_filename == __file__:
+                    frame = frame.f_back
+                call_site = "unknown" if frame is None else f"{frame.f_code.co_filename}:{frame.f_lineno}"
+            self._update(self.call_sites.setdefault(call_site, {}), operation, digits_lost, precision)
+        if self.parent is not None:
+            self.parent.record(operation, digits_lost, precision, call_site)
+
+    def as_dict(self):
+        return {"operations": {key: dict(value) for key, value in self.operations.items()},
+                "min_precision": self.min_precision,
+                "call_sites": {site: {key: dict(value) for key, value in stats.items()} for site, stats in self.call_sites.items()}}
 
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -294,8 +359,11 @@ class PAdic(object):
         if self.n > other.n:
             return other + self
         else:
-            return PAdic((self.num + other.num * self.p ** (other.n - self.n)), self.p,
-                         self.k if self.k < (other.n - self.n) + other.k else (other.n - self.n) + other.k, self.n, from_addition=True)
+            k = self.k if self.k < (other.n - self.n) + other.k else (other.n - self.n) + other.k
+            res = PAdic((self.num + other.num * self.p ** (other.n - self.n)), self.p, k, self.n, from_addition=True)
+            if precision_telemetry is not None:
+                precision_telemetry.record("__add__", max(k - res.k, 0), res.k)
+            return res
 
     @padicfy
     def __radd__(self, other):
@@ -311,7 +379,10 @@ class PAdic(object):
 
     @padicfy
     def __mul__(self, other):
-        return PAdic((self.num * other.num) % self.p ** self.k, self.p, min([self.k, other.k]), self.n + other.n)
+        res = PAdic((self.num * other.num) % self.p ** self.k, self.p, min([self.k, other.k]), self.n + other.n)
+        if precision_telemetry is not None:
+            precision_telemetry.record("__mul__", 0, res.k)
+        return res
 
     @padicfy
     def __rmul__(self, other):
@@ -319,7 +390,10 @@ class PAdic(object):
 
     @padicfy
     def __truediv__(self, other):
-        return PAdic(int(self.num * ModP(other.num, other.p ** other.k)._inv()) % self.p ** self.k, self.p, min([self.k, other.k]), self.n - other.n)
+        res = PAdic(int(self.num * ModP(other.num, other.p ** other.k)._inv()) % self.p ** self.k, self.p, min([self.k, other.k]), self.n - other.n)
+        if precision_telemetry is not None:
+            precision_telemetry.record("__truediv__", max(other.n, 0), res.k)
+        return res
 
     @padicfy
     def __div__(self, other):
@@ -362,29 +436,196 @@ numbers.Number.register(PAdic)
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 
 
+def _log_series_truncation(p, k, v):
+    """Largest n such that x ^ n / n, with x ~ O(p ^ v), may contribute below O(p ^ k).
+    Since v_p(n) ≤ log_p(n), the valuation n * v - v_p(n) of the terms is bounded from below by a non-decreasing function of n."""
+    n, p_power, log_p_n = 1, p, 0
+    while n * v - log_p_n < k:
+        n += 1
+        if n == p_power:
+            p_power, log_p_n = p_power * p, log_p_n + 1
+    return n - 1
+
+
+def _exp_series_truncation(p, k, v):
+    """Largest n such that x ^ n / n!, with x ~ O(p ^ v), may contribute below O(p ^ k).
+    Since v_p(n!) ≤ (n - 1) / (p - 1), the valuation of the terms is bounded from below by n * (v - 1 / (p - 1)) + 1 / (p - 1)."""
+    n = 1
+    while n * v * (p - 1) - (n - 1) < k * (p - 1):
+        n += 1
+    return n - 1
+
+
+def _p_adic_unit_split(n, p):
+    """Returns (e, m) such that n = p ^ e * m with m coprime to p."""
+    e = 0
+    while n % p == 0:
+        n, e = n // p, e + 1
+    return e, n
+
+
+@functools.lru_cache(maxsize=None)
+def _log_series_coefficients(p, N, M_exponent):
+    """Coefficients p ^ E * (-1) ^ (n + 1) / n mod p ^ (M_exponent + E) for n in 1..N, with E = max v_p(n), and E.
+    The inverses 1 / n are precomputed (and cached) once per (p, N, M_exponent)."""
+    splits = [_p_adic_unit_split(n, p) for n in range(1, N + 1)]
+    E = max(e for e, _ in splits)
+    modulus = p ** (M_exponent + E)
+    coefficients = tuple((-1) ** (n + 1) * p ** (E - e) * pow(m, -1, modulus) % modulus for n, (e, m) in enumerate(splits, 1))
+    return coefficients, E
+
+
+@functools.lru_cache(maxsize=None)
+def _exp_series_coefficients(p, N, M_exponent):
+    """Coefficients p ^ E / n! mod p ^ (M_exponent + E) for n in 0..N, with E = v_p(N!), and E."""
+    splits, e_factorial, m_factorial = [(0, 1)], 0, 1
+    for n in range(1, N + 1):
+        e, m = _p_adic_unit_split(n, p)
+        e_factorial, m_factorial = e_factorial + e, m_factorial * m
+        splits += [(e_factorial, m_factorial)]
+    E = e_factorial
+    modulus = p ** (M_exponent + E)
+    coefficients = tuple(p ** (E - e) * pow(m, -1, modulus) % modulus for e, m in splits)
+    return coefficients, E
+
+
+def _horner(coefficients, xs, modulus):
+    """Evaluates sum_n coefficients[n] * x ^ n mod modulus, vectorized over the (object) numpy array xs."""
+    res = numpy.full(xs.shape, coefficients[-1], dtype=object)
+    for coefficient in coefficients[-2::-1]:
+        res = (res * xs + coefficient) % modulus
+    return res
+
+
+def _padic_log_series(xs, p, k):
+    """Given integers x ≡ 0 mod p, returns log(1 + x) mod p ^ k, vectorized over the (object) numpy array xs.
+    Horner evaluation of the Mercator series with the 1 / n pre-inverted mod p ^ (k + E),
+    where the p ^ E factor absorbs the denominators divisible by p."""
+    xs = xs % p ** k
+    if numpy.all(xs == 0):
+        return xs
+    v = min(_p_adic_unit_split(int(x), p)[0] for x in xs.flat if x != 0)
+    N = _log_series_truncation(p, k, v)
+    coefficients, E = _log_series_coefficients(p, N, k)
+    return (_horner((0, ) + coefficients, xs, p ** (k + E)) // p ** E) % p ** k
+
+
+def _padic_exp_series(xs, p, k):
+    """Given integers x ≡ 0 mod p (mod 4 if p = 2), returns exp(x) mod p ^ k, vectorized over the (object) numpy array xs."""
+    xs = xs % p ** k
+    if numpy.all(xs == 0):
+        return xs + 1
+    v = min(_p_adic_unit_split(int(x), p)[0] for x in xs.flat if x != 0)
+    N = _exp_series_truncation(p, k, v)
+    coefficients, E = _exp_series_coefficients(p, N, k)
+    return (_horner(coefficients, xs, p ** (k + E)) // p ** E) % p ** k
+
+
+def _shared_prime_and_precision(ws):
+    """Checks that all p-adics in the array ws share the same prime and number of digits."""
+    if not all(isinstance(w, PAdic) for w in ws.flat):
+        raise TypeError("Expected an array of PAdic numbers.")
+    ps, ks = {w.p for w in ws.flat}, {w.k for w in ws.flat}
+    if len(ps) != 1 or len(ks) != 1:
+        raise ValueError(f"Batched p-adic functions require a shared prime and precision, got primes {ps} and digits {ks}.")
+    return ps.pop(), ks.pop()
+
+
 def padic_log(w, base=None):
     """
     If the valuation is 0, then bring in radius of convergence using Fermat’s little theorem (w ** (p - 1) = 1 mod p),
     i.e. log_p(w) = log_p(w^(p - 1)) / (p - 1), with w^(p - 1) = 1 + x, x ~ O(p).
     Otherwise, factor out p ^ valuation, use that log(a * b) = log(a) + log(b) and that log_p(p ^ valuation) = valuation
     What about branch? See sage docs.
+    The series is evaluated with native integers mod p ^ k, see vec_padic_log for the batched version.
     """
     if w == 1:    # for compatibility with integers / exact (infinite-precision) p-adic
         return 0
     if base is None:
         return padic_log(w, w.p)
     if base is w.p:
-        if w.n == 0:
-            x = w ** (w.p - 1) - 1
-            return sum([(-1) ** (n + 1) * x ** n / n for n in range(1, w.k)]) / (w.p - 1)
-        elif w.n > 0:
-            return w.n + padic_log(w / w.p ** w.n, w.p)
-        else:
-            return w.n + padic_log(w * w.p ** -w.n, w.p)
+        return vec_padic_log(numpy.array([w], dtype=object))[0]
     else:
         return padic_log(w, base=w.p) / padic_log(PAdic(base, w.p, w.k), base=w.p)
 
 
+def vec_padic_log(ws):
+    """Batched p-adic logarithm (base p) of an array of PAdic numbers sharing the same prime and number of digits."""
+    ws = numpy.array(ws, dtype=object)
+    p, k = _shared_prime_and_precision(ws)
+    xs = numpy.array([pow(w.num, p - 1, p ** k) - 1 for w in ws.flat], dtype=object).reshape(ws.shape)
+    logs = _padic_log_series(xs, p, k) * pow(p - 1, -1, p ** k) % p ** k
+    res = numpy.empty(ws.shape, dtype=object)
+    for index, w in numpy.ndenumerate(ws):
+        log = PAdic(int(logs[index]), p, k, from_addition=True)
+        res[index] = log if w.n == 0 else w.n + log
+    return res
+
+
+def padic_exp(x):
+    """p-adic exponential, converges for valuation ≥ 1 (≥ 2 if p = 2).
+    The series is evaluated with native integers mod p ^ (n + k), see vec_padic_exp for the batched version."""
+    return vec_padic_exp(numpy.array([x], dtype=object))[0]
+
+
+def vec_padic_exp(xs):
+    """Batched p-adic exponential of an array of PAdic numbers sharing the same prime and number of digits."""
+    xs = numpy.array(xs, dtype=object)
+    p, _ = _shared_prime_and_precision(xs)
+    if any(x.n < (2 if p == 2 else 1) for x in xs.flat):
+        raise ValueError(f"The {p}-adic exponential converges only for valuation ≥ {2 if p == 2 else 1}.")
+    res = numpy.empty(xs.shape, dtype=object)
+    precisions = sorted({x.n + x.k for x in xs.flat})
+    for precision in precisions:  # absolute precision of exp(x) is that of x
+        mask = numpy.vectorize(lambda x: x.n + x.k == precision, otypes=[bool])(xs)
+        exps = _padic_exp_series(numpy.array([x.num * p ** x.n for x in xs[mask]], dtype=object), p, precision)
+        res[mask] = [PAdic(int(exp), p, precision) for exp in exps]
+    return res
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def _hensel_lift_simple_root(coefficients, root, p, k):
+    """Lifts a simple root mod p of the integer polynomial with given coefficients (from the constant term up) to a root mod p ^ k.
+    Newton iteration with precision doubling: each step works modulo p ^ j only, with j doubling up to k."""
+    derivative = [i * coefficient for i, coefficient in enumerate(coefficients)][1:]
+    j = 1
+    while j < k:
+        j = min(2 * j, k)
+        modulus = p ** j
+        value, slope = 0, 0
+        for coefficient in reversed(coefficients):
+            value = (value * root + coefficient) % modulus
+        for coefficient in reversed(derivative):
+            slope = (slope * root + coefficient) % modulus
+        root = (root - value * pow(slope, -1, modulus)) % modulus
+    return root
+
+
+def padic_roots(poly, p, k, with_singular=False):
+    """Roots in Z_p, to k digits, of a univariate polynomial with rational coefficients,
+    given as sympy expression (or string) or as sequence of coefficients from the highest degree down.
+    Simple roots mod p are found natively in F_p and lifted by Hensel's lemma.
+    Roots mod p where the derivative vanishes can not be lifted this way and are skipped;
+    if with_singular is True they are returned as well, as a second list of ModP."""
+    coefficients = univariate_integer_coefficients(poly)
+    if len(coefficients) == 0:
+        raise ValueError("The zero polynomial vanishes everywhere.")
+    while all(coefficient % p == 0 for coefficient in coefficients):  # remove the p-adic content
+        coefficients = [coefficient // p for coefficient in coefficients]
+    derivative = [i * coefficient for i, coefficient in enumerate(coefficients)][1:]
+    roots, singular_roots = [], []
+    for residue in finite_field_polynomial_roots(coefficients[::-1], p):
+        if sum(coefficient * int(residue) ** i for i, coefficient in enumerate(derivative)) % p == 0:
+            singular_roots += [residue]
+        else:
+            roots += [PAdic(_hensel_lift_simple_root(coefficients, int(residue), p, k), p, k, from_addition=True)]
+    if with_singular:
+        return roots, singular_roots
+    return roots
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
 
 
@@ -395,7 +636,7 @@ def refine_sqrt_precision(x, s):
 
 @functools.lru_cache
 def padic_sqrt(x):
-    """Working precision padic sqrt."""
+    """Working precision padic sqrt. For odd p, the root of the unit part is Hensel lifted (see padic_roots)."""
     assert isinstance(x, PAdic)
     ffx = ModP(x.as_tuple[0], x.p)
     root = finite_field_sqrt(ffx)
@@ -403,7 +644,150 @@ def padic_sqrt(x):
         return FieldExtension(x)
     if x.n % 2 != 0:  # sqrt(x) with x ~ O(p^(odd power))
         raise NotImplementedError("Unramified field extension")
+    if x.p != 2 and x.k > 0:
+        return PAdic(_hensel_lift_simple_root([-x.num, 0, 1], int(root), x.p, x.k), x.p, x.k, x.n // 2)
     root = PAdic(int(root), x.p, x.k, x.n // 2)
     for i in range(math.ceil(math.log(x.k, 2))):
         root = refine_sqrt_precision(x, root)
     return root
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def _pivots_mod_p(matrix, p):
+    """Row and column indices of a maximal non-singular minor of matrix mod p (Gaussian elimination)."""
+    matrix = [[entry % p for entry in row] for row in matrix]
+    pivot_rows, pivot_columns = [], []
+    for column in range(len(matrix[0]) if len(matrix) > 0 else 0):
+        row = next((i for i in range(len(matrix)) if i not in pivot_rows and matrix[i][column] != 0), None)
+        if row is None:
+            continue
+        pivot_rows += [row]
+        pivot_columns += [column]
+        inverse = pow(matrix[row][column], -1, p)
+        for i in range(len(matrix)):
+            if i != row and matrix[i][column] != 0:
+                factor = matrix[i][column] * inverse % p
+                matrix[i] = [(entry - factor * pivot_entry) % p for entry, pivot_entry in zip(matrix[i], matrix[row])]
+    return pivot_rows, pivot_columns
+
+
+def _solve_mod(matrix, vector, modulus):
+    """Solves matrix @ x = vector mod modulus (a prime power), assuming matrix is invertible mod p."""
+    size = len(matrix)
+    augmented = [[entry % modulus for entry in row] + [vector[i] % modulus] for i, row in enumerate(matrix)]
+    for column in range(size):
+        row = next(i for i in range(column, size) if math.gcd(augmented[i][column], modulus) == 1)
+        augmented[column], augmented[row] = augmented[row], augmented[column]
+        inverse = pow(augmented[column][column], -1, modulus)
+        augmented[column] = [entry * inverse % modulus for entry in augmented[column]]
+        for i in range(size):
+            if i != column and augmented[i][column] != 0:
+                factor = augmented[i][column]
+                augmented[i] = [(entry - factor * pivot_entry) % modulus for entry, pivot_entry in zip(augmented[i], augmented[column])]
+    return [row[-1] for row in augmented]
+
+
+def _padic_to_integer(value):
+    """Integer representative of a p-adic integer (or integer / ModP) returned by a black-box equation."""
+    if isinstance(value, (PAdic, ModP)) or isinteger(value):
+        return int(value)
+    raise TypeError(f"Equations should evaluate to PAdic (or integers), got {type(value)}.")
+
+
+def _polynomial_system(equations, variables, p):
+    """Native evaluators mod p ^ j of a list of sympy polynomials (or strings) and of their jacobian."""
+    polys = [sympy.Poly(sympy.sympify(equation), *variables, domain="QQ") for equation in equations]
+
+    def terms(poly):
+        terms = [(monomial, Q(int(coefficient.numerator), int(coefficient.denominator))) for monomial, coefficient in poly.terms()]
+        if any(coefficient.denominator % p == 0 for _, coefficient in terms):
+            raise ValueError(f"The coefficients of {poly.as_expr()} are not {p}-adic integers.")
+        return terms
+
+    equation_terms = [terms(poly) for poly in polys]
+    jacobian_terms = [[terms(poly.diff(variable)) for variable in variables] for poly in polys]
+
+    def evaluate(terms, point, modulus):
+        res = 0
+        for monomial, coefficient in terms:
+            term = coefficient.numerator * pow(coefficient.denominator, -1, modulus)
+            for x, exponent in zip(point, monomial):
+                term = term * pow(x, exponent, modulus)
+            res = (res + term) % modulus
+        return res
+
+    def system(point, j):
+        return [evaluate(terms, point, p ** j) for terms in equation_terms]
+
+    def jacobian(point, j):
+        return [[evaluate(terms, point, p ** j) for terms in row] for row in jacobian_terms]
+
+    return system, jacobian
+
+
+def _black_box_system(equations, p, jacobian=None):
+    """Native evaluators mod p ^ j of callables accepting PAdic arguments. Without an explicit jacobian, derivatives are taken as
+    forward differences (f(x + p ^ j e_i) - f(x)) / p ^ j = ∂_i f(x) + O(p ^ j), with the arguments at precision 2 * j."""
+    if callable(equations):
+        def evaluate(point, j):
+            return [_padic_to_integer(value) for value in equations(*[PAdic(x, p, j) for x in point])]
+    else:
+        def evaluate(point, j):
+            return [_padic_to_integer(equation(*[PAdic(x, p, j) for x in point])) for equation in equations]
+
+    def system(point, j):
+        return [value % p ** j for value in evaluate(point, j)]
+
+    def forward_differences_jacobian(point, j):
+        base = evaluate(point, 2 * j)
+        columns = []
+        for i in range(len(point)):
+            shifted = [x + p ** j if index == i else x for index, x in enumerate(point)]
+            columns += [[((value - base_value) % p ** (2 * j)) // p ** j for value, base_value in zip(evaluate(shifted, 2 * j), base)]]
+        return [list(row) for row in zip(*columns)]
+
+    def explicit_jacobian(point, j):
+        return [[_padic_to_integer(entry) % p ** j for entry in row] for row in jacobian(*[PAdic(x, p, j) for x in point])]
+
+    return system, (forward_differences_jacobian if jacobian is None else explicit_jacobian)
+
+
+def multivariate_Hensel_lifting(equations, point, p, k, variables=None, jacobian=None):
+    """Lifts a solution mod p of a system of polynomial equations to a solution mod p ^ k (multivariate Hensel's lemma).
+    The equations are sympy expressions (or strings), or callables accepting PAdic arguments (one callable per equation,
+    or a single callable returning all of them); for callables an explicit jacobian callable can be supplied.
+    The point is a dict {variable: ModP}, e.g. as returned by univariate_finite_field_solver, or a sequence of ModP.
+    Newton iteration with the jacobian over Z / p ^ j, doubling j at each step. With fewer equations than variables,
+    the variables outside a non-singular maximal minor of the jacobian mod p are kept fixed.
+    Returns PAdic values with absolute precision O(p ^ k), in the same format as the point."""
+    if isinstance(point, dict):
+        variables = list(point.keys()) if variables is None else list(variables)
+        values = [int(point[variable]) % p for variable in variables]
+    else:
+        values = [int(value) % p for value in point]
+    if callable(equations) or all(callable(equation) for equation in equations):
+        system, jacobian = _black_box_system(equations, p, jacobian)
+    else:
+        if variables is None:
+            variables = sorted(set().union(*[sympy.sympify(equation).free_symbols for equation in equations]), key=str)
+        system, jacobian = _polynomial_system(equations, [sympy.Symbol(str(variable)) for variable in variables], p)
+    if any(value != 0 for value in system(values, 1)):
+        raise ValueError(f"The point {point} is not a solution mod {p}.")
+    matrix = jacobian(values, 1)
+    pivot_rows, pivot_columns = _pivots_mod_p(matrix, p)
+    if len(pivot_rows) < len(matrix):
+        raise ValueError(f"Singular jacobian mod {p} (rank {len(pivot_rows)} for {len(matrix)} equations): can not Hensel lift the point {point}.")
+    j = 1
+    while j < k:
+        j = min(2 * j, k)
+        residuals, matrix = system(values, j), jacobian(values, j)
+        submatrix = [[matrix[row][column] for column in pivot_columns] for row in pivot_rows]
+        corrections = _solve_mod(submatrix, [residuals[row] for row in pivot_rows], p ** j)
+        for column, correction in zip(pivot_columns, corrections):
+            values[column] = (values[column] - correction) % p ** j
+    values = [PAdic(value, p, k, from_addition=True) for value in values]
+    if isinstance(point, dict):
+        return dict(zip(variables, values))
+    return values
@@ -0,0 +1,962 @@
+import collections
+import fractions
+import functools
+import math
+import numpy
+import random
+import sympy
+
+from .finite_field import ModP, isinteger, extended_euclidean_algorithm, rationalise
+from .primes import primes, ntt_primes
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def ff_dtype(prime):
+    """Native integer dtype for arrays of residues mod prime: products of two residues must fit in 64 bits."""
+    return numpy.int64 if prime < 2 ** 31 else object
+
+
+def cumprod_mod(x, prime):
+    """Inclusive cumulative product mod prime, in log2(len(x)) vectorized steps (Hillis-Steele scan)."""
+    x = numpy.array(x, dtype=ff_dtype(prime)) % prime
+    shift = 1
+    while shift < len(x):
+        x[shift:] = x[shift:] * x[:-shift] % prime
+        shift *= 2
+    return x
+
+
+def inverse_mod(x, prime):
+    """Element-wise inverses mod prime with a single modular inversion (Montgomery's trick on prefix and suffix products)."""
+    x = numpy.array(x, dtype=ff_dtype(prime)) % prime
+    if len(x) == 0:
+        return x
+    prefix, suffix = cumprod_mod(x, prime), cumprod_mod(x[::-1], prime)[::-1]
+    if prefix[-1] == 0:
+        raise ZeroDivisionError(f"Division by zero mod {prime}.")
+    inverses = numpy.full(len(x), pow(int(prefix[-1]), -1, prime), dtype=x.dtype)
+    inverses[1:] = inverses[1:] * prefix[:-1] % prime
+    inverses[:-1] = inverses[:-1] * suffix[1:] % prime
+    return inverses
+
+
+def to_residue(value, prime):
+    """Integer residue mod prime of an int, Fraction or ModP."""
+    if isinstance(value, ModP):
+        if value.p != prime:
+            raise ValueError(f"Can't cast numbers between different finite fields: FF{value.p} and FF{prime}")
+        return value.n
+    if isinteger(value):
+        return int(value) % prime
+    if isinstance(value, (fractions.Fraction, sympy.Rational)):
+        return int(ModP(value, prime))
+    raise TypeError(f"Can't interpret {value} of type {type(value)} as an element of FF{prime}.")
+
+
+@functools.lru_cache(maxsize=None)
+def primitive_root(prime):
+    """Smallest generator of the multiplicative group of F_prime."""
+    factors, n, d = set(), prime - 1, 2
+    while d * d <= n:
+        while n % d == 0:
+            factors.add(d)
+            n //= d
+        d += 1
+    if n > 1:
+        factors.add(n)
+    return next(g for g in range(2, prime) if all(pow(g, (prime - 1) // q, prime) != 1 for q in factors))
+
+
+@functools.lru_cache(maxsize=None)
+def _bit_reversal(n):
+    indices, reversed_indices, bits = numpy.arange(n), numpy.zeros(n, dtype=numpy.int64), n.bit_length() - 1
+    for bit in range(bits):
+        reversed_indices |= ((indices >> bit) & 1) << (bits - 1 - bit)
+    return reversed_indices
+
+
+def ntt(a, prime, inverse=False):
+    """Number theoretic transform mod prime (below 2 ^ 31) of the int64 array a, whose length must be a power of two dividing prime - 1.
+    Iterative radix-2 Cooley-Tukey, vectorized over the butterflies of each stage."""
+    n = len(a)
+    if (prime - 1) % n != 0 or n & (n - 1) != 0:
+        raise ValueError(f"No number theoretic transform of length {n} mod {prime}.")
+    a, root = numpy.array(a, dtype=numpy.int64)[_bit_reversal(n)] % prime, primitive_root(prime)
+    length = 2
+    while length <= n:
+        half, w = length // 2, pow(root, (prime - 1) // length, prime)
+        if inverse:
+            w = pow(w, -1, prime)
+        twiddles = numpy.ones(half, dtype=numpy.int64)
+        filled = 1
+        while filled < half:
+            twiddles[filled:2 * filled] = twiddles[:filled] * pow(w, filled, prime) % prime
+            filled *= 2
+        a = a.reshape(-1, length)
+        u, v = a[:, :half], a[:, half:] * twiddles % prime
+        a = numpy.concatenate([(u + v) % prime, (u - v) % prime], axis=1).reshape(-1)
+        length *= 2
+    if inverse:
+        a = a * pow(n, -1, prime) % prime
+    return a
+
+
+def _zero_pad(a, length):
+    """a padded with zeros to the given length, keeping its dtype (numpy.pad would insert numpy.int64 zeros in object arrays)."""
+    return numpy.concatenate([a, numpy.zeros(length - len(a), dtype=a.dtype)]) if length > len(a) else a
+
+
+def _ntt_convolve(a, b, prime):
+    size = 1 << (len(a) + len(b) - 2).bit_length()
+    fa, fb = ntt(_zero_pad(a, size), prime), ntt(_zero_pad(b, size), prime)
+    return ntt(fa * fb % prime, prime, inverse=True)[:len(a) + len(b) - 1]
+
+
+def _crt_convolve(a, b, prime):
+    """Convolution mod an arbitrary prime, from exact convolutions modulo enough NTT-friendly primes (Garner's algorithm)."""
+    bound, moduli = min(len(a), len(b)) * (prime - 1) ** 2, []
+    for modulus in ntt_primes:
+        moduli.append(modulus)
+        if math.prod(moduli) > bound:
+            break
+    else:
+        raise ValueError(f"Not enough NTT primes for a convolution of length {len(a) + len(b) - 1} mod {prime}.")
+    residues = [_ntt_convolve((a % modulus).astype(numpy.int64), (b % modulus).astype(numpy.int64), modulus) for modulus in moduli]
+    digits = []  # mixed radix digits: result = d0 + m0 * (d1 + m1 * (d2 + ...))
+    for i, (modulus, residue) in enumerate(zip(moduli, residues)):
+        for digit, previous_modulus in zip(digits, moduli):
+            residue = (residue - digit) % modulus * pow(previous_modulus, -1, modulus) % modulus
+        digits.append(residue)
+    dtype = ff_dtype(prime)
+    result = digits[-1].astype(dtype) % prime
+    for digit, modulus in zip(digits[-2::-1], moduli[-2::-1]):
+        result = (result * (modulus % prime) + digit.astype(dtype)) % prime
+    return result
+
+
+def _schoolbook_convolve(a, b, prime):
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if ff_dtype(prime) is numpy.int64 and len(short) <= 2 ** 16:  # numpy.convolve on 16-bit limbs of long: partial sums stay below 2 ^ 63
+        low, high = numpy.convolve(short, long & 0xFFFF), numpy.convolve(short, long >> 16)
+        return (low % prime + (high % prime << 16)) % prime
+    res = numpy.zeros(len(short) + len(long) - 1, dtype=ff_dtype(prime))
+    for i, coeff in enumerate(short):
+        if coeff != 0:
+            res[i:i + len(long)] = (res[i:i + len(long)] + coeff * long) % prime
+    return res
+
+
+def _karatsuba_convolve(a, b, prime):
+    if min(len(a), len(b)) <= karatsuba_threshold:
+        return _schoolbook_convolve(a, b, prime)
+    n, length = max(len(a), len(b)), len(a) + len(b) - 1
+    a, b, m = _zero_pad(a, n), _zero_pad(b, n), n // 2
+    a0, a1, b0, b1 = a[:m], a[m:], b[:m], b[m:]
+    z0, z2 = _karatsuba_convolve(a0, b0, prime), _karatsuba_convolve(a1, b1, prime)
+    z1 = _karatsuba_convolve((_zero_pad(a0, n - m) + a1) % prime, (_zero_pad(b0, n - m) + b1) % prime, prime)
+    res = numpy.zeros(2 * n - 1, dtype=ff_dtype(prime))
+    res[:len(z0)] += z0
+    res[2 * m:2 * m + len(z2)] += z2
+    res[m:m + len(z1)] = (res[m:m + len(z1)] + z1 - _zero_pad(z0, len(z1)) - z2[:len(z1)]) % prime
+    return res[:length] % prime
+
+
+karatsuba_threshold = 32  # primes above 2 ^ 31 (Python integers): below, schoolbook multiplication
+crt_threshold = 128       # primes above 2 ^ 31: above, number theoretic transforms modulo ntt_primes and CRT
+ntt_threshold = 2048      # primes below 2 ^ 31: above, number theoretic transforms (below, numpy.convolve)
+newton_division_thresholds = {numpy.int64: 64, object: 512}  # by dtype, quotient length above which division uses Newton inversion
+
+
+def convolve_mod(a, b, prime):
+    """Product of the polynomials with coefficient arrays a and b (from the constant term up) mod prime, dispatched on the shorter length.
+    For primes below 2 ^ 31, numpy.convolve on 16-bit limbs, or a number theoretic transform directly mod prime if it is NTT-friendly
+    for the required length, otherwise exact transforms modulo ntt_primes and CRT. For larger primes, schoolbook, Karatsuba or CRT transforms."""
+    dtype = ff_dtype(prime)
+    a, b = (numpy.asarray(x) if numpy.asarray(x).dtype == dtype else numpy.array([int(entry) for entry in x], dtype=dtype) for x in (a, b))
+    if len(a) == 0 or len(b) == 0:
+        return numpy.zeros(0, dtype=dtype)
+    shortest = min(len(a), len(b))
+    if dtype is numpy.int64:
+        if shortest <= ntt_threshold:
+            return _schoolbook_convolve(a, b, prime)
+        if (prime - 1) % (1 << (len(a) + len(b) - 2).bit_length()) == 0:
+            return _ntt_convolve(a, b, prime)
+        return _crt_convolve(a, b, prime)
+    if shortest <= karatsuba_threshold:
+        return _schoolbook_convolve(a, b, prime)
+    if shortest <= crt_threshold or shortest * (prime - 1) ** 2 >= math.prod(ntt_primes):  # also moduli beyond the CRT range, e.g. p ^ k
+        return _karatsuba_convolve(a, b, prime)
+    return _crt_convolve(a, b, prime)
+
+
+def inverse_series(coeffs, n, prime):
+    """First n coefficients of the power series inverse of coeffs (coeffs[0] != 0), by Newton iteration g <- g (2 - f g)."""
+    inverse = numpy.array([pow(int(coeffs[0]), -1, prime)], dtype=ff_dtype(prime))
+    precision = 1
+    while precision < n:
+        precision = min(2 * precision, n)
+        correction = -convolve_mod(coeffs[:precision], inverse, prime)[:precision] % prime
+        correction[0] = (correction[0] + 2) % prime
+        inverse = convolve_mod(inverse, correction, prime)[:precision]
+    return inverse
+
+
+def polify(func):
+    """Casts scalars to constant polynomials of the same kind and checks that the prime (and variables) match."""
+    @functools.wraps(func)
+    def wrapper_polify(self, other):
+        if isinstance(other, type(self)):
+            if self.prime != other.prime:
+                raise ValueError(f"Can't cast polynomials between different finite fields: FF{self.prime} and FF{other.prime}")
+            if self.variables != other.variables:
+                raise ValueError(f"Can't combine polynomials in different variables: {self.variables} and {other.variables}")
+            return func(self, other)
+        elif isinteger(other) or isinstance(other, (ModP, fractions.Fraction)):
+            return func(self, self.constant(to_residue(other, self.prime)))
+        else:
+            return NotImplemented
+    return wrapper_polify
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class FFPoly(object):
+    """Dense univariate polynomial over F_p, with coefficients from the constant term up stored in a native integer array.
+    Conversion to sympy only happens when asked, through as_expr."""
+
+    def __init__(self, coeffs, prime, variable='t'):
+        self.prime = prime
+        self.variable = variable
+        if isinstance(coeffs, numpy.ndarray) and coeffs.dtype == numpy.int64 and ff_dtype(prime) is numpy.int64:  # native array, e.g. from arithmetic
+            coeffs = coeffs % prime
+        else:
+            coeffs = numpy.array([int(coeff) for coeff in coeffs], dtype=ff_dtype(prime)) % prime if len(coeffs) > 0 else numpy.zeros(0, dtype=ff_dtype(prime))
+        nonzero = numpy.nonzero(coeffs)[0]
+        self.coeffs = coeffs[:nonzero[-1] + 1] if len(nonzero) > 0 else coeffs[:0]
+
+    @classmethod
+    def from_Newton(cls, avals, tvals, prime, variable='t'):
+        """Monomial form of the Newton form a0 + (t - t0) * (a1 + (t - t1) * (a2 + ...))."""
+        dtype = ff_dtype(prime)
+        coeffs = numpy.zeros(0, dtype=dtype)
+        for aval, tval in zip(avals[::-1], tvals[::-1]):
+            shifted = numpy.zeros(len(coeffs) + 1, dtype=dtype)
+            shifted[1:] = coeffs
+            shifted[:-1] = (shifted[:-1] - int(tval) * coeffs) % prime
+            shifted[0] = (shifted[0] + int(aval)) % prime
+            coeffs = shifted
+        return cls(coeffs, prime, variable)
+
+    @property
+    def variables(self):
+        return (self.variable, )
+
+    def constant(self, value):
+        return FFPoly([value], self.prime, self.variable)
+
+    @property
+    def degree(self):
+        """Degree of the polynomial, -1 for the zero polynomial."""
+        return len(self.coeffs) - 1
+
+    @property
+    def leading_coefficient(self):
+        return int(self.coeffs[-1]) if self.degree >= 0 else 0
+
+    def monic(self):
+        if self.degree < 0:
+            return self
+        return self * pow(self.leading_coefficient, -1, self.prime)
+
+    # EVALUATION
+
+    def __call__(self, x):
+        """Horner evaluation at an integer or ModP point."""
+        x, res = to_residue(x, self.prime), 0
+        for coeff in self.coeffs[::-1]:
+            res = (res * x + int(coeff)) % self.prime
+        return ModP(res, self.prime)
+
+    def evaluate(self, xs):
+        """Horner evaluation at an array of points, vectorized over the points, or multipoint_evaluation for many points and high degree.
+        Returns a native integer array."""
+        if min(len(xs), self.degree) > multipoint_evaluation_threshold:
+            return multipoint_evaluation(self, xs)
+        xs = numpy.array([to_residue(x, self.prime) for x in xs], dtype=ff_dtype(self.prime))
+        res = numpy.zeros(len(xs), dtype=ff_dtype(self.prime))
+        for coeff in self.coeffs[::-1]:
+            res = (res * xs + coeff) % self.prime
+        return res
+
+    # COMPARISON
+
+    def __eq__(self, other):
+        if isinstance(other, FFPoly):
+            return self.prime == other.prime and numpy.array_equal(self.coeffs, other.coeffs)
+        elif isinteger(other) or isinstance(other, (ModP, fractions.Fraction)):
+            return self.degree <= 0 and (self.coeffs[0] if self.degree == 0 else 0) == to_residue(other, self.prime)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.prime, tuple(map(int, self.coeffs))))
+
+    # ALGEBRA
+
+    @polify
+    def __add__(self, other):
+        size = max(len(self.coeffs), len(other.coeffs))
+        res = numpy.zeros(size, dtype=ff_dtype(self.prime))
+        res[:len(self.coeffs)] += self.coeffs
+        res[:len(other.coeffs)] += other.coeffs
+        return FFPoly(res % self.prime, self.prime, self.variable)
+
+    @polify
+    def __radd__(self, other):
+        return other + self
+
+    @polify
+    def __sub__(self, other):
+        return self + (- other)
+
+    @polify
+    def __rsub__(self, other):
+        return other - self
+
+    def __neg__(self):
+        return FFPoly((- self.coeffs) % self.prime, self.prime, self.variable)
+
+    def __pos__(self):
+        return self
+
+    @polify
+    def __mul__(self, other):
+        """Schoolbook, Karatsuba or NTT multiplication depending on the degrees (see convolve_mod)."""
+        return FFPoly(convolve_mod(self.coeffs, other.coeffs, self.prime), self.prime, self.variable)
+
+    @polify
+    def __rmul__(self, other):
+        return self * other
+
+    def __pow__(self, n):
+        assert (isinstance(n, int) or n.is_integer()) and n >= 0
+        res, base = self.constant(1), self
+        while n > 0:
+            if n % 2 == 1:
+                res = res * base
+            base, n = base * base, n // 2
+        return res
+
+    @polify
+    def __divmod__(self, other):
+        """Long division, vectorized over the coefficients of the divisor, or for long quotients via Newton inversion
+        of the reversed divisor as a power series (quotient = reversal of rev(self) / rev(other) mod t ^ (deg quotient + 1))."""
+        if other.degree < 0:
+            raise ZeroDivisionError("Polynomial division by zero.")
+        if self.degree < other.degree:
+            return FFPoly([], self.prime, self.variable), self
+        quotient_length = self.degree - other.degree + 1
+        if quotient_length > newton_division_thresholds[ff_dtype(self.prime)]:
+            quotient = convolve_mod(self.coeffs[::-1][:quotient_length], inverse_series(other.coeffs[::-1], quotient_length, self.prime), self.prime)
+            quotient = FFPoly(quotient[:quotient_length][::-1].copy(), self.prime, self.variable)
+            return quotient, FFPoly((self.coeffs[:other.degree] - convolve_mod(quotient.coeffs, other.coeffs, self.prime)[:other.degree]) % self.prime,
+                                    self.prime, self.variable)
+        inverse_leading = pow(other.leading_coefficient, -1, self.prime)
+        remainder = self.coeffs.copy()
+        quotient = numpy.zeros(quotient_length, dtype=ff_dtype(self.prime))
+        for i in range(self.degree - other.degree, -1, -1):
+            coeff = remainder[i + other.degree] * inverse_leading % self.prime
+            quotient[i] = coeff
+            if coeff != 0:
+                remainder[i:i + other.degree + 1] = (remainder[i:i + other.degree + 1] - coeff * other.coeffs) % self.prime
+        return FFPoly(quotient, self.prime, self.variable), FFPoly(remainder[:other.degree], self.prime, self.variable)
+
+    @polify
+    def __floordiv__(self, other):
+        return divmod(self, other)[0]
+
+    @polify
+    def __mod__(self, other):
+        return divmod(self, other)[1]
+
+    def __truediv__(self, other):
+        if isinstance(other, FFPoly):
+            return FFRational(self, other)
+        return self * pow(to_residue(other, self.prime), -1, self.prime)
+
+    def __rtruediv__(self, other):
+        return FFRational(self.constant(to_residue(other, self.prime)), self)
+
+    def derivative(self):
+        return FFPoly(self.coeffs[1:] * numpy.array(range(1, len(self.coeffs)), dtype=ff_dtype(self.prime)) % self.prime, self.prime, self.variable)
+
+    def shift(self, n):
+        """Multiplication by t ^ n, or floor division by t ^ (- n) for negative n."""
+        if n >= 0:
+            return FFPoly(numpy.concatenate([numpy.zeros(n, dtype=self.coeffs.dtype), self.coeffs]), self.prime, self.variable)
+        return FFPoly(self.coeffs[- n:].copy(), self.prime, self.variable)
+
+    def gcd(self, other):
+        """Monic greatest common divisor: Euclidean algorithm, accelerated by half_gcd above half_gcd_threshold."""
+        a, b = (self, other) if self.degree >= other.degree else (other, self)
+        while b.degree >= 0:
+            a, b = b, a % b
+            if b.degree > half_gcd_threshold:
+                a, b = _apply(half_gcd(a, b), a, b)
+        return a.monic()
+
+    # REPRESENTATION
+
+    def __repr__(self):
+        return f"FFPoly({list(map(int, self.coeffs))}, {self.prime}, '{self.variable}')"
+
+    def as_expr(self):
+        """Sympy expression, with coefficients in the symmetric representation (as sympy.GF)."""
+        if self.degree < 0:
+            return sympy.Integer(0)
+        return sympy.Poly.from_list([int(coeff) for coeff in self.coeffs[::-1]], sympy.symbols(self.variable), modulus=self.prime).as_expr()
+
+
+half_gcd_threshold = 16384  # FFPoly.gcd: below, the Euclidean algorithm
+half_gcd_base_case = 512    # half_gcd: below, Euclidean steps accumulated in the matrix
+
+
+def _apply(matrix, a, b):
+    (m00, m01), (m10, m11) = matrix
+    return m00 * a + m01 * b, m10 * a + m11 * b
+
+
+def _matmul(left, right):
+    (a, b), (c, d) = left
+    (e, f), (g, h) = right
+    return ((a * e + b * g, a * f + b * h), (c * e + d * g, c * f + d * h))
+
+
+def half_gcd(a, b):
+    """Half-gcd of a, b with deg a > deg b: the 2x2 polynomial matrix M of the Euclidean steps such that (c, d) = M (a, b)
+    are consecutive remainders with deg c >= ceil(deg a / 2) > deg d. Recursive on the leading halves, O(M(n) log n)."""
+    if a.degree <= b.degree:
+        raise ValueError(f"half_gcd requires deg a > deg b, got {a.degree} and {b.degree}.")
+    m = (a.degree + 1) // 2
+    one, zero = a.constant(1), a.constant(0)
+    if b.degree < m:
+        return ((one, zero), (zero, one))
+    if a.degree <= half_gcd_base_case:
+        matrix = ((one, zero), (zero, one))
+        while b.degree >= m:
+            quotient, remainder = divmod(a, b)
+            matrix, a, b = ((matrix[1][0], matrix[1][1]), (matrix[0][0] - quotient * matrix[1][0], matrix[0][1] - quotient * matrix[1][1])), b, remainder
+        return matrix
+    matrix = half_gcd(a.shift(- m), b.shift(- m))
+    c, d = _apply(matrix, a, b)
+    if d.degree < m:
+        return matrix
+    quotient, remainder = divmod(c, d)
+    matrix = _matmul(((zero, one), (one, - quotient)), matrix)
+    c, d = d, remainder
+    if d.degree < m:
+        return matrix
+    k = 2 * m - c.degree
+    return _matmul(half_gcd(c.shift(- k), d.shift(- k)), matrix)
+
+
+def rational_reconstruction(poly, modulus, min_slack=1):
+    """Rational function r / s with r = s * poly mod modulus (Pade approximation), from the extended Euclidean algorithm in F_p[t].
+    Among the rows (r_i, s_i) of the algorithm, the one with maximal slack deg(modulus) - 1 - deg(r_i) - deg(s_i),
+    i.e. the one determined by the fewest conditions, is selected (maximal quotient rule). With modulus = prod_i (t - t_i)
+    and poly interpolating f at the t_i, the slack is the number of samples reproduced beyond those needed.
+    Returns None if the slack is less than min_slack or r_i, s_i are not coprime (more samples are needed)."""
+    n = modulus.degree
+    previous, current = (modulus, poly.constant(0)), (poly, poly.constant(1))
+    best, best_slack = None, min_slack - 1
+    while True:
+        slack = n - 1 - max(current[0].degree, 0) - current[1].degree
+        if slack > best_slack:
+            best, best_slack = current, slack
+        if current[0].degree < 0:
+            break
+        quotient, remainder = divmod(previous[0], current[0])
+        previous, current = current, (remainder, previous[1] - quotient * current[1])
+    if best is None or best[0].gcd(best[1]).degree > 0:
+        return None
+    return FFRational(*best).reduced()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def square_free_decomposition(poly):
+    """Yun's algorithm: the monic, square-free and pairwise coprime s_i with poly = lc(poly) * prod_i s_i ^ i, as a list of (s_i, i)
+    for the non-constant s_i. Requires deg poly < p, as in characteristic zero."""
+    if poly.degree >= poly.prime:
+        raise ValueError(f"Square-free decomposition requires degree below the characteristic, got degree {poly.degree} mod {poly.prime}.")
+    derivative = poly.derivative()
+    common = poly.gcd(derivative)
+    b, c = poly // common, derivative // common
+    d, factors, multiplicity = c - b.derivative(), [], 1
+    while b.degree > 0:
+        factor = b.gcd(d)
+        b, c = b // factor, d // factor
+        if factor.degree > 0:
+            factors.append((factor, multiplicity))
+        d, multiplicity = c - b.derivative(), multiplicity + 1
+    return factors
+
+
+PartialFractions = collections.namedtuple("PartialFractions", ["polynomial", "terms"])
+PartialFractions.__doc__ = """Polynomial part and terms (numerator, factor, power), i.e. polynomial + sum numerator / factor ^ power with deg numerator < deg factor."""
+
+
+def partial_fractions(rational):
+    """Square-free partial fraction decomposition of a univariate FFRational, e.g. from Thiele_rational_interpolation(..., as_native=True).
+    The denominator is split into the coprime powers s_i ^ i of square_free_decomposition, their numerators are obtained from the Bezout
+    cofactors of the extended Euclidean algorithm and expanded in powers of s_i. The factors s_i are monic, but not split into irreducibles.
+    Only leading coefficients are inverted, so that the same steps also run mod p ^ k for good primes p (see padic_partial_fractions)."""
+    if not isinstance(rational.numerator, FFPoly):
+        raise TypeError("Partial fractions require a univariate rational function.")
+    prime, denominator = rational.prime, rational.denominator
+    polynomial, remainder = divmod(rational.numerator, denominator)
+    remainder, rest, terms = remainder * pow(denominator.leading_coefficient, -1, prime), denominator.monic(), []
+    for factor, multiplicity in square_free_decomposition(denominator):
+        power = factor ** multiplicity
+        rest = rest // power
+        if rest.degree > 0:  # remainder / (power * rest) = remainder * t / power + remainder * s / rest, with s * power + t * rest = 1
+            s, t, g = extended_euclidean_algorithm(power, rest)
+            inverse = pow(g.leading_coefficient, -1, prime)
+            numerator, remainder = remainder * t * inverse % power, remainder * s * inverse % rest
+        else:
+            numerator, remainder = remainder, rest.constant(0)
+        for exponent in range(multiplicity, 0, -1):
+            numerator, digit = divmod(numerator, factor)
+            if digit.degree >= 0:
+                terms.append((digit, factor, exponent))
+    return PartialFractions(polynomial, terms)
+
+
+def padic_partial_fractions(numerator, denominator, digits=2, max_digits=64, max_primes=3, seed=0, variable='t'):
+    """Square-free partial fraction decomposition over Q of numerator / denominator, given by their rational coefficients from the
+    constant term up (e.g. from multi_prime_interpolation). Following Wang's p-adic approach, partial_fractions runs mod p ^ k, i.e. on the
+    p-adic expansions to k digits of the coefficients, and the result is rationalised; k is doubled from digits until the result validates
+    at a random point mod a fresh prime. Primes which divide a denominator or a leading coefficient met along the way are skipped.
+    Returns PartialFractions with lists of Fractions (from the constant term up) in place of FFPoly."""
+    numerator, denominator = list(map(fractions.Fraction, numerator)), list(map(fractions.Fraction, denominator))
+    validation_prime = primes[max_primes]
+    point = random.Random(seed).randrange(validation_prime)
+
+    def value(coeffs):
+        return FFPoly([to_residue(coeff, validation_prime) for coeff in coeffs], validation_prime, variable)(point)
+
+    expected = value(numerator) / value(denominator)
+    for prime in primes[:max_primes]:
+        k = digits
+        while k <= max_digits:
+            modulus = prime ** k
+            try:
+                decomposition = partial_fractions(FFRational(FFPoly([to_residue(coeff, modulus) for coeff in numerator], modulus, variable),
+                                                             FFPoly([to_residue(coeff, modulus) for coeff in denominator], modulus, variable)))
+            except (ValueError, ZeroDivisionError):  # bad prime
+                break
+            polynomial = [rationalise(int(coeff), modulus) for coeff in decomposition.polynomial.coeffs]
+            terms = [tuple([rationalise(int(coeff), modulus) for coeff in poly.coeffs] for poly in (digit, factor)) + (exponent, )
+                     for digit, factor, exponent in decomposition.terms]
+            if value(polynomial) + sum(value(digit) / value(factor) ** exponent for digit, factor, exponent in terms) == expected:
+                return PartialFractions(polynomial, terms)
+            k *= 2
+    raise ValueError(f"Partial fractions over Q failed to validate with up to {max_digits} digits for primes {primes[:max_primes]}.")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+subproduct_tree_leaf_size = 64  # points per leaf of the subproduct tree, handled together by vectorized quadratic algorithms
+multipoint_evaluation_threshold = 16384  # FFPoly.evaluate: above (both degree and number of points), multipoint_evaluation instead of Horner
+
+
+def _residues(points, prime):
+    return numpy.array([to_residue(point, prime) for point in points], dtype=ff_dtype(prime))
+
+
+def _leaf_matrix(points):
+    """Points reshaped to (leaves, subproduct_tree_leaf_size), with a mask of the actual points (the last leaf may be partial)."""
+    leaves = -(-len(points) // subproduct_tree_leaf_size)
+    matrix = numpy.zeros(leaves * subproduct_tree_leaf_size, dtype=points.dtype)
+    matrix[:len(points)] = points
+    mask = numpy.arange(leaves * subproduct_tree_leaf_size) < len(points)
+    return matrix.reshape(leaves, -1), mask.reshape(leaves, -1)
+
+
+def _leaf_products(xs, mask, prime):
+    """Coefficients of prod_j (t - xs[:, j]) over the masked points of each leaf, as rows of a matrix."""
+    products = numpy.zeros((xs.shape[0], xs.shape[1] + 1), dtype=xs.dtype)
+    products[:, 0] = 1
+    for j in range(xs.shape[1]):
+        shifted = numpy.zeros_like(products)
+        shifted[:, 1:] = products[:, :-1]
+        shifted = (shifted - xs[:, j:j + 1] * products) % prime
+        products = numpy.where(mask[:, j:j + 1], shifted, products)
+    return products
+
+
+def subproduct_tree(points, prime, variable='t'):
+    """Levels of the subproduct tree of the points, from the leaves (products of subproduct_tree_leaf_size linear factors t - x_i) to the root
+    prod_i (t - x_i); each node is the product of its two children (a node without sibling is carried over to the next level)."""
+    xs, mask = _leaf_matrix(_residues(points, prime))
+    levels = [[FFPoly(row, prime, variable) for row in _leaf_products(xs, mask, prime)]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([level[i] * level[i + 1] for i in range(0, len(level) - 1, 2)] + ([level[-1]] if len(level) % 2 == 1 else []))
+    return levels
+
+
+def _remainders_down(poly, levels):
+    """Remainders of poly modulo the leaves of the subproduct tree, descending from the root."""
+    remainders = [poly % levels[-1][0]]
+    for level in levels[-2::-1]:
+        remainders = [remainders[i // 2] % node for i, node in enumerate(level)]
+    return remainders
+
+
+def multipoint_evaluation(poly, points):
+    """Values of poly at the points (integers or ModP) as a native integer array, in O(M(n) log n) via remainders down the subproduct tree.
+    The remainders at the leaves are evaluated together by Horner's scheme, vectorized over the points of all leaves."""
+    if len(points) == 0:
+        return numpy.zeros(0, dtype=ff_dtype(poly.prime))
+    return _evaluate_on_tree(poly, subproduct_tree(points, poly.prime, poly.variable), _residues(points, poly.prime))
+
+
+def _evaluate_on_tree(poly, levels, points):
+    prime = poly.prime
+    xs, _ = _leaf_matrix(points)
+    remainders = numpy.zeros((xs.shape[0], subproduct_tree_leaf_size), dtype=xs.dtype)
+    for i, remainder in enumerate(_remainders_down(poly, levels)):
+        remainders[i, :len(remainder.coeffs)] = remainder.coeffs
+    values = numpy.zeros_like(xs)
+    for j in range(subproduct_tree_leaf_size - 1, -1, -1):
+        values = (values * xs + remainders[:, j:j + 1]) % prime
+    return values.reshape(-1)[:len(points)]
+
+
+def interpolate_at_points(points, values, prime, variable='t'):
+    """Polynomial of degree < n through the n points (distinct, integers or ModP) with the given values, in O(M(n) log n):
+    Lagrange form sum_i values_i / M'(x_i) * M / (t - x_i), with M the root of the subproduct tree, M' evaluated by multipoint_evaluation
+    and the sum combined up the tree (r = r_left * M_right + r_right * M_left). Raises ZeroDivisionError for repeated points."""
+    if len(points) != len(values):
+        raise ValueError(f"Got {len(points)} points but {len(values)} values.")
+    if len(points) == 0:
+        return FFPoly([], prime, variable)
+    levels = subproduct_tree(points, prime, variable)
+    root = levels[-1][0]
+    derivative = FFPoly(root.coeffs[1:] * numpy.array(range(1, len(root.coeffs)), dtype=root.coeffs.dtype), prime, variable)
+    weights = _residues(values, prime) * inverse_mod(multipoint_evaluation(derivative, points), prime) % prime
+    xs, mask = _leaf_matrix(_residues(points, prime))
+    weights, _ = _leaf_matrix(weights)
+    products = numpy.zeros((xs.shape[0], xs.shape[1] + 1), dtype=xs.dtype)
+    products[:, 0] = 1
+    sums = numpy.zeros_like(products)
+    for j in range(xs.shape[1]):  # sums <- sums * (t - x_j) + w_j * products, products <- products * (t - x_j), on all leaves at once
+        shifted_sums, shifted_products = numpy.zeros_like(sums), numpy.zeros_like(products)
+        shifted_sums[:, 1:], shifted_products[:, 1:] = sums[:, :-1], products[:, :-1]
+        shifted_sums = (shifted_sums - xs[:, j:j + 1] * sums + weights[:, j:j + 1] * products) % prime
+        shifted_products = (shifted_products - xs[:, j:j + 1] * products) % prime
+        sums = numpy.where(mask[:, j:j + 1], shifted_sums, sums)
+        products = numpy.where(mask[:, j:j + 1], shifted_products, products)
+    sums = [FFPoly(row, prime, variable) for row in sums]
+    for level in levels[:-1]:
+        sums = [sums[i] * level[i + 1] + sums[i + 1] * level[i] for i in range(0, len(level) - 1, 2)] + ([sums[-1]] if len(level) % 2 == 1 else [])
+    return sums[0]
+
+
+def solve_transposed_Vandermonde(nodes, values, prime):
+    """Solution c of the transposed Vandermonde system sum_i c_i * nodes[i] ^ j = values[j] for j < T = len(nodes), nodes distinct.
+    With M(z) = prod_i (z - nodes[i]), c_i = Q(nodes[i]) / M'(nodes[i]) where Q(z) = sum_l z ^ l sum_j values[j] M_{l + j + 1}
+    is a middle product of the values and the coefficients of M. M is the root of the subproduct tree of the nodes, on which Q and M'
+    are then evaluated: O(T ^ 2) vectorized operations up to subproduct_tree_leaf_size nodes, O(M(T) log T) beyond.
+    Returns a native integer array; raises ZeroDivisionError for repeated nodes."""
+    if len(nodes) != len(values):
+        raise ValueError(f"Got {len(nodes)} nodes but {len(values)} values.")
+    if len(nodes) == 0:
+        return numpy.zeros(0, dtype=ff_dtype(prime))
+    nodes, size = _residues(nodes, prime), len(nodes)
+    levels = subproduct_tree(nodes, prime)
+    master = levels[-1][0]
+    derivative = FFPoly(master.coeffs[1:] * numpy.array(range(1, size + 1), dtype=master.coeffs.dtype), prime)
+    middle = FFPoly(convolve_mod(_residues(values, prime), master.coeffs[::-1], prime)[:size][::-1].copy(), prime)
+    return _evaluate_on_tree(middle, levels, nodes) * inverse_mod(_evaluate_on_tree(derivative, levels, nodes), prime) % prime
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class FFSparsePoly(object):
+    """Sparse multivariate polynomial over F_p, as dict {exponents tuple: coefficient}.
+    Conversion to sympy only happens when asked, through as_expr."""
+
+    def __init__(self, terms, prime, variables=('t1', )):
+        self.prime = prime
+        self.variables = tuple(map(str, variables))
+        self.terms = {tuple(exponents): to_residue(coeff, prime) for exponents, coeff in dict(terms).items()}
+        self.terms = {exponents: coeff for exponents, coeff in self.terms.items() if coeff != 0}
+        if any(len(exponents) != len(self.variables) for exponents in self.terms):
+            raise ValueError(f"Exponents do not match the number of variables {self.variables}.")
+
+    @classmethod
+    def from_FFPoly(cls, poly, variables=None):
+        variables = poly.variables if variables is None else variables
+        return cls({(i, ): coeff for i, coeff in enumerate(poly.coeffs) if coeff != 0}, poly.prime, variables)
+
+    def to_FFPoly(self):
+        if len(self.variables) != 1:
+            raise ValueError(f"Only univariate polynomials convert to FFPoly, got variables {self.variables}.")
+        coeffs = [0] * (self.total_degree + 1)
+        for (exponent, ), coeff in self.terms.items():
+            coeffs[exponent] = coeff
+        return FFPoly(coeffs, self.prime, self.variables[0])
+
+    def constant(self, value):
+        return FFSparsePoly({(0, ) * len(self.variables): value}, self.prime, self.variables)
+
+    @property
+    def total_degree(self):
+        """Total degree of the polynomial, -1 for the zero polynomial."""
+        return max((sum(exponents) for exponents in self.terms), default=-1)
+
+    def degree(self, variable):
+        """Degree in the given variable (name or position), -1 for the zero polynomial."""
+        index = self.variables.index(str(variable)) if not isinstance(variable, int) else variable
+        return max((exponents[index] for exponents in self.terms), default=-1)
+
+    def prepend_variable(self, variable, exponent=0):
+        """Same polynomial, seen as a function of one more (leading) variable."""
+        return FFSparsePoly({(exponent, ) + exponents: coeff for exponents, coeff in self.terms.items()}, self.prime, (variable, ) + self.variables)
+
+    def rename(self, variables):
+        return FFSparsePoly(self.terms, self.prime, variables)
+
+    def translated(self, shifts):
+        """The polynomial at (t1 + s1, ..., tn + sn)."""
+        nvars = len(self.variables)
+        linear = [FFSparsePoly({tuple(int(i == j) for j in range(nvars)): 1, (0, ) * nvars: shift}, self.prime, self.variables) for i, shift in enumerate(shifts)]
+        powers = [[self.constant(1)] for i in range(nvars)]
+        result = self.constant(0)
+        for exponents, coeff in self.terms.items():
+            term = self.constant(coeff)
+            for i, exponent in enumerate(exponents):
+                while len(powers[i]) <= exponent:
+                    powers[i].append(powers[i][-1] * linear[i])
+                term = term * powers[i][exponent]
+            result = result + term
+        return result
+
+    # EVALUATION
+
+    def evaluate_first(self, x):
+        """Partial evaluation at t1 = x, as a polynomial in the remaining variables."""
+        x, terms = to_residue(x, self.prime), {}
+        for exponents, coeff in self.terms.items():
+            terms[exponents[1:]] = (terms.get(exponents[1:], 0) + coeff * pow(x, exponents[0], self.prime)) % self.prime
+        return FFSparsePoly(terms, self.prime, self.variables[1:])
+
+    def __call__(self, *xs):
+        """Evaluation at a point (integers or ModP), with powers of each coordinate computed once."""
+        xs = [to_residue(x, self.prime) for x in xs]
+        if len(xs) != len(self.variables):
+            raise TypeError(f"Expected {len(self.variables)} coordinates, got {len(xs)}.")
+        powers = [{} for x in xs]
+        res = 0
+        for exponents, coeff in self.terms.items():
+            term = coeff
+            for x, exponent, cache in zip(xs, exponents, powers):
+                if exponent != 0:
+                    if exponent not in cache:
+                        cache[exponent] = pow(x, exponent, self.prime)
+                    term = term * cache[exponent] % self.prime
+            res += term
+        return ModP(res, self.prime)
+
+    # COMPARISON
+
+    def __eq__(self, other):
+        if isinstance(other, FFSparsePoly):
+            return self.prime == other.prime and self.variables == other.variables and self.terms == other.terms
+        elif isinteger(other) or isinstance(other, (ModP, fractions.Fraction)):
+            return self.terms == self.constant(other).terms
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.prime, self.variables, frozenset(self.terms.items())))
+
+    # ALGEBRA
+
+    @polify
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for exponents, coeff in other.terms.items():
+            terms[exponents] = (terms.get(exponents, 0) + coeff) % self.prime
+        return FFSparsePoly(terms, self.prime, self.variables)
+
+    @polify
+    def __radd__(self, other):
+        return other + self
+
+    @polify
+    def __sub__(self, other):
+        return self + (- other)
+
+    @polify
+    def __rsub__(self, other):
+        return other - self
+
+    def __neg__(self):
+        return FFSparsePoly({exponents: - coeff for exponents, coeff in self.terms.items()}, self.prime, self.variables)
+
+    def __pos__(self):
+        return self
+
+    @polify
+    def __mul__(self, other):
+        terms = {}
+        for exponents1, coeff1 in self.terms.items():
+            for exponents2, coeff2 in other.terms.items():
+                exponents = tuple(e1 + e2 for e1, e2 in zip(exponents1, exponents2))
+                terms[exponents] = (terms.get(exponents, 0) + coeff1 * coeff2) % self.prime
+        return FFSparsePoly(terms, self.prime, self.variables)
+
+    @polify
+    def __rmul__(self, other):
+        return self * other
+
+    def __pow__(self, n):
+        assert (isinstance(n, int) or n.is_integer()) and n >= 0
+        res, base = self.constant(1), self
+        while n > 0:
+            if n % 2 == 1:
+                res = res * base
+            base, n = base * base, n // 2
+        return res
+
+    def __truediv__(self, other):
+        if isinstance(other, FFSparsePoly):
+            return FFRational(self, other)
+        return self * pow(to_residue(other, self.prime), -1, self.prime)
+
+    def __rtruediv__(self, other):
+        return FFRational(self.constant(to_residue(other, self.prime)), self)
+
+    # REPRESENTATION
+
+    def __repr__(self):
+        return f"FFSparsePoly({self.terms}, {self.prime}, {self.variables})"
+
+    def as_expr(self):
+        """Sympy expression, with coefficients in the symmetric representation (as sympy.GF)."""
+        if len(self.terms) == 0:
+            return sympy.Integer(0)
+        return sympy.Poly.from_dict(dict(self.terms), sympy.symbols(self.variables), modulus=self.prime).as_expr()  # from_dict mutates its argument
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class FFRational(object):
+    """Rational function over F_p, as numerator / denominator FFPoly (or FFSparsePoly).
+    Conversion to sympy only happens when asked, through as_expr."""
+
+    def __init__(self, numerator, denominator=None):
+        if denominator is None:
+            denominator = numerator.constant(1)
+        if type(numerator) is not type(denominator) or numerator.prime != denominator.prime:
+            raise ValueError("Numerator and denominator must be polynomials of the same kind over the same field.")
+        if denominator == 0:
+            raise ZeroDivisionError("Rational function with zero denominator.")
+        self.numerator, self.denominator = numerator, denominator
+
+    @property
+    def prime(self):
+        return self.numerator.prime
+
+    @property
+    def variables(self):
+        return self.numerator.variables
+
+    def reduced(self):
+        """Cancels common factors (univariate only) and normalises the denominator to be monic (in lex order if multivariate)."""
+        numerator, denominator = self.numerator, self.denominator
+        if isinstance(numerator, FFPoly):
+            common = numerator.gcd(denominator)
+            numerator, denominator = numerator // common, denominator // common
+            leading_coefficient = denominator.leading_coefficient
+        else:
+            leading_coefficient = denominator.terms[max(denominator.terms)]
+        normalisation = pow(int(leading_coefficient), -1, self.prime)
+        return FFRational(numerator * normalisation, denominator * normalisation)
+
+    # EVALUATION
+
+    def __call__(self, *xs):
+        return self.numerator(*xs) / self.denominator(*xs)
+
+    # COMPARISON
+
+    def __eq__(self, other):
+        if not isinstance(other, FFRational):
+            if isinstance(other, (FFPoly, FFSparsePoly)) or isinteger(other) or isinstance(other, (ModP, fractions.Fraction)):
+                other = FFRational(self.numerator.constant(0) + other)
+            else:
+                return NotImplemented
+        return self.numerator * other.denominator == other.numerator * self.denominator
+
+    def __hash__(self):
+        return hash(self.reduced().as_expr()) if isinstance(self.numerator, FFPoly) else hash((self.numerator, self.denominator))
+
+    # ALGEBRA
+
+    def _cast(self, other):
+        if isinstance(other, FFRational):
+            return other
+        return FFRational(self.numerator.constant(0) + other)
+
+    def __add__(self, other):
+        other = self._cast(other)
+        return FFRational(self.numerator * other.denominator + other.numerator * self.denominator, self.denominator * other.denominator)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        return self + (- self._cast(other))
+
+    def __rsub__(self, other):
+        return self._cast(other) - self
+
+    def __neg__(self):
+        return FFRational(- self.numerator, self.denominator)
+
+    def __mul__(self, other):
+        other = self._cast(other)
+        return FFRational(self.numerator * other.numerator, self.denominator * other.denominator)
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        other = self._cast(other)
+        return FFRational(self.numerator * other.denominator, self.denominator * other.numerator)
+
+    def __rtruediv__(self, other):
+        return self._cast(other) / self
+
+    # REPRESENTATION
+
+    def __repr__(self):
+        return f"FFRational({self.numerator}, {self.denominator})"
+
+    def as_frac_field(self):
+        """Element of sympy.GF(prime).frac_field (canonical form)."""
+        FFGF = sympy.GF(self.prime).frac_field(*sympy.symbols(self.variables))
+        return FFGF(self.numerator.as_expr()) / FFGF(self.denominator.as_expr())
+
+    def as_expr(self):
+        """Sympy expression, normalised as in sympy.GF(prime).frac_field."""
+        return self.as_frac_field().as_expr()
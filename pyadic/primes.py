@@ -16,4 +16,7 @@ primes = (2147483647, 2147483629, 2147483587, 2147483579, 2147483563, 2147483549
           2147481529, 2147481509, 2147481499, 2147481491, 2147481487, 2147481373, 2147481367, 2147481359, 2147481353,
           2147481337, 2147481317)
 
+# primes c * 2 ** k + 1 below 2 ** 31 (products of residues fit in 64 bits), by decreasing k: they admit number theoretic transforms of length up to 2 ** k
+ntt_primes = (2013265921, 1811939329, 469762049, 2113929217, 167772161, 754974721, 998244353)
+
 primes_with_i = [prime for prime in primes if not isinstance(ModP(-1, prime).sqrt(), FieldExtension)]
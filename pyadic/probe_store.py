@@ -0,0 +1,105 @@
+import functools
+import pickle
+import sqlite3
+import threading
+
+from .finite_field import ModP
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+class ProbeStore(object):
+    """Persistent on-disk cache of black-box evaluations (sqlite), keyed by prime, seed and point.
+
+    Interpolators given a probe_store consult it before calling the black box and record new values after,
+    so that a restarted run with the same seed replays cached probes and only evaluates new points.
+    Writes are buffered and committed every flush_every probes, on flush and on close (at most that many are lost if the job is killed).
+    Values in F_prime are stored as integers, other values are pickled; black-box errors are not cached. Safe to use from several threads."""
+
+    def __init__(self, path, flush_every=1000):
+        self.path, self.flush_every = path, flush_every
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS probes (prime TEXT, seed TEXT, point TEXT, value, PRIMARY KEY (prime, seed, point)) WITHOUT ROWID")
+        self._connection.commit()
+        self._lock = threading.RLock()
+        self._buffer, self._loaded = [], {}
+
+    @staticmethod
+    def _point_key(point):
+        return ",".join(map(str, map(int, point)))
+
+    @staticmethod
+    def _encode(value, prime):
+        """Residues mod prime are stored as integers, anything else is pickled."""
+        if isinstance(value, ModP) and value.p == prime and value.n < 2 ** 63:
+            return value.n
+        return pickle.dumps(value)
+
+    @staticmethod
+    def _decode(value, prime):
+        return ModP(value, prime) if isinstance(value, int) else pickle.loads(value)
+
+    def _entries(self, prime, seed):
+        """In-memory dict {point key: value} for (prime, seed), loaded from disk in a single query on first use."""
+        key = (str(prime), str(seed))
+        if key not in self._loaded:
+            rows = self._connection.execute("SELECT point, value FROM probes WHERE prime = ? AND seed = ?", key)
+            self._loaded[key] = {point: self._decode(value, prime) for point, value in rows}
+        return self._loaded[key]
+
+    def get(self, prime, seed, point, default=None):
+        with self._lock:
+            return self._entries(prime, seed).get(self._point_key(point), default)
+
+    def put(self, prime, seed, point, value):
+        with self._lock:
+            point = self._point_key(point)
+            self._entries(prime, seed)[point] = value
+            self._buffer.append((str(prime), str(seed), point, self._encode(value, prime)))
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+
+    def __contains__(self, key):
+        prime, seed, point = key
+        with self._lock:
+            return self._point_key(point) in self._entries(prime, seed)
+
+    def __len__(self):
+        with self._lock:
+            self.flush()
+            return self._connection.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+
+    def flush(self):
+        """Commits buffered probes to disk."""
+        with self._lock:
+            if self._buffer:
+                self._connection.executemany("INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?)", self._buffer)
+                self._connection.commit()
+                self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def cached(self, f, prime, seed):
+        """Black box with the signature of f, answering from the store when possible and recording new evaluations."""
+        missing = object()
+
+        @functools.wraps(f)
+        def cached_black_box(*point):
+            value = self.get(prime, seed, point, missing)
+            if value is missing:
+                value = f(*point)
+                self.put(prime, seed, point, value)
+            return value
+
+        return cached_black_box
@@ -10,7 +10,7 @@ from fractions import Fraction as Q
 
 from pyadic import ModP, PAdic
 from pyadic.finite_field import vec_ModP, extended_euclidean_algorithm, rationalise, MQRR, LGRR, EEARR, \
-    finite_field_sqrt, chained_chinese_remainder, vec_chained_FF_rationalize
+    finite_field_sqrt, chained_chinese_remainder, vec_chained_FF_rationalize, finite_field_polynomial_roots
 from pyadic.field_extension import FieldExtension
 from pyadic.primes import primes
 
@@ -244,3 +244,13 @@ def test_vec_chained_FF_rationalize_invalid_input():
         vec_chained_FF_rationalize(FF_matrices1, used_primes[:1])
     with pytest.raises(AssertionError):
         vec_chained_FF_rationalize([FF_matrices1[0], FF_matrices2[1]], used_primes[:])
+
+
+@pytest.mark.parametrize("p", [2, 3, 10007, 2 ** 31 - 1])
+def test_finite_field_polynomial_roots(p):
+    x = sympy.symbols('x')
+    roots = sorted({random.randrange(p) for i in range(4)})
+    poly = sympy.expand(sympy.prod([x - root for root in roots]) * (x ** 2 + x + 1) ** 2)
+    found = finite_field_polynomial_roots(poly, p)
+    assert set(roots) <= set(map(int, found))
+    assert all(poly.subs(x, int(root)) % p == 0 for root in found)
@@ -1,7 +1,23 @@
+import asyncio
+import collections
 import sympy
 
+import numpy
+import pytest
+import random
+
+from fractions import Fraction as Q
+from concurrent.futures import ThreadPoolExecutor
+
+from pyadic import ModP
+from pyadic.finite_field import rationalise
 from pyadic.interpolation import Newton_polynomial_interpolation, Thiele_rational_interpolation, \
-    multivariate_Newton_polynomial_interpolation
+    multivariate_Newton_polynomial_interpolation, NewtonDividedDifferences, interpolation_t_sequence, \
+    async_Newton_polynomial_interpolation, async_Thiele_rational_interpolation, async_multivariate_Newton_polynomial_interpolation, \
+    vec_Newton_polynomial_interpolation, vec_Thiele_rational_interpolation, sparse_multivariate_polynomial_interpolation, \
+    multivariate_rational_interpolation, multi_prime_interpolation, FFSequenceGenerator, Pade_rational_interpolation, \
+    known_support_polynomial_interpolation, probe_degrees, is_identically_zero, InterpolationTelemetry
+from pyadic.polynomials import FFPoly, FFRational
 
 t = sympy.symbols('t')
 t1, t2, t3 = sympy.symbols('t1:4')
@@ -39,6 +55,34 @@ def test_Newton_polynomial_interpolation_multivariate():
     assert multivariate_Newton_polynomial_interpolation(Ptest2, 2 ** 31 - 1, verbose=True) == (t1 + 2 * t2) + 3 * (t1 * t2) + t3 ** 5
 
 
+def test_Newton_polynomial_interpolation_multivariate_non_polynomial():
+    with pytest.raises(RuntimeError, match="did not terminate"):
+        multivariate_Newton_polynomial_interpolation(lambda t1, t2: 1 / t1 + t2, 2 ** 31 - 1)
+
+
+def test_async_Newton_polynomial_interpolation_multivariate_non_polynomial(monkeypatch):
+    async def non_polynomial(t1, t2):
+        return 1 / t1 + t2
+
+    monkeypatch.setattr("pyadic.interpolation.max_multivariate_samples", 100)
+    with pytest.raises(RuntimeError, match="did not terminate"):
+        asyncio.run(async_multivariate_Newton_polynomial_interpolation(non_polynomial, 2 ** 31 - 1))
+
+
+def test_Newton_polynomial_interpolation_native_high_degree():
+    prime = 2 ** 31 - 1
+    coeffs = [random.randrange(prime) for i in range(301)]
+    result = Newton_polynomial_interpolation(lambda tval: FFPoly(coeffs, prime)(tval), prime, as_native=True)
+    assert isinstance(result, FFPoly) and result == FFPoly(coeffs, prime)
+
+
+def test_Newton_divided_differences_repeated_point():
+    divided_differences = NewtonDividedDifferences(2 ** 31 - 1)
+    divided_differences.add(5, 1)
+    with pytest.raises(ZeroDivisionError):
+        divided_differences.add(ModP(5, 2 ** 31 - 1), 2)
+
+
 def test_Thiele_rational_interpolation_trivial():
     assert Thiele_rational_interpolation(Rtest0, 2 ** 31 - 61, verbose=True) == 1
 
@@ -95,3 +139,321 @@ def test_Thiele_rational_interpolation_skips_zerodivision():
 
     assert result == (t**20 + t - 1) / (5 - t)
     assert Ptest.calls >= 3  # sanity check that the exception path was hit
+
+
+@pytest.mark.parametrize("batch_size", [None, 1, 3, 8])
+def test_parallel_interpolation_matches_serial(batch_size):
+    prime = 2 ** 31 - 1
+    bad_t = interpolation_t_sequence(5, prime)[4]
+
+    def Rtest_with_error(tval):
+        if tval == bad_t:
+            raise ZeroDivisionError("Intentional test failure on the 5th sample")
+        return (tval ** 20 + tval - 1) / (5 - tval)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert (Newton_polynomial_interpolation(Ptest1, prime, as_native=True, executor=executor, batch_size=batch_size) ==
+                Newton_polynomial_interpolation(Ptest1, prime, as_native=True))
+        parallel = Thiele_rational_interpolation(Rtest_with_error, prime, as_continued_fraction=True, executor=executor, batch_size=batch_size)
+    assert parallel == Thiele_rational_interpolation(Rtest_with_error, prime, as_continued_fraction=True)
+
+
+def test_async_interpolation_matches_serial():
+    prime = 2 ** 31 - 1
+    bad_t = interpolation_t_sequence(3, prime)[2]
+
+    async def aPtest1(tval):
+        await asyncio.sleep(0)
+        return Ptest1(tval)
+
+    async def aRtest1(tval):
+        await asyncio.sleep(0)
+        if tval == bad_t:
+            raise ZeroDivisionError("Intentional test failure on the 3rd sample")
+        return Rtest1(tval)
+
+    async def aPtest2(t1, t2, t3):
+        await asyncio.sleep(0)
+        return Ptest2(t1, t2, t3)
+
+    async def interpolate_all():
+        return await asyncio.gather(async_Newton_polynomial_interpolation(aPtest1, prime, max_in_flight=5),
+                                    async_Thiele_rational_interpolation(aRtest1, prime, max_in_flight=3, as_continued_fraction=True),
+                                    async_multivariate_Newton_polynomial_interpolation(aPtest2, prime, max_in_flight=4))
+
+    newton, thiele, multivariate = asyncio.run(interpolate_all())
+    assert newton == Newton_polynomial_interpolation(Ptest1, prime)
+    assert thiele == Thiele_rational_interpolation(lambda tval: asyncio.run(aRtest1(tval)), prime, as_continued_fraction=True)
+    assert multivariate == (t1 + 2 * t2) + 3 * (t1 * t2) + t3 ** 5
+
+
+def test_async_interpolation_too_many_skips():
+    async def failing(tval):
+        raise AssertionError("Intentional test failure")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(async_Newton_polynomial_interpolation(failing, 2 ** 31 - 1, max_in_flight=4))
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+def test_vec_interpolation_matches_componentwise(prime):
+    rationals = [Rtest0, Rtest1, lambda tval: 1 / (tval ** 5 + 7 * tval), lambda tval: tval ** 2]
+    polynomials = [Ptest0, Ptest1, lambda tval: 5 * tval ** 7 + 7 * tval, lambda tval: tval ** 2]
+    thiele = vec_Thiele_rational_interpolation(lambda tval: numpy.array([[f(tval) for f in rationals[:2]], [f(tval) for f in rationals[2:]]]), prime)
+    newton = vec_Newton_polynomial_interpolation(lambda tval: [f(tval) for f in polynomials], prime, as_native=True)
+    assert thiele.shape == (2, 2) and list(thiele.ravel()) == [Thiele_rational_interpolation(f, prime) for f in rationals]
+    assert newton.shape == (4, ) and list(newton) == [Newton_polynomial_interpolation(f, prime, as_native=True) for f in polynomials]
+
+
+def test_sparse_multivariate_polynomial_interpolation():
+    assert sparse_multivariate_polynomial_interpolation(Ptest2, 2 ** 31 - 1) == (t1 + 2 * t2) + 3 * (t1 * t2) + t3 ** 5
+    assert sparse_multivariate_polynomial_interpolation(lambda t1, t2: t1 - t1, 2 ** 31 - 1) == 0
+    probes = []
+    sparse_multivariate_polynomial_interpolation(lambda *ts: probes.append(ts) or Ptest2(*ts), 2 ** 31 - 1, nvars=3)
+    anchors = set(map(int, probes[0][1:]))
+    assert not anchors & set(map(int, interpolation_t_sequence(len(probes), 2 ** 31 - 1))) and all(probe[1:] == probes[0][1:] for probe in probes[:3])
+
+
+def test_sparse_multivariate_polynomial_interpolation_singular_at_ones():
+    assert sparse_multivariate_polynomial_interpolation(lambda t1, t2, t3: (t1 ** 2 - t2 ** 2) / (t1 - t2) + t3, 2 ** 31 - 1) == t1 + t2 + t3
+    assert sparse_multivariate_polynomial_interpolation(lambda t1, t2: (t1 ** 3 - 1) / (t1 - 1) * t2, 2 ** 31 - 1) == t1 ** 2 * t2 + t1 * t2 + t2
+
+
+def test_sparse_multivariate_polynomial_interpolation_many_variables():
+    ts = sympy.symbols('t1:8')
+    expr = 7 * ts[0] ** 3 * ts[6] + ts[1] * ts[2] * ts[3] ** 2 - 5 * ts[4] ** 4 + ts[5] + 11
+    black_box = sympy.lambdify(ts, expr)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert sparse_multivariate_polynomial_interpolation(black_box, 2 ** 31 - 1, executor=executor) == expr
+
+
+def test_multivariate_rational_interpolation():
+    expr = (t1 ** 2 + 3 * t2 * t3 - 1) / (t1 * t2 - 7 * t3 ** 2 + 2)
+    result, calls = multivariate_rational_interpolation(sympy.lambdify((t1, t2, t3), expr), 2 ** 31 - 1, with_calls=True)
+    assert result == expr and calls < 200
+    assert multivariate_rational_interpolation(lambda t1: Rtest1(t1), 2 ** 31 - 1) == (- t1 ** 20 - t1 + 1) / (t1 - 5)
+
+
+def test_multi_prime_interpolation():
+    def black_box(t1, t2, t3):
+        return (Q(3, 7) * t1 ** 2 + Q(123456789123, 11) * t2 * t3 - 1) / (t1 * t2 - Q(7, 13) * t3 ** 2 + 2)
+
+    result, calls = multi_prime_interpolation(black_box, with_calls=True)
+    _, first_prime_calls = multivariate_rational_interpolation(black_box, 2 ** 31 - 1, with_calls=True)
+    assert sympy.simplify(result - (sympy.Rational(3, 7) * t1 ** 2 + sympy.Rational(123456789123, 11) * t2 * t3 - 1) /
+                          (t1 * t2 - sympy.Rational(7, 13) * t3 ** 2 + 2)) == 0
+    assert calls < 2 * first_prime_calls  # further primes only solve for the coefficients
+    assert multi_prime_interpolation(lambda t: Q(1, 3) * t ** 4 - 5, Newton_polynomial_interpolation) == sympy.Rational(1, 3) * t ** 4 - 5
+
+
+def test_multi_prime_interpolation_too_many_skips():
+    def singular_beyond_first_prime(t1, t2):
+        if t1.p != 2 ** 31 - 1:
+            raise ZeroDivisionError("Intentional test failure beyond the first prime")
+        return t1 * t2 + Q(1, 3)
+
+    with pytest.raises(RuntimeError, match="skips"):
+        multi_prime_interpolation(singular_beyond_first_prime, sparse_multivariate_polynomial_interpolation, max_skips=5)
+
+
+def test_known_support_polynomial_interpolation():
+    expr = 7 * t1 ** 3 * t3 + t2 ** 2 - 5 * t1 * t2 * t3 + 11
+    support = [(3, 0, 1), (0, 2, 0), (1, 1, 1), (0, 0, 0), (2, 2, 2)]  # an ansatz with one spurious monomial
+    calls = []
+
+    def black_box(*ts):
+        calls.append(ts)
+        return sympy.lambdify((t1, t2, t3), expr)(*ts)
+
+    assert known_support_polynomial_interpolation(black_box, support, 2 ** 31 - 1) == expr and len(calls) == len(support)
+    assert known_support_polynomial_interpolation(black_box, [], 2 ** 31 - 1, variables=['t1', 't2', 't3']) == 0
+    singular = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+    assert known_support_polynomial_interpolation(lambda t1, t2, t3: (t1 ** 2 - t2 ** 2) / (t1 - t2) + t3, singular, 2 ** 31 - 1) == t1 + t2 + t3
+    calls.clear()
+
+    def failing_once(*ts):
+        if len(calls) == 1:
+            calls.append(None)
+            raise ZeroDivisionError("Intentional test failure on the 2nd probe")
+        return black_box(*ts)
+
+    assert known_support_polynomial_interpolation(failing_once, support, 2 ** 31 - 1) == expr and len(calls) == 2 + len(support)
+    with pytest.raises(RuntimeError):
+        known_support_polynomial_interpolation(lambda t1, t2, t3: 1 / (t1 - t1), singular, 2 ** 31 - 1)
+
+
+def test_multi_prime_interpolation_polynomial():
+    def black_box(t1, t2):
+        return Q(3, 7) * t1 ** 5 * t2 + Q(123456789123, 11) * t2 ** 3 - 1
+
+    result = multi_prime_interpolation(black_box, sparse_multivariate_polynomial_interpolation)
+    assert result == sympy.Rational(3, 7) * t1 ** 5 * t2 + sympy.Rational(123456789123, 11) * t2 ** 3 - 1
+    result = multi_prime_interpolation(lambda t1, t2, t3: (t1 ** 2 - t2 ** 2) / (t1 - t2) + Q(1, 7) * t3, sparse_multivariate_polynomial_interpolation)
+    assert result == t1 + t2 + sympy.Rational(1, 7) * t3
+
+
+def test_probe_degrees():
+    expr = (t1 ** 3 * t2 + 3 * t2 * t3 - 1) / (t1 * t2 - 7 * t3 ** 2 + 2)
+    black_box = sympy.lambdify((t1, t2, t3), expr)
+    bounds = probe_degrees(black_box, 3, 2 ** 31 - 1)
+    assert bounds.numerator == (3, 1, 1) and bounds.denominator == (1, 1, 2) and bounds.total == (4, 2)
+    assert bounds.probes < 3 * 2 * (4 + 2 + 2)
+    result, calls = multivariate_rational_interpolation(black_box, 2 ** 31 - 1, with_calls=True, degree_bounds=bounds.total)
+    assert result == expr and calls < multivariate_rational_interpolation(black_box, 2 ** 31 - 1, with_calls=True)[1]
+
+
+def test_interpolation_with_degree_bounds():
+    calls = []
+
+    def black_box(t):
+        calls.append(t)
+        return Ptest1(t)
+
+    assert Newton_polynomial_interpolation(black_box, 2 ** 31 - 1, degree_bound=20) == Ptest1(t) and len(calls) == 21
+    calls.clear()
+    assert Thiele_rational_interpolation(lambda t: black_box(t) / (t - 5), 2 ** 31 - 1, degree_bounds=(20, 1)) == Ptest1(t) / (t - 5)
+    assert len(calls) == 40
+    with pytest.raises(ValueError):
+        Thiele_rational_interpolation(lambda t: black_box(t) / (t - 5), 2 ** 31 - 1, method="Pade", degree_bounds=(20, 1))
+    polynomial = t1 ** 3 * t2 + t2 ** 4 + 5
+    assert sparse_multivariate_polynomial_interpolation(sympy.lambdify((t1, t2), polynomial), 2 ** 31 - 1, degree_bounds=(3, 4)) == polynomial
+
+
+def test_is_identically_zero():
+    calls = []
+
+    def identity(t1, t2):
+        calls.append((t1, t2))
+        return (t1 + t2) ** 2 - t1 ** 2 - 2 * t1 * t2 - t2 ** 2
+
+    is_zero, error_bound = is_identically_zero(identity, 2, 2 ** 31 - 1, degree_bound=2, confidence=1 - 1e-15, with_error_bound=True)
+    assert is_zero and error_bound <= 1e-15 and len(calls) == 2
+    calls.clear()
+    assert is_identically_zero(lambda t1, t2: identity(t1, t2) + t1 ** 2 / (t2 - t1), 2, 2 ** 31 - 1, degree_bound=2) is False and len(calls) == 1
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert is_identically_zero(identity, 2, 2 ** 31 - 1, degree_bound=2, executor=executor)
+        assert not is_identically_zero(lambda t1, t2: t1 * t2 - 1, 2, 2 ** 31 - 1, degree_bound=2, executor=executor)
+    assert is_identically_zero(lambda t: (t ** 2 - 1) / (t - 1) - t - 1, 1, 2 ** 31 - 1, degree_bound=2, padic_digits=5)
+    assert not is_identically_zero(lambda t: 7 ** 3 * t, 1, 7, degree_bound=1, padic_digits=5, confidence=0.99)
+    with pytest.raises(ValueError):
+        is_identically_zero(identity, 2, 7, degree_bound=10)
+    with pytest.raises(ValueError):
+        is_identically_zero(identity, 2, 2 ** 31 - 1, degree_bound=2, confidence=1)
+
+
+def test_padic_interpolation():
+    prime, calls = 2 ** 31 - 1, []
+
+    def rational(tval):
+        calls.append(tval)
+        return (3 * tval ** 2 + tval / 5 - Q(7, 11)) / (tval - Q(2, 3))
+
+    numerator, denominator = Thiele_rational_interpolation(rational, prime, padic_digits=3)
+    assert [rationalise(coeff) for coeff in numerator] == [Q(-7, 11), Q(1, 5), 3] and [rationalise(coeff) for coeff in denominator] == [Q(-2, 3), 1]
+    padic_calls, calls[:] = len(calls), []
+    Thiele_rational_interpolation(rational, prime)
+    assert padic_calls == len(calls) == 5
+    coeffs = Newton_polynomial_interpolation(lambda tval: Q(10 ** 30 + 1, 7 ** 20) * tval ** 4 - Q(5, 3) * tval, prime, padic_digits=8)
+    assert [rationalise(coeff) for coeff in coeffs] == [0, Q(-5, 3), 0, 0, Q(10 ** 30 + 1, 7 ** 20)]
+    assert Newton_polynomial_interpolation(lambda tval: tval ** 3, prime, padic_digits=2, degree_bound=3) == [0, 0, 0, 1]
+    with pytest.raises(ValueError, match="precision"):
+        Newton_polynomial_interpolation(lambda tval: (tval ** 2 - tval) / 101 ** 2, 101, padic_digits=1)
+    assert [rationalise(coeff) for coeff in Newton_polynomial_interpolation(lambda tval: (tval ** 2 - tval) / 101 ** 2, 101, padic_digits=3)] == \
+        [0, Q(-1, 101 ** 2), Q(1, 101 ** 2)]
+    with pytest.raises(ValueError):
+        Thiele_rational_interpolation(rational, prime, method="Pade", padic_digits=3)
+
+
+def test_interpolation_telemetry():
+    prime, seen = 2 ** 31 - 1, []
+
+    def singular(tval):
+        if int(tval) == int(FFSequenceGenerator(prime, 0)[1]):
+            raise ZeroDivisionError
+        return Ptest1(tval)
+
+    with InterpolationTelemetry() as outer, InterpolationTelemetry(callback=seen.append) as telemetry:
+        assert Newton_polynomial_interpolation(singular, prime) == t ** 20 + t - 1
+        assert multivariate_Newton_polynomial_interpolation(Ptest2, prime) == Ptest2(t1, t2, t3)
+    assert seen == telemetry.events == outer.events and telemetry.runs == []
+    samples = [event for event in seen if event["event"] == "sample"]
+    assert [event["index"] for event in samples[:24]] == list(range(24)) and [event["error"] for event in samples[:3]] == [None, "ZeroDivisionError", None]
+    assert all(event["wall_time"] >= 0 and event["reconstruction_time"] >= 0 for event in samples)
+    totals = telemetry.totals()
+    assert totals["Newton_polynomial_interpolation"]["skips"] == 1 and totals["Newton_polynomial_interpolation"]["max_depth"] == 2
+    assert totals["multivariate_Newton_polynomial_interpolation"]["runs"] == 1 + 4 and totals["multivariate_Newton_polynomial_interpolation"]["max_depth"] == 1
+    assert totals["Newton_polynomial_interpolation"]["samples"] == 24 + 33 and totals["multivariate_Newton_polynomial_interpolation"]["samples"] == 4 + 12
+    assert "assembly" in totals["Newton_polynomial_interpolation"]["stages"]
+    assert telemetry.summary().splitlines()[1].startswith("Newton_polynomial_interpolation")
+    seen.clear()
+    Newton_polynomial_interpolation(Ptest1, prime)
+    assert seen == []
+
+
+def test_interpolation_telemetry_concurrent_runs():
+    prime = 2 ** 31 - 1
+
+    async def polynomial(tval):
+        await asyncio.sleep(0)
+        return tval ** 10 + 1
+
+    async def rational(tval):
+        await asyncio.sleep(0)
+        return Rtest1(tval)
+
+    async def interpolate_both():
+        return await asyncio.gather(async_Newton_polynomial_interpolation(polynomial, prime, max_in_flight=3),
+                                    async_Thiele_rational_interpolation(rational, prime, max_in_flight=2))
+
+    with InterpolationTelemetry() as telemetry:
+        asyncio.run(interpolate_both())
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda black_box: Newton_polynomial_interpolation(black_box, prime), [Ptest1, lambda tval: tval ** 10 + 1]))
+    finished = [(event["caller"], event["depth"], event["samples"]) for event in telemetry.events if event["event"] == "finished"]
+    assert sorted(finished) == sorted([("async_Newton_polynomial_interpolation", 0, 13), ("async_Thiele_rational_interpolation", 0, 41),
+                                       ("Newton_polynomial_interpolation", 0, 23), ("Newton_polynomial_interpolation", 0, 13)])
+    samples = collections.Counter(event["caller"] for event in telemetry.events if event["event"] == "sample")
+    assert samples["async_Newton_polynomial_interpolation"] == 13 and samples["async_Thiele_rational_interpolation"] == 41
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+def test_FFSequenceGenerator_random_access_and_batches(prime):
+    global_state = random.getstate()
+    generator = FFSequenceGenerator(prime, seed=7)
+    sequence = [next(generator) for i in range(100)]
+    assert random.getstate() == global_state
+    assert sequence == FFSequenceGenerator(prime, seed=7)[0:100] == interpolation_t_sequence(100, prime, seed=7)
+    assert sequence[42] == FFSequenceGenerator(prime, seed=7)[42] == FFSequenceGenerator(prime, seed=7, start=42).batch(1)[0]
+    assert sequence != interpolation_t_sequence(100, prime, seed=8)
+    assert all(0 < value < prime for value in FFSequenceGenerator(prime, seed=7).batch(1000))
+
+
+def test_FFSequenceGenerator_thread_safe():
+    prime = 2 ** 31 - 1
+    generator = FFSequenceGenerator(prime, seed=0)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        drawn = list(executor.map(lambda i: next(generator), range(2000)))
+    assert sorted(map(int, drawn)) == sorted(map(int, interpolation_t_sequence(2000, prime)))
+
+
+@pytest.mark.parametrize("black_box", [Rtest0, Rtest1, lambda tval: 0 * tval, lambda tval: tval ** 5, lambda tval: 1 / (tval ** 3 + 2)])
+def test_Pade_rational_interpolation_matches_Thiele(black_box):
+    prime = 2 ** 31 - 1
+    thiele = Thiele_rational_interpolation(black_box, prime, as_native=True)
+    assert Pade_rational_interpolation(black_box, prime, as_native=True) == thiele
+    assert Thiele_rational_interpolation(black_box, prime, method="Pade", as_native=True) == thiele
+
+
+def test_Pade_rational_interpolation_telemetry():
+    with InterpolationTelemetry() as telemetry:
+        Pade_rational_interpolation(Rtest1, 2 ** 31 - 1, as_native=True)
+        Pade_rational_interpolation(Rtest1, 2 ** 31 - 1)
+    assert [event["event"] for event in telemetry.events if event["event"] != "sample"] == ["finished", "stage"] * 2
+
+
+def test_Pade_rational_interpolation_high_degree():
+    prime = 2 ** 31 - 1
+    numerator = FFPoly([random.randrange(prime) for i in range(61)], prime)
+    denominator = FFPoly([random.randrange(prime) for i in range(60)] + [1], prime)
+    result = Pade_rational_interpolation(lambda tval: numerator(tval) / denominator(tval), prime, as_native=True)
+    assert result == FFRational(numerator, denominator) and result.denominator == denominator
@@ -0,0 +1,78 @@
+import numpy
+import pytest
+
+from fractions import Fraction as Q
+
+from pyadic import PAdic, LazyPAdic
+from pyadic.finite_field import rationalise
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def test_isscalar():
+    assert numpy.isscalar(LazyPAdic(3, 7))
+
+
+def test_invalid_instantiation():
+    with pytest.raises(ValueError):
+        LazyPAdic(3)
+    with pytest.raises(ValueError):
+        LazyPAdic(3, 7) + LazyPAdic(3, 11)
+
+
+def test_cancellation_is_compensated_on_demand():
+    p = 2 ** 31 - 1
+    x, y = LazyPAdic(1, p), LazyPAdic(1 - p, p)
+    fixed = 1 / (PAdic(1, p, 3) - PAdic(1 - p, p, 3)) - Q(1, p)
+    lazy = 1 / (x - y) - Q(1, p) + 1
+    assert fixed.k == 0
+    assert lazy.to_precision(3).k >= 3
+    assert lazy == 1
+
+
+def test_black_box_is_evaluated_only_as_needed():
+    p = 2 ** 31 - 1
+    working_precisions = []
+
+    def black_box(k):
+        working_precisions.append(k)
+        x = PAdic(Q(3, 7), p, k)
+        return (x + p ** 3) - x  # loses three digits
+
+    value = LazyPAdic(black_box, p)
+    assert working_precisions == []
+    assert value.to_precision(2).k >= 2
+    assert rationalise(value * 5 / 7) == Q(5 * p ** 3, 7)
+    calls = len(working_precisions)
+    str(value)
+    assert len(working_precisions) == calls  # cached
+
+
+def test_digit_generator():
+    def digits():
+        while True:
+            yield 6
+    minus_one = LazyPAdic.from_digits(digits(), 7)
+    assert minus_one == -1
+    assert str(minus_one) == str(PAdic(-1, 7, 5))
+
+
+def test_hash_consistent_with_equality():
+    p = 2 ** 31 - 1
+    x, y = LazyPAdic(1, p), LazyPAdic(1 - p, p)
+    lazy, exact = 1 / (x - y) - Q(1, p) + 1, LazyPAdic(1, p)
+    assert lazy == exact and hash(lazy) == hash(exact)
+    assert LazyPAdic(PAdic(Q(3, 7), p, 2), p) == LazyPAdic(Q(3, 7), p) and hash(LazyPAdic(PAdic(Q(3, 7), p, 2), p)) == hash(LazyPAdic(Q(3, 7), p))
+    assert len({lazy, exact, LazyPAdic(2, p), x - x}) == 3 and {LazyPAdic(0, p): "zero"}[x - x] == "zero"
+
+
+def test_comparison_by_valuation():
+    p = 7
+    assert LazyPAdic(Q(1, 7), p) > LazyPAdic(1, p) > LazyPAdic(7, p)
+    assert LazyPAdic(49, p) < LazyPAdic(Q(2, 3), p)
+
+
+def test_rationalise():
+    assert rationalise(LazyPAdic(Q(7, 13), 2 ** 31 - 1)) == Q(7, 13)
+    assert rationalise(LazyPAdic(Q(49, 2), 7) ** 2) == Q(49, 2) ** 2
@@ -1,14 +1,16 @@
 import pickle
 import random
 import numpy
+import sympy
 import pyadic
 import pytest
 import hashlib
 
 from fractions import Fraction as Q
 
-from pyadic import PAdic
-from pyadic.padic import padic_sqrt, padic_log
+from pyadic import PAdic, ModP
+from pyadic.padic import PrecisionTelemetry, padic_sqrt, padic_log, padic_exp, vec_padic_log, vec_padic_exp, padic_roots, multivariate_Hensel_lifting
+from pyadic.finite_field import univariate_finite_field_solver
 from pyadic.finite_field import rationalise, LGRR, MQRR
 
 
@@ -191,3 +193,91 @@ def test_padic_log():
 
 def test_trivial_padic_log():
     assert padic_log(1) == 0
+
+
+@pytest.mark.parametrize("p", [2, 3, 7, 2 ** 31 - 1])
+def test_padic_exp_log_inverse(p):
+    k = 12
+    x = PAdic(random.randrange(1, p ** k), p, k, 2 if p == 2 else 1)
+    assert padic_log(padic_exp(x)) == x
+    assert padic_exp(x + x) == padic_exp(x) * padic_exp(x)
+
+
+def test_padic_exp_outside_radius_of_convergence():
+    with pytest.raises(ValueError):
+        padic_exp(PAdic(3, 7, 5))
+
+
+def test_vec_padic_log_and_exp():
+    p, k = 2 ** 31 - 1, 6
+    ws = [PAdic(random.randrange(1, p ** k), p, k, n) for n in (-1, 0, 0, 2)]
+    assert numpy.all(vec_padic_log(ws) == numpy.array([padic_log(w) for w in ws]))
+    xs = numpy.array([PAdic(random.randrange(1, p ** k), p, k, n) for n in (1, 1, 3, 2)]).reshape(2, 2)
+    assert numpy.all(vec_padic_exp(xs) == numpy.vectorize(padic_exp, otypes=[object])(xs))
+    with pytest.raises(ValueError):
+        vec_padic_log([PAdic(2, p, k), PAdic(2, p, k + 1)])
+
+
+def test_padic_roots_lift_to_full_precision():
+    p, k = 2 ** 31 - 1, 10
+    roots = padic_roots("x ** 5 - 3 * x + 1", p, k)
+    assert len(roots) >= 1
+    assert all((root ** 5 - 3 * root + 1).n >= k for root in roots)
+
+
+def test_padic_roots_rational_coefficients_and_sqrt_specialisation():
+    p, k = 7, 6
+    roots = padic_roots([1, 0, -Q(2, 9)], p, k)
+    assert len(roots) == 2 and all(root ** 2 == PAdic(Q(2, 9), p, k) for root in roots)
+    assert padic_sqrt(PAdic(Q(2, 9), p, k)) in roots
+
+
+def test_padic_roots_reports_singular_roots():
+    roots, singular_roots = padic_roots("(x - 1) ** 2 * (x - 3)", 7, 4, with_singular=True)
+    assert roots == [PAdic(3, 7, 4)]
+    assert singular_roots == [1]
+
+
+def test_multivariate_Hensel_lifting_from_finite_field_solver():
+    p, k = 10007, 6
+    x, y = sympy.symbols('x y')
+    point = univariate_finite_field_solver("x ** 2 + 2 ** 2 - 7", {y: 2}, p)[0]
+    lifted = multivariate_Hensel_lifting(["x ** 2 + y ** 2 - 7"], point, p, k, variables=[x, y])
+    assert lifted[y] == PAdic(2, p, k) and ModP(lifted[x]) == point[x]
+    assert (lifted[x] ** 2 + lifted[y] ** 2 - 7).n >= k
+
+
+def test_multivariate_Hensel_lifting_black_box():
+    p, k = 101, 8
+
+    def system(a, b):
+        return (a ** 2 + b ** 3 - 12, a * b - 5)
+
+    point = next((a, b) for a in range(p) for b in range(p) if all(value % p == 0 for value in system(a, b)))
+    lifted = multivariate_Hensel_lifting(system, point, p, k)
+    assert all(value == 0 or value.n >= k for value in system(*lifted))
+    with_jacobian = multivariate_Hensel_lifting(system, point, p, k, jacobian=lambda a, b: [[2 * a, 3 * b ** 2], [b, a]])
+    assert lifted == with_jacobian == multivariate_Hensel_lifting(["x ** 2 + y ** 3 - 12", "x * y - 5"], point, p, k, variables=sympy.symbols('x y'))
+
+
+def test_multivariate_Hensel_lifting_singular_jacobian():
+    x, y = sympy.symbols('x y')
+    with pytest.raises(ValueError):
+        multivariate_Hensel_lifting(["x ** 2 - y ** 2", "x - y"], {x: 1, y: 1}, 7, 4)
+
+
+def test_precision_telemetry():
+    p = 2 ** 31 - 1
+    x, y = PAdic(1, p, 5), PAdic(1 - p, p, 5)
+    with PrecisionTelemetry(by_call_site=True) as outer:
+        with PrecisionTelemetry() as inner:
+            1 / (x - y)
+        x * y
+    assert pyadic.padic.precision_telemetry is None
+    assert inner.as_dict()["operations"].keys() == {"__add__", "__truediv__"}
+    stats = outer.as_dict()
+    assert stats["operations"]["__add__"] == {"count": 1, "digits_lost": 1, "max_digits_lost": 1, "min_precision": 4}
+    assert stats["operations"]["__truediv__"]["digits_lost"] == 1
+    assert stats["operations"]["__mul__"]["count"] == 1
+    assert stats["min_precision"] == 4
+    assert len(stats["call_sites"]) == 2 and all(__file__ in call_site for call_site in stats["call_sites"])
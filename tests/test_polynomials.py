@@ -0,0 +1,198 @@
+import numpy
+import pytest
+import random
+import sympy
+
+from fractions import Fraction as Q
+
+from pyadic import ModP
+from pyadic.polynomials import FFPoly, FFSparsePoly, FFRational, inverse_mod, rational_reconstruction, ntt, convolve_mod, half_gcd, _schoolbook_convolve, \
+    multipoint_evaluation, interpolate_at_points, subproduct_tree, solve_transposed_Vandermonde, square_free_decomposition, partial_fractions, \
+    padic_partial_fractions
+from pyadic.primes import ntt_primes
+
+prime = 2 ** 31 - 1
+t = sympy.symbols('t')
+t1, t2, t3 = sympy.symbols('t1:4')
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+
+
+def random_FFPoly(degree):
+    return FFPoly([random.randrange(prime) for i in range(degree)] + [random.randrange(1, prime)], prime)
+
+
+def test_FFPoly_trims_leading_zeros():
+    assert FFPoly([1, 2, 0, prime], prime).degree == 1
+    assert FFPoly([0, 0], prime).degree == -1 and FFPoly([0, 0], prime) == 0
+
+
+def test_FFPoly_arithmetic_matches_sympy():
+    a, b = random_FFPoly(7), random_FFPoly(4)
+    for res, expr in [(a + b, a.as_expr() + b.as_expr()), (a - b, a.as_expr() - b.as_expr()), (a * b, a.as_expr() * b.as_expr()),
+                      (a ** 3, a.as_expr() ** 3), (3 - a, 3 - a.as_expr())]:
+        assert sympy.Poly(res.as_expr() - expr, t, modulus=prime).is_zero
+
+
+def test_FFPoly_divmod_and_gcd():
+    a, b, c = random_FFPoly(9), random_FFPoly(4), random_FFPoly(3)
+    quotient, remainder = divmod(a, b)
+    assert quotient * b + remainder == a and remainder.degree < b.degree
+    assert (a * c).gcd(b * c) == c.monic()
+
+
+def test_FFPoly_evaluation():
+    a = random_FFPoly(6)
+    xs = [ModP(random.randrange(prime), prime) for i in range(5)]
+    assert [a(x) for x in xs] == [ModP(a.as_expr().subs(t, int(x)), prime) for x in xs]
+    assert numpy.all(a.evaluate(xs) == numpy.array([int(a(x)) for x in xs]))
+
+
+def test_FFPoly_different_fields():
+    with pytest.raises(ValueError):
+        FFPoly([1, 1], prime) + FFPoly([1, 1], 7)
+
+
+def test_FFSparsePoly_arithmetic_and_evaluation():
+    a = FFSparsePoly({(1, 0, 0): 1, (0, 1, 0): 2, (1, 1, 0): 3, (0, 0, 5): 1}, prime, ('t1', 't2', 't3'))
+    b = FFSparsePoly({(0, 0, 1): Q(1, 2), (2, 0, 0): -1}, prime, ('t1', 't2', 't3'))
+    assert a.as_expr() == (t1 + 2 * t2) + 3 * (t1 * t2) + t3 ** 5
+    assert sympy.Poly((a * b - 2 * a + b ** 2).as_expr() - (a.as_expr() * b.as_expr() - 2 * a.as_expr() + b.as_expr() ** 2),
+                      t1, t2, t3, modulus=prime).is_zero
+    point = [ModP(random.randrange(prime), prime) for i in range(3)]
+    assert a(*point) == ModP(a.as_expr().subs(dict(zip((t1, t2, t3), map(int, point)))), prime)
+    assert a.total_degree == 5 and a.degree('t1') == 1
+
+
+def test_FFRational():
+    a, b, c = random_FFPoly(3), random_FFPoly(2), random_FFPoly(1)
+    r = (a * c) / (b * c)
+    x = ModP(random.randrange(prime), prime)
+    assert r(x) == a(x) / b(x)
+    assert isinstance(r, FFRational) and r == a / b and r.reduced().denominator.degree == b.degree
+    assert (r + 1 - r * 2) * 3 == (3 - 3 * r)
+    assert (FFPoly([1, 0, 1], prime) / FFPoly([-5, 1], prime)).as_expr() == (t ** 2 + 1) / (t - 5)
+
+
+def test_inverse_mod():
+    xs = [random.randrange(1, prime) for i in range(17)]
+    assert all(numpy.array(xs) * inverse_mod(xs, prime) % prime == 1)
+    with pytest.raises(ZeroDivisionError):
+        inverse_mod([1, 0, 2], prime)
+
+
+def test_FFSparsePoly_translated():
+    poly = FFSparsePoly({(2, 1): 3, (0, 0): 5}, prime, ('t1', 't2'))
+    assert poly.translated([1, -2]).as_expr() == sympy.expand(3 * (t1 + 1) ** 2 * (t2 - 2) + 5)
+
+
+def test_FFSparsePoly_evaluate_first_and_to_FFPoly():
+    poly = FFSparsePoly({(2, 1, 0): 3, (1, 0, 2): 7, (0, 0, 2): 1, (0, 0, 0): 5}, prime, ('t1', 't2', 't3'))
+    partial = poly.evaluate_first(ModP(2, prime))
+    assert partial.variables == ('t2', 't3') and partial.as_expr() == 12 * t2 + 15 * t3 ** 2 + 5
+    assert partial.evaluate_first(3).to_FFPoly() == FFPoly([41, 0, 15], prime, 't3')
+    with pytest.raises(ValueError):
+        partial.to_FFPoly()
+
+
+def test_rational_reconstruction():
+    numerator, denominator = random_FFPoly(3), random_FFPoly(2)
+    points = random.sample(range(prime), 7)
+    modulus, interpolant = FFPoly([1], prime), FFPoly([], prime)
+    for point in points:
+        modulus = modulus * FFPoly([-point, 1], prime)
+    for point in points:  # Lagrange interpolation
+        basis = modulus // FFPoly([-point, 1], prime)
+        interpolant = interpolant + basis * int(numerator(point) / denominator(point) / basis(point))
+    assert rational_reconstruction(interpolant, modulus) == FFRational(numerator, denominator)
+    assert rational_reconstruction(interpolant, modulus, min_slack=2) is None
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 998244353, 2 ** 61 - 1, 7])
+@pytest.mark.parametrize("lengths", [(5, 9), (40, 100), (300, 1200), (2100, 2500)])
+def test_convolve_mod(prime, lengths):
+    a, b = ([random.randrange(prime) for i in range(length)] for length in lengths)
+    assert list(convolve_mod(a, b, prime)) == list(_schoolbook_convolve(numpy.array(a, dtype=object), numpy.array(b, dtype=object), prime))
+
+
+def test_ntt_round_trip():
+    for modulus in ntt_primes:
+        a = numpy.array([random.randrange(modulus) for i in range(64)])
+        assert all(ntt(ntt(a, modulus), modulus, inverse=True) == a)
+    with pytest.raises(ValueError):
+        ntt(numpy.arange(6), 998244353)
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+def test_FFPoly_fast_divmod_and_gcd(prime, monkeypatch):
+    monkeypatch.setattr("pyadic.polynomials.half_gcd_threshold", 40)
+    monkeypatch.setattr("pyadic.polynomials.half_gcd_base_case", 16)
+
+    def random_poly(degree):
+        return FFPoly([random.randrange(prime) for i in range(degree)] + [1], prime)
+    a, b = random_poly(1500), random_poly(300)
+    q, r = divmod(a, b)
+    assert q * b + r == a and r.degree < b.degree
+    g = random_poly(60)
+    x, y = random_poly(150) * g, random_poly(120) * g
+    (m00, m01), (m10, m11) = half_gcd(x, y)
+    assert (m00 * x + m01 * y).degree >= 105 > (m10 * x + m11 * y).degree
+    assert x.gcd(y) == g
+    with pytest.raises(ValueError):
+        half_gcd(y, x)
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+@pytest.mark.parametrize("npoints", [1, 4, 13, 50])
+def test_multipoint_evaluation_and_interpolation(prime, npoints, monkeypatch):
+    monkeypatch.setattr("pyadic.polynomials.subproduct_tree_leaf_size", 4)
+    poly = FFPoly([random.randrange(prime) for i in range(npoints)], prime)
+    points = [ModP(x, prime) for x in random.sample(range(prime), npoints)]
+    levels = subproduct_tree(points, prime)
+    assert len(levels[0]) == -(-npoints // 4) and levels[-1][0].degree == npoints and all(levels[-1][0](x) == 0 for x in points)
+    values = multipoint_evaluation(poly, points)
+    assert list(values) == [int(poly(x)) for x in points]
+    assert interpolate_at_points(points, values, prime) == poly
+    assert interpolate_at_points(points, [poly(x) for x in points], prime) == poly
+
+
+def test_interpolate_at_points_errors():
+    with pytest.raises(ZeroDivisionError):
+        interpolate_at_points([1, 2, 1], [3, 4, 5], prime)
+    with pytest.raises(ValueError):
+        interpolate_at_points([1, 2], [3], prime)
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+@pytest.mark.parametrize("size", [1, 9, 70])
+def test_solve_transposed_Vandermonde(prime, size):
+    nodes, solution = random.sample(range(1, prime), size), [random.randrange(prime) for i in range(size)]
+    values = [sum(c * pow(node, j, prime) for c, node in zip(solution, nodes)) % prime for j in range(size)]
+    assert list(solve_transposed_Vandermonde([ModP(node, prime) for node in nodes], values, prime)) == solution
+    with pytest.raises(ZeroDivisionError):
+        solve_transposed_Vandermonde([3, 5, 3], [1, 2, 3], prime)
+
+
+@pytest.mark.parametrize("prime", [2 ** 31 - 1, 2 ** 61 - 1])
+def test_partial_fractions(prime):
+    factors = [FFPoly([random.randrange(prime) for i in range(degree)] + [1], prime) for degree in (1, 2, 3)]
+    denominator = 7 * factors[0] ** 3 * factors[1] * factors[2] ** 2
+    assert square_free_decomposition(denominator) == [(factors[1], 1), (factors[2], 2), (factors[0], 3)]
+    rational = FFRational(FFPoly([random.randrange(prime) for i in range(denominator.degree + 4)], prime), denominator)
+    decomposition = partial_fractions(rational)
+    assert decomposition.polynomial.degree == 3 and len(decomposition.terms) == 6
+    assert all(numerator.degree < factor.degree for numerator, factor, power in decomposition.terms)
+    assert sum((FFRational(numerator, factor ** power) for numerator, factor, power in decomposition.terms), FFRational(decomposition.polynomial)) == rational
+
+
+def test_padic_partial_fractions():
+    numerator, denominator = sympy.Poly(t ** 6 - Q(2, 3) * t + 1, t), sympy.Poly(7 * (t - 1) ** 2 * (t + Q(1, 2)) * (t ** 2 + 3), t)
+    decomposition = padic_partial_fractions(numerator.all_coeffs()[::-1], denominator.all_coeffs()[::-1])
+    assert decomposition.polynomial == [Q(3, 14), Q(1, 7)]
+    assert [(sympy.Poly(factor[::-1], t).as_expr(), power) for numerator_, factor, power in decomposition.terms] == \
+        [(t ** 3 + t ** 2 / 2 + 3 * t + Q(3, 2), 1), (t - 1, 2), (t - 1, 1)]
+    expr = sympy.Poly(decomposition.polynomial[::-1], t).as_expr() + sum(
+        sympy.Poly(numerator_[::-1], t).as_expr() / sympy.Poly(factor[::-1], t).as_expr() ** power for numerator_, factor, power in decomposition.terms)
+    assert sympy.cancel(expr - numerator.as_expr() / denominator.as_expr()) == 0
+    assert padic_partial_fractions([1], [Q(1, 2 ** 31 - 1), 0, 1]).terms == [([1], [Q(1, 2 ** 31 - 1), 0, 1], 1)]  # first prime skipped
@@ -0,0 +1,50 @@
+import sympy
+
+from pyadic.interpolation import Newton_polynomial_interpolation, multivariate_rational_interpolation
+from pyadic.probe_store import ProbeStore
+
+t = sympy.symbols('t')
+t1, t2 = sympy.symbols('t1:3')
+
+
+class CountingBlackBox(object):
+
+    def __init__(self, fail_after=None):
+        self.calls, self.fail_after = 0, fail_after
+
+    def __call__(self, tval):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise KeyboardInterrupt("pre-empted")
+        self.calls += 1
+        return tval ** 20 + tval - 1
+
+
+def test_probe_store_replays_and_resumes(tmp_path):
+    path, prime = str(tmp_path / "probes.sqlite"), 2 ** 31 - 1
+    interrupted = CountingBlackBox(fail_after=10)
+    with ProbeStore(path, flush_every=3) as store:
+        try:
+            Newton_polynomial_interpolation(interrupted, prime, probe_store=store)
+        except KeyboardInterrupt:
+            pass
+    resumed = CountingBlackBox()
+    with ProbeStore(path) as store:
+        assert len(store) == 10
+        assert Newton_polynomial_interpolation(resumed, prime, probe_store=store) == t ** 20 + t - 1
+    assert resumed.calls == 23 - 10
+    replayed = CountingBlackBox()
+    with ProbeStore(path) as store:
+        assert Newton_polynomial_interpolation(replayed, prime, probe_store=store) == t ** 20 + t - 1
+        Newton_polynomial_interpolation(replayed, prime, seed=1, probe_store=store)
+    assert replayed.calls == 23  # only the new seed is evaluated
+
+
+def test_probe_store_multivariate(tmp_path):
+    path, prime = str(tmp_path / "probes.sqlite"), 2 ** 31 - 1
+
+    def black_box(t1, t2):
+        return t1 * t2 / (t1 + t2)
+
+    with ProbeStore(path) as store:
+        result, calls = multivariate_rational_interpolation(black_box, prime, with_calls=True, probe_store=store)
+        assert result == t1 * t2 / (t1 + t2) and len(store) == calls